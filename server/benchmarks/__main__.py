@@ -0,0 +1,241 @@
+"""
+    Benchmark suite: environment steps/sec and cal/get_m_mu/myopic_action_cal latency for several numbers of
+    servers, training steps/sec of every algorithm of ALGORITHM_MP and the latency of GET /run_algorithm through
+    the Flask test client. The results are written as JSON with a description of the machine and the commit,
+    --compare prints the ratio of every metric to a previous result file.
+    Run from server/:
+        PYTHONPATH=src python -m benchmarks --output bench.json
+        PYTHONPATH=src python -m benchmarks --only env latency --compare bench.json
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import subprocess
+import time
+import numpy as np
+
+# the suite measures computations, not the caches skipping them
+os.environ.setdefault('MODEL_CACHE_MAX_BYTES', '0')
+os.environ.setdefault('RESULT_CACHE_SIZE', '0')
+
+from algorithms.gym_offload_autoscale.envs.offload_autoscale_env import OffloadAutoscaleEnv  # noqa: E402
+from .params import ALGORITHM_ARGS, ENV_KWARGS  # noqa: E402
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def machine_info() -> dict:
+    try:
+        import numba
+        numba_version = numba.__version__
+    except ImportError:
+        numba_version = None
+    return {
+        'commit': git_commit(),
+        'date': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'processor': platform.processor(),
+        'cpu_count': os.cpu_count(),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'numba': numba_version,
+    }
+
+
+def make_env(max_number_of_server: int, seed: int) -> OffloadAutoscaleEnv:
+    env = OffloadAutoscaleEnv(**dict(ENV_KWARGS, max_number_of_server=max_number_of_server))
+    env.seed(seed)
+    env.reset()
+    return env
+
+
+def env_steps_per_sec(max_number_of_server: int, steps: int, seed: int) -> float:
+    env = make_env(max_number_of_server, seed)
+    actions = np.random.RandomState(seed).rand(steps)
+    # the first step compiles the kernel
+    env.step(actions[0])
+    start = time.perf_counter()
+    for action in actions:
+        if env.step(action)[2]:
+            env.reset()
+    return steps / (time.perf_counter() - start)
+
+
+# mean microseconds per call of call(env) over random states within the observation space
+def latency_us(max_number_of_server: int, call, calls: int, seed: int) -> float:
+    env = make_env(max_number_of_server, seed)
+    rng = np.random.RandomState(seed)
+    states = rng.uniform(env.observation_space.low, env.observation_space.high, (calls, 4))
+    states[:, 3] = np.round(states[:, 3])
+    actions = rng.rand(calls)
+    elapsed = 0.0
+    for state, action in zip(states, actions):
+        env.state = state
+        start = time.perf_counter()
+        call(env, action)
+        elapsed += time.perf_counter() - start
+    return elapsed / calls * 1e6
+
+
+def de_action(env: OffloadAutoscaleEnv, action: float) -> float:
+    # the argument cal() passes to get_m_mu()
+    lamda, b, _, _ = env.state
+    high_bound = min(b - env.get_dop(), env.get_dcom(env.max_number_of_server, lamda))
+    return env.server_power_consumption + action * (high_bound - env.server_power_consumption)
+
+
+LATENCY_CALLS = {
+    'cal': lambda env, action: env.cal(action),
+    'get_m_mu': lambda env, action: env.get_m_mu(de_action(env, action)),
+    'myopic_action_cal': lambda env, action: env.myopic_action_cal(),
+}
+
+
+def training_steps_per_sec(name: str, args: dict) -> dict:
+    from runner import ALGORITHM_MP, get_algorithm_args
+    reports = []
+    start = time.perf_counter()
+    ALGORITHM_MP[name](**get_algorithm_args(name, args), report=reports.append)
+    seconds = time.perf_counter() - start
+    # the last training report covers the whole training
+    training = [report for report in reports if report.get('stage') == 'training' and 'steps_per_sec' in report]
+    return {'steps_per_sec': training[-1]['steps_per_sec'] if training else int(args['train_time_slots']) / seconds,
+            'seconds': seconds}
+
+
+def endpoint_seconds(client, name: str, args: dict, repeats: int) -> float:
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        response = client.get('/run_algorithm/{}'.format(name), query_string=args)
+        times.append(time.perf_counter() - start)
+        if response.status_code != 200:
+            raise RuntimeError('GET /run_algorithm/{} returned {}'.format(name, response.status_code))
+    return float(np.median(times))
+
+
+# the measured metrics and the errors of the measurements that failed
+class Results:
+    def __init__(self) -> None:
+        self.metrics = {}
+        self.errors = {}
+
+    def error(self, key: str, e: Exception) -> None:
+        self.errors[key] = '{}: {}'.format(type(e).__name__, e)
+        print('{:<44} failed: {}'.format(key, self.errors[key]))
+
+    # function returns a number, or a dict of numbers stored as <key>.<name>
+    def measure(self, key: str, function, *function_args) -> None:
+        try:
+            value = function(*function_args)
+        except Exception as e:
+            self.error(key, e)
+            return
+        values = {'{}.{}'.format(key, name): number for name, number in value.items()} if isinstance(value, dict) else {key: value}
+        for name, number in values.items():
+            self.metrics[name] = number
+            print('{:<44} {:>14.2f}'.format(name, number))
+
+
+def run_env(args, results: Results) -> None:
+    for servers in args.servers:
+        results.measure('env.steps_per_sec.M={}'.format(servers), env_steps_per_sec, servers, args.steps, args.seed)
+
+
+def run_latency(args, results: Results) -> None:
+    for servers in args.servers:
+        for name, call in LATENCY_CALLS.items():
+            calls = args.myopic_calls if name == 'myopic_action_cal' else args.calls
+            results.measure('latency.{}_us.M={}'.format(name, servers), latency_us, servers, call, calls, args.seed)
+
+
+def algorithm_args(args) -> dict:
+    return dict(ALGORITHM_ARGS, train_time_slots=str(args.train_slots), random_seed=str(args.seed))
+
+
+# the algorithms to measure, all of ALGORITHM_MP unless --algorithms names them
+def algorithm_names(args, results: Results) -> list:
+    if args.algorithms is None:
+        try:
+            from runner import ALGORITHM_MP
+            args.algorithms = list(ALGORITHM_MP)
+        except ImportError as e:
+            results.error('algorithms', e)
+            args.algorithms = []
+    return args.algorithms
+
+
+# importing an algorithm loads TensorFlow, a missing one fails the measurement of that algorithm only
+def run_training(args, results: Results) -> None:
+    for name in algorithm_names(args, results):
+        results.measure('training.{}'.format(name), training_steps_per_sec, name, algorithm_args(args))
+
+
+def run_endpoint(args, results: Results) -> None:
+    try:
+        from app import app
+        client = app.test_client()
+    except Exception as e:
+        results.error('endpoint', e)
+        return
+    for name in algorithm_names(args, results):
+        results.measure('endpoint.seconds.{}'.format(name), endpoint_seconds, client, name, algorithm_args(args), args.repeats)
+
+
+# the parts of the suite, in the order they run
+SUITE_RUNS = {'env': run_env, 'latency': run_latency, 'training': run_training, 'endpoint': run_endpoint}
+
+
+def run(args) -> dict:
+    results = Results()
+    for suite, run_suite in SUITE_RUNS.items():
+        if suite in args.only:
+            run_suite(args, results)
+    return {'machine': machine_info(), 'config': vars(args), 'metrics': results.metrics, 'errors': results.errors}
+
+
+# ratio of every metric to the same metric of a previous run, above 1 is faster
+def compare(result: dict, baseline: dict) -> None:
+    print('\ncompared to {} ({})'.format(baseline['machine'].get('commit'), baseline['machine'].get('date')))
+    for name, value in result['metrics'].items():
+        previous = baseline['metrics'].get(name)
+        if not previous or not value:
+            continue
+        speedup = value / previous if 'per_sec' in name else previous / value
+        print('{:<44} {:>14.2f} {:>14.2f}  x{:.2f}'.format(name, previous, value, speedup))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--only', nargs='+', default=list(SUITE_RUNS), choices=list(SUITE_RUNS))
+    parser.add_argument('--servers', type=int, nargs='+', default=[10, 100, 1000], help='max_number_of_server values')
+    parser.add_argument('--steps', type=int, default=20000, help='environment steps per measurement')
+    parser.add_argument('--calls', type=int, default=2000, help='cal and get_m_mu calls per measurement')
+    parser.add_argument('--myopic-calls', type=int, default=20, help='myopic_action_cal calls per measurement')
+    parser.add_argument('--algorithms', nargs='+', help='names in ALGORITHM_MP, all of them by default')
+    parser.add_argument('--train-slots', type=int, default=2000)
+    parser.add_argument('--repeats', type=int, default=1, help='requests per algorithm, the median is reported')
+    parser.add_argument('--seed', type=int, default=1234)
+    parser.add_argument('--output', help='JSON file the results are written to')
+    parser.add_argument('--compare', help='JSON file of a previous run')
+    args = parser.parse_args()
+    result = run(args)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(result, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            compare(result, json.load(f))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+"""
+    DQN convergence, training steps until the greedy policy reaches a given average cost, for the
+    previous solver (bootstrapping from the fitted network, x0.995 exploration decay) against a frozen
+    target network, Double DQN and the exploration schedule tied to the training budget.
+    The policy is evaluated every --eval-every steps on --eval-slots slots of a separately seeded environment.
+    Run from server/:
+        PYTHONPATH=src python -m benchmarks.dqn_convergence --train-slots 2000 --threshold 6
+"""
+import argparse
+import time
+import gym
+import numpy as np
+import random
+import tensorflow as tf
+from algorithms import gym_offload_autoscale  # noqa: F401, registers the environment
+from algorithms.dqn import DQNSolver
+from algorithms.gym_offload_autoscale.envs import DiscreteActionWrapper
+from .params import ENV_KWARGS
+
+# name: DQNSolver options, exploration_fraction is relative to --train-slots (None: x0.995 per replay)
+SOLVERS = {
+    'legacy': dict(target_update=0, double_dqn=False, exploration_fraction=None),
+    'target': dict(target_update=100, double_dqn=False, exploration_fraction=0.1),
+    'double': dict(target_update=100, double_dqn=True, exploration_fraction=0.1),
+}
+
+
+def make_env(action_bins: int, seed: int):
+    env = DiscreteActionWrapper(gym.make('offload-autoscale-v0', **ENV_KWARGS), action_bins)
+    env.seed(seed)
+    return env
+
+
+def evaluate(solver: DQNSolver, env, slots: int) -> float:
+    state = np.reshape(env.reset(), [1, -1])
+    total = 0.0
+    for _ in range(slots):
+        state, reward, _, _ = env.step(solver.act(state, explore=False))
+        state = np.reshape(state, [1, -1])
+        total += 1 / reward
+    return total / slots
+
+
+def converge(name: str, args) -> dict:
+    options = dict(SOLVERS[name])
+    fraction = options.pop('exploration_fraction')
+    random.seed(args.seed)
+    np.random.seed(args.seed)
+    tf.set_random_seed(args.seed)
+    env = make_env(args.action_bins, args.seed)
+    eval_env = make_env(args.action_bins, args.seed + 1)
+    observation_space = env.observation_space.shape[0]
+    exploration_steps = int(fraction * args.train_slots) if fraction else None
+    solver = DQNSolver(observation_space, env.action_space.n, exploration_steps=exploration_steps, **options)
+
+    start = time.perf_counter()
+    curve = []
+    state = np.reshape(env.reset(), [1, observation_space])
+    step = 0
+    for accumulated_step in range(1, args.train_slots + 1):
+        action = solver.act(state)
+        next_state, reward, _, _ = env.step(action)
+        next_state = np.reshape(next_state, [1, observation_space])
+        step += 1
+        done = step == args.steps_per_episode
+        solver.remember(state, action, 1 / reward, next_state, done)
+        state = next_state
+        if done:
+            state, step = np.reshape(env.reset(), [1, observation_space]), 0
+        else:
+            solver.replay()
+        if accumulated_step % args.eval_every == 0:
+            curve.append((accumulated_step, evaluate(solver, eval_env, args.eval_slots)))
+    reached = next((step for step, cost in curve if cost <= args.threshold), None)
+    return {'steps_to_threshold': reached, 'final_cost': curve[-1][1] if curve else None,
+            'best_cost': min(cost for _, cost in curve) if curve else None,
+            'seconds': time.perf_counter() - start}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--solvers', nargs='+', default=list(SOLVERS), choices=list(SOLVERS))
+    parser.add_argument('--train-slots', type=int, default=2000)
+    parser.add_argument('--steps-per-episode', type=int, default=96)
+    parser.add_argument('--threshold', type=float, required=True, help='average cost the greedy policy has to reach')
+    parser.add_argument('--eval-every', type=int, default=100)
+    parser.add_argument('--eval-slots', type=int, default=96)
+    parser.add_argument('--action-bins', type=int, default=11)
+    parser.add_argument('--seed', type=int, default=1234)
+    args = parser.parse_args()
+    for name in args.solvers:
+        result = converge(name, args)
+        reached = result['steps_to_threshold']
+        print('{:>8}  steps to {:g}: {:>8}  final {:8.4f}  best {:8.4f}  {:7.1f}s'.format(
+            name, args.threshold, reached if reached is not None else 'never',
+            result['final_cost'], result['best_cost'], result['seconds']))
+
+
+if __name__ == '__main__':
+    main()
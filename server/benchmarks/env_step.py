@@ -0,0 +1,94 @@
+"""
+    Single environment steps/sec of OffloadAutoscaleEnv.step() with step_kernel (compiled with numba when
+    it is installed, and as plain Python), against the previous step() calling the transition functions one by one
+    (get_g, get_lambda and get_h now draw from the environment's pre-drawn blocks as well).
+    The trajectories are checked to be identical first.
+    Run from server/:
+        PYTHONPATH=src python -m benchmarks.env_step --steps 100000
+"""
+import argparse
+import time
+import numpy as np
+from algorithms.gym_offload_autoscale.envs import kernels, offload_autoscale_env
+from algorithms.gym_offload_autoscale.envs.offload_autoscale_env import OffloadAutoscaleEnv
+from .params import ENV_KWARGS
+
+
+def legacy_step(env: OffloadAutoscaleEnv, action):
+    done = False
+    action = float(action)
+    env.get_time()
+    env.time_step += 1
+    env.g = env.get_g()
+    env.d_op = env.get_dop()
+    m_mu = env.cal(action)
+    env.d_com = env.get_dcom(*m_mu)
+    env.d = env.d_op + env.d_com
+    reward = env.reward_func(action, m_mu)
+    lambda_t = env.get_lambda()
+    b_t = env.get_b()
+    h_t = env.get_h()
+    e_t = env.get_e()
+    env.state = np.array([lambda_t, b_t, h_t, e_t])
+    if env.time_step >= env.time_steps_per_episode:
+        done = True
+        env.episode += 1
+    return env.state, 1 / reward, done, {}
+
+
+def trajectory(step, actions: np.ndarray, seed: int) -> np.ndarray:
+    env = OffloadAutoscaleEnv(**ENV_KWARGS)
+    env.seed(seed)
+    env.reset()
+    rows = []
+    for action in actions:
+        state, reward, done, _ = step(env, action)
+        rows.append(np.concatenate([state, [reward, env.time, env.m, env.mu, *env.render()]]))
+        if done:
+            env.reset()
+    return np.array(rows)
+
+
+def steps_per_sec(step, actions: np.ndarray, seed: int) -> float:
+    env = OffloadAutoscaleEnv(**ENV_KWARGS)
+    env.seed(seed)
+    env.reset()
+    start = time.perf_counter()
+    for action in actions:
+        if step(env, action)[2]:
+            env.reset()
+    return len(actions) / (time.perf_counter() - start)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--steps', type=int, default=100000)
+    parser.add_argument('--check-steps', type=int, default=10000, help='steps compared against the previous step()')
+    parser.add_argument('--seed', type=int, default=1234)
+    args = parser.parse_args()
+    actions = np.random.RandomState(args.seed).rand(args.steps)
+    kernel = offload_autoscale_env.step_kernel
+    python_kernel = getattr(kernel, 'py_func', kernel)
+    variants = [('legacy', legacy_step, None), ('kernel', OffloadAutoscaleEnv.step, kernel)]
+    if python_kernel is not kernel:
+        variants.append(('kernel (python)', OffloadAutoscaleEnv.step, python_kernel))
+    print('numba: {}'.format('yes' if python_kernel is not kernel else 'no, {} runs as plain Python'.format(kernels.__name__)))
+
+    reference = trajectory(legacy_step, actions[:args.check_steps], args.seed)
+    legacy = None
+    for name, step, step_kernel in variants:
+        if step_kernel is not None:
+            offload_autoscale_env.step_kernel = step_kernel
+            # the first call compiles the kernel
+            trajectory(step, actions[:1], args.seed)
+            identical = np.array_equal(trajectory(step, actions[:args.check_steps], args.seed), reference)
+        else:
+            identical = True
+        rate = steps_per_sec(step, actions, args.seed)
+        legacy = legacy or rate
+        print('{:>16} {:>10.0f} steps/s  x{:<6.1f} identical trajectory: {}'.format(name, rate, rate / legacy, identical))
+    offload_autoscale_env.step_kernel = kernel
+
+
+if __name__ == '__main__':
+    main()
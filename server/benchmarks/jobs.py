@@ -0,0 +1,58 @@
+"""
+    Seconds per job of small algorithm runs through the job manager, from submission to result:
+    'cold' starts a new process for every job (max_jobs_per_worker=1, nothing preloaded), as the job manager
+    did before the warm workers, 'warm' runs them on workers that import the algorithms once and keep their models.
+    The first warm job of every algorithm builds its model and is left out.
+    Run from server/:
+        PYTHONPATH=src python -m benchmarks.jobs --algorithms FIXED PPO DQN --jobs 5
+"""
+import argparse
+import time
+import numpy as np
+from .params import ALGORITHM_ARGS
+from jobs import FINISHED, RUNNING, PENDING, JobManager
+from runner import get_algorithm_args, init_worker, run_algorithm
+
+
+def run_job(manager: JobManager, name: str, args: dict) -> float:
+    start = time.perf_counter()
+    job = manager.submit(run_algorithm, name, get_algorithm_args(name, args))
+    while job.status in (PENDING, RUNNING):
+        time.sleep(0.005)
+    if job.status != FINISHED:
+        raise RuntimeError('{} {}: {}'.format(name, job.status, job.error))
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--algorithms', nargs='+', default=['FIXED', 'PPO', 'DQN'])
+    parser.add_argument('--jobs', type=int, default=5, help='jobs per algorithm and mode')
+    parser.add_argument('--time-slots', type=int, default=96)
+    parser.add_argument('--train-slots', type=int, default=200)
+    parser.add_argument('--seed', type=int, default=1234)
+    args = parser.parse_args()
+    algorithm_args = dict(ALGORITHM_ARGS, time_slots=str(args.time_slots), train_time_slots=str(args.train_slots),
+                          random_seed=str(args.seed))
+    managers = {
+        'cold': JobManager(max_workers=1, max_jobs_per_worker=1),
+        'warm': JobManager(max_workers=1, initializer=init_worker),
+    }
+    for name in args.algorithms:
+        seconds = {}
+        for mode, manager in managers.items():
+            try:
+                if mode == 'warm':
+                    run_job(manager, name, algorithm_args)
+                seconds[mode] = float(np.median([run_job(manager, name, algorithm_args) for _ in range(args.jobs)]))
+            except RuntimeError as e:
+                print('{:<8} {} failed: {}'.format(name, mode, e))
+        if len(seconds) == len(managers):
+            print('{:<8} cold {:>8.3f} s/job  warm {:>8.3f} s/job  x{:.1f}'.format(
+                name, seconds['cold'], seconds['warm'], seconds['cold'] / seconds['warm']))
+    for manager in managers.values():
+        manager.shutdown()
+
+
+if __name__ == '__main__':
+    main()
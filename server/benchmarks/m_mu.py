@@ -0,0 +1,81 @@
+"""
+    (m, μ) of get_m_mu() by evaluating every m (scan_m_mu(), as the environment did for any M) and by the O(log M)
+    search it uses above SCAN_MAX_SERVERS servers (search_m_mu()), for several numbers of servers.
+    Both are checked to pick exactly the same pair on random states and actions first, then timed, together with
+    the environment steps/sec (the step kernel picks the search above SCAN_MAX_SERVERS as well).
+    Run from server/:
+        PYTHONPATH=src python -m benchmarks.m_mu --servers 10 1000 100000
+"""
+import argparse
+import sys
+import time
+import numpy as np
+from algorithms.gym_offload_autoscale.envs.kernels import SCAN_MAX_SERVERS, scan_m_mu, search_m_mu
+from algorithms.gym_offload_autoscale.envs.offload_autoscale_env import OffloadAutoscaleEnv
+from .__main__ import de_action
+from .myopic import random_states
+from .params import ENV_KWARGS
+
+
+# the arguments of scan_m_mu() and search_m_mu() for every state, with the de_a cal() maps action to
+def m_mu_args(env: OffloadAutoscaleEnv, states: np.ndarray, actions: np.ndarray) -> list:
+    args = []
+    for state, action in zip(states, actions):
+        env.state = state
+        # the states where cal() returns [0, 0] without calling get_m_mu()
+        if state[1] <= env.get_dop() + env.server_power_consumption:
+            continue
+        args.append((float(de_action(env, action)), float(state[0]), float(state[2]), env.max_number_of_server,
+                     env.server_service_rate, env.server_power_consumption, env.lamda_low))
+    return args
+
+
+def calls_per_sec(function, args: list) -> float:
+    start = time.perf_counter()
+    for call_args in args:
+        function(*call_args)
+    return len(args) / (time.perf_counter() - start)
+
+
+def steps_per_sec(env: OffloadAutoscaleEnv, actions: np.ndarray) -> float:
+    env.reset()
+    start = time.perf_counter()
+    for action in actions:
+        env.step(action)
+    return len(actions) / (time.perf_counter() - start)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--servers', type=int, nargs='+', default=[10, 1000, 100000])
+    parser.add_argument('--states', type=int, default=2000, help='random states the search is checked on')
+    parser.add_argument('--calls', type=int, default=20000, help='calls per measurement, fewer for the scan of large M')
+    parser.add_argument('--seed', type=int, default=1234)
+    args = parser.parse_args()
+    failed = False
+    for servers in args.servers:
+        env = OffloadAutoscaleEnv(**dict(ENV_KWARGS, max_number_of_server=servers))
+        env.seed(args.seed)
+        rng = np.random.RandomState(args.seed)
+        checked = m_mu_args(env, random_states(env, args.states, args.seed), rng.uniform(size=args.states))
+        mismatches = sum(scan_m_mu(*call_args) != search_m_mu(*call_args) for call_args in checked)
+        failed = failed or mismatches > 0
+
+        timed = m_mu_args(env, random_states(env, args.calls, args.seed + 1), rng.uniform(size=args.calls))
+        # the first calls compile the kernels when numba is installed
+        scan_m_mu(*timed[0])
+        search_m_mu(*timed[0])
+        steps_per_sec(env, rng.uniform(size=1))
+        scan_rate = calls_per_sec(scan_m_mu, timed[:max(10, len(timed) * 1000 // max(servers, 1000))])
+        search_rate = calls_per_sec(search_m_mu, timed)
+        step_rate = steps_per_sec(env, rng.uniform(size=args.calls))
+        print('M={:<7} scan {:>10.0f} calls/s  search {:>10.0f} calls/s (x{:<8.1f}) env {:>8.0f} steps/s ({})'
+              '  mismatches {}/{}  {}'.format(
+                  servers, scan_rate, search_rate, search_rate / scan_rate, step_rate,
+                  'search' if servers > SCAN_MAX_SERVERS else 'scan', mismatches, len(checked),
+                  'ok' if mismatches == 0 else 'FAILED'))
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
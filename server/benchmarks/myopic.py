@@ -0,0 +1,96 @@
+"""
+    myopic_action_cal() with the analytic per-m minimizer (and its optional memo) against the previous
+    implementation, one scipy.optimize.minimize_scalar(method='bounded') call per m.
+    The actions are checked to agree within --tolerance on random states first, states where two m have the same
+    minimal cost (within the SciPy tolerance) may pick different m and are only counted.
+    Run from server/:
+        PYTHONPATH=src python -m benchmarks.myopic --servers 10 100 1000
+"""
+import argparse
+import math
+import sys
+import time
+import numpy as np
+from scipy.optimize import minimize_scalar
+from algorithms.gym_offload_autoscale.envs.offload_autoscale_env import OffloadAutoscaleEnv
+from .params import ENV_KWARGS
+
+
+# returns the action and the minimal cost
+def scipy_myopic(env: OffloadAutoscaleEnv):
+    lamda, b, h, _ = env.state
+    d_op = env.get_dop()
+    if b <= d_op + env.server_power_consumption:
+        return 0, None
+    ans = math.inf
+    for m in range(1, env.max_number_of_server):
+        def f(mu, m, h, lamda):
+            return (1 - env.priority_coefficent) * (mu/(m*env.server_service_rate-mu)+h*(lamda - mu)) + env.priority_coefficent * (env.normalized_unit_depreciation_cost*(env.server_power_consumption*m+env.server_power_consumption/env.lamda_low*mu))
+        res = minimize_scalar(f, bounds=(0, np.minimum(lamda, m*env.server_service_rate)), args=(m, h, lamda), method='bounded')
+        if res.fun < ans:
+            ans = res.fun
+            params = [m, res.x]
+    d_com = env.server_power_consumption*params[0]+env.server_power_consumption/env.lamda_low*params[1]
+    return env.fixed_action_cal(d_com), ans
+
+
+def analytic_cost(env: OffloadAutoscaleEnv) -> float:
+    lamda, _, h, _ = env.state
+    m = env.server_candidates[:-1]
+    return float(np.min(env.myopic_cost(m, env.myopic_mu(m, lamda, h), lamda, h)))
+
+
+def random_states(env: OffloadAutoscaleEnv, n: int, seed: int) -> np.ndarray:
+    states = np.random.RandomState(seed).uniform(env.observation_space.low, env.observation_space.high, (n, 4))
+    states[:, 3] = np.round(states[:, 3])
+    return states
+
+
+def calls_per_sec(env: OffloadAutoscaleEnv, call, states: np.ndarray) -> float:
+    start = time.perf_counter()
+    for state in states:
+        env.state = state
+        call()
+    return len(states) / (time.perf_counter() - start)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--servers', type=int, nargs='+', default=[10, 100, 1000])
+    parser.add_argument('--states', type=int, default=200, help='random states compared against SciPy')
+    parser.add_argument('--calls', type=int, default=20000, help='calls per measurement of the analytic minimizer')
+    parser.add_argument('--memo-levels', type=int, default=100, help='quantization levels of the memo')
+    parser.add_argument('--tolerance', type=float, default=1e-4, help='largest allowed difference of the actions')
+    parser.add_argument('--seed', type=int, default=1234)
+    args = parser.parse_args()
+    failed = False
+    for servers in args.servers:
+        env = OffloadAutoscaleEnv(**dict(ENV_KWARGS, max_number_of_server=servers))
+        states = random_states(env, args.states, args.seed)
+        worst, ties, start = 0.0, 0, time.perf_counter()
+        for state in states:
+            env.state = state
+            action, cost = scipy_myopic(env)
+            difference = abs(action - env.myopic_action_cal())
+            if difference > args.tolerance and cost is not None and abs(cost - analytic_cost(env)) <= 1e-5 * abs(cost):
+                ties += 1
+            else:
+                worst = max(worst, difference)
+        scipy_rate = len(states) / (time.perf_counter() - start)
+        failed = failed or worst > args.tolerance
+
+        # states of a replayed trace repeat, the memo is timed on a few thousand distinct ones
+        states = random_states(env, args.calls, args.seed)
+        analytic_rate = calls_per_sec(env, env.myopic_action_cal, states)
+        env.enable_myopic_memo(args.memo_levels)
+        repeated = states[np.random.RandomState(args.seed).randint(0, 2000, len(states))]
+        memo_rate = calls_per_sec(env, env.myopic_action_cal, repeated)
+        print('M={:<6} scipy {:>9.0f} calls/s  analytic {:>9.0f} calls/s (x{:<7.1f}) memo {:>9.0f} calls/s'
+              '  max |Δaction| {:.2e}  ties {}  {}'.format(
+                  servers, scipy_rate, analytic_rate, analytic_rate / scipy_rate, memo_rate, worst, ties,
+                  'ok' if worst <= args.tolerance else 'FAILED'))
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,19 @@
+'''
+    Parameters shared by the benchmarks, kept apart from the benchmarks themselves so that importing them does not
+    import stable_baselines or TensorFlow.
+'''
+
+# keyword arguments of OffloadAutoscaleEnv, the defaults of the UI
+ENV_KWARGS = dict(p_coeff=0.5, timeslot_duration=0.25, max_number_of_server=15,
+                  server_service_rate=20, d_sta=300, coef_dyn=0.5,
+                  server_power_consumption=150, batery_capacity=2000,
+                  lamda_high=100, lamda_low=20, h_high=0.06, h_low=0.02,
+                  back_up_cost_coef=0.15, normalized_unit_depreciation_cost=0.01,
+                  time_steps_per_episode=96)
+
+# query parameters of the algorithm runs, the defaults of the UI with a short training and evaluation
+ALGORITHM_ARGS = dict(time_slots='96', p_coeff='0.5', timeslot_duration='15', max_number_of_server='15',
+                      server_service_rate='20', d_sta='300', coef_dyn='0.5', server_power_consumption='150',
+                      batery_capacity='2000', lamda_high='100', lamda_low='20', h_high='0.06', h_low='0.02',
+                      back_up_cost_coef='0.15', normalized_unit_depreciation_cost='0.01',
+                      time_steps_per_episode='96', train_time_slots='2000', verbose='0', random_seed='1234')
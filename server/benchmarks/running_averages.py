@@ -0,0 +1,59 @@
+"""
+    Cost of accumulating the run() time averages, RunningAverages against the previous
+    np.mean-over-the-history loop (O(T^2), so it is only timed up to --legacy-max slots).
+    Run from server/:
+        PYTHONPATH=src python -m benchmarks.running_averages --slots 10000 100000 1000000
+"""
+import argparse
+import time
+import numpy as np
+from algorithms.metrics import RunningAverages
+
+
+def legacy_averages(costs: np.ndarray) -> dict:
+    lists = [[], [], [], []]
+    averages = [[], [], [], []]
+    energy = []
+    for values in costs:
+        for row, value in enumerate(values):
+            lists[row].append(value)
+            averages[row].append(np.mean(lists[row][:]))
+        energy.append(averages[2][-1] + averages[3][-1])
+    result = {name: [float(item) for item in averages[row]] for row, name in enumerate(RunningAverages.SERIES)}
+    result['avg_energy'] = [float(item) for item in energy]
+    return result
+
+
+def running_averages(costs: np.ndarray) -> dict:
+    metrics = RunningAverages(len(costs))
+    for total, delay, backup, battery in costs.tolist():
+        metrics.add(total, delay, backup, battery)
+    return metrics.result()
+
+
+def timed(fn, costs: np.ndarray):
+    start = time.perf_counter()
+    result = fn(costs)
+    return time.perf_counter() - start, result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--slots', type=int, nargs='+', default=[10000, 100000, 1000000])
+    parser.add_argument('--legacy-max', type=int, default=10000, help='largest slot count timed with the legacy loop')
+    parser.add_argument('--seed', type=int, default=1234)
+    args = parser.parse_args()
+    rng = np.random.RandomState(args.seed)
+    for slots in args.slots:
+        costs = rng.uniform(0, 10, (slots, 4))
+        elapsed, result = timed(running_averages, costs)
+        line = '{:>8} slots  running {:>8.3f}s'.format(slots, elapsed)
+        if slots <= args.legacy_max:
+            legacy_elapsed, legacy = timed(legacy_averages, costs)
+            diff = max(np.max(np.abs(np.subtract(result[key], legacy[key]))) for key in result)
+            line += '  legacy {:>8.3f}s  max abs diff {:.2e}'.format(legacy_elapsed, diff)
+        print(line)
+
+
+if __name__ == '__main__':
+    main()
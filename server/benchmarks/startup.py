@@ -0,0 +1,90 @@
+"""
+    Time from starting the server process to its first answer (GET /health), and the memory it holds by then.
+    'lazy' starts the server as it is, 'eager' imports every algorithm of ALGORITHM_MP first, as the server did
+    when app.py imported them (stable_baselines, Keras and TensorFlow).
+    Run from server/:
+        PYTHONPATH=src python -m benchmarks.startup --modes lazy eager --repeats 3
+"""
+import argparse
+import os
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+import numpy as np
+
+# argv: port, mode
+SERVER = '''
+import sys
+from app import app, ALGORITHM_MP
+if sys.argv[2] == 'eager':
+    for name in ALGORITHM_MP:
+        ALGORITHM_MP[name]
+app.run(port=int(sys.argv[1]))
+'''
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, 'src')
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+# peak resident memory (MB) of a running process, Linux only
+def peak_rss_mb(pid: int) -> float:
+    try:
+        with open('/proc/{}/status'.format(pid)) as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+# seconds until the server answers, and its peak memory at that point
+def time_to_first_response(mode: str, timeout: float) -> tuple:
+    port = free_port()
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [SRC_DIR, os.environ.get('PYTHONPATH')])))
+    start = time.perf_counter()
+    process = subprocess.Popen([sys.executable, '-c', SERVER, str(port), mode], cwd=SRC_DIR, env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    try:
+        while time.perf_counter() - start < timeout:
+            if process.poll() is not None:
+                raise RuntimeError('the server exited: {}'.format(process.stderr.read().decode().strip().splitlines()[-1:]))
+            try:
+                with urllib.request.urlopen('http://127.0.0.1:{}/health'.format(port), timeout=1) as response:
+                    if response.status == 200:
+                        return time.perf_counter() - start, peak_rss_mb(process.pid)
+            except OSError:
+                time.sleep(0.01)
+        raise RuntimeError('no answer within {} s'.format(timeout))
+    finally:
+        process.kill()
+        process.wait()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--modes', nargs='+', default=['lazy', 'eager'], choices=['lazy', 'eager'])
+    parser.add_argument('--repeats', type=int, default=3, help='server starts per mode, the median is reported')
+    parser.add_argument('--timeout', type=float, default=120, help='seconds to wait for an answer')
+    args = parser.parse_args()
+    for mode in args.modes:
+        try:
+            runs = [time_to_first_response(mode, args.timeout) for _ in range(args.repeats)]
+        except RuntimeError as e:
+            print('{:<6} failed: {}'.format(mode, e))
+            continue
+        seconds = float(np.median([run[0] for run in runs]))
+        memory = [run[1] for run in runs if run[1] is not None]
+        print('{:<6} first response after {:>7.2f} s  peak memory {}'.format(
+            mode, seconds, '{:.0f} MB'.format(max(memory)) if memory else 'unknown'))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,39 @@
+"""
+    Environment steps/sec of the vectorized training environments at several worker counts.
+    Run from server/:
+        PYTHONPATH=src python -m benchmarks.vec_env --workers 1 4 16 32
+"""
+import argparse
+import time
+import numpy as np
+from algorithms.vec_env import make_vec_env
+from .params import ENV_KWARGS
+
+
+def steps_per_sec(vec_env: str, n_envs: int, steps: int, seed: int) -> float:
+    env = make_vec_env(ENV_KWARGS, n_envs, vec_env, seed)
+    env.reset()
+    actions = np.random.RandomState(seed).rand(steps, n_envs, 1)
+    start = time.perf_counter()
+    for action in actions:
+        env.step(action)
+    elapsed = time.perf_counter() - start
+    env.close()
+    return steps * n_envs / elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 4, 16, 32])
+    parser.add_argument('--vec-env', nargs='+', default=['subproc', 'batched'])
+    parser.add_argument('--steps', type=int, default=2000, help='vectorized steps per measurement')
+    parser.add_argument('--seed', type=int, default=1234)
+    args = parser.parse_args()
+    for vec_env in args.vec_env:
+        for n_envs in args.workers:
+            rate = steps_per_sec(vec_env, n_envs, args.steps, args.seed)
+            print('{:<8} n_envs={:<4} {:>12.0f} env steps/sec'.format(vec_env, n_envs, rate))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+import gym
+from . import gym_offload_autoscale  # noqa: F401, registers the environment
+from .metrics import RunningAverages
+from .model_cache import model_cache
+from .progress import EvaluationProgress
+from .traces import resolve_trace, trace_fingerprint
+import numpy as np
+
+'''
+    What every algorithm shares: the environment parameters of the query string and the evaluation loop.
+    * BaseAlgorithm parses the parameters (strings, as they come from the query) and evaluates the agent for
+      time_slots slots. Subclasses create self.env in init_env() and choose the actions in predict().
+    * BaseRLAlgorithm adds the training parameters and the key of the trained model in the model cache.
+    The algorithms are registered by name in runner.py, their modules (and TensorFlow) are only imported when
+    an algorithm is first used.
+'''
+
+
+class BaseAlgorithm:
+    # the overview does not need a separate process for algorithms without training, see runner.py
+    trains = False
+    # whether the evaluation resets the environment at the end of every episode
+    reset_on_done = True
+
+    def __init__(self, time_slots: str, p_coeff: str,
+                 timeslot_duration: str, max_number_of_server: str,
+                 server_service_rate: str, d_sta: str, coef_dyn: str,
+                 server_power_consumption: str, batery_capacity: str,
+                 lamda_high: str, lamda_low: str, h_high: str, h_low: str,
+                 back_up_cost_coef: str, normalized_unit_depreciation_cost: str,
+                 time_steps_per_episode: str, random_seed: str, trace: str = '', report=None) -> None:
+        self.time_slots = int(time_slots)
+        self.timeslot_duration = float(int(timeslot_duration)/60)  # convert mins to hours
+        self.time_steps_per_episode = int(time_steps_per_episode)
+        self.max_number_of_server = int(max_number_of_server)
+        self.server_service_rate = int(server_service_rate)
+        self.d_sta = int(d_sta)
+        self.coef_dyn = float(coef_dyn)
+        self.server_power_consumption = int(server_power_consumption)
+        self.batery_capacity = int(batery_capacity)
+        self.lamda_high = int(lamda_high)
+        self.lamda_low = int(lamda_low)
+        self.h_high = float(h_high)
+        self.h_low = float(h_low)
+        self.back_up_cost_coef = float(back_up_cost_coef)
+        self.normalized_unit_depreciation_cost = float(normalized_unit_depreciation_cost)
+        self.p_coeff = float(p_coeff)
+        self.random_seed = int(random_seed)
+        # name of a trace in TRACE_DIR to replay instead of drawing λ, h and g, see traces.py
+        self.trace = resolve_trace(trace, self.timeslot_duration)
+        # report(progress) receives the training and evaluation progress, see progress.py
+        self.report = report or (lambda progress: None)
+        self.init_env()
+
+    def get_env_kwargs(self) -> dict:
+        return dict(p_coeff=self.p_coeff,
+                    timeslot_duration=self.timeslot_duration, max_number_of_server=self.max_number_of_server,
+                    server_service_rate=self.server_service_rate, d_sta=self.d_sta, coef_dyn=self.coef_dyn,
+                    server_power_consumption=self.server_power_consumption, batery_capacity=self.batery_capacity,
+                    lamda_high=self.lamda_high, lamda_low=self.lamda_low, h_high=self.h_high, h_low=self.h_low,
+                    back_up_cost_coef=self.back_up_cost_coef,
+                    normalized_unit_depreciation_cost=self.normalized_unit_depreciation_cost,
+                    time_steps_per_episode=self.time_steps_per_episode, trace=self.trace)
+
+    def make_env(self):
+        return gym.make('offload-autoscale-v0', **self.get_env_kwargs())
+
+    def init_env(self) -> None:
+        raise NotImplementedError
+
+    # first observation of the evaluation
+    def start_evaluation(self):
+        return self.env.reset()
+
+    # action of the agent for the observation obs
+    def predict(self, obs):
+        raise NotImplementedError
+
+    def run(self) -> dict:
+        obs = self.start_evaluation()
+        self.metrics = RunningAverages(self.time_slots)
+        progress = EvaluationProgress(self.report, self.metrics)
+        for _ in range(self.time_slots):
+            obs, reward, done, _ = self.env.step(self.predict(obs))
+            # a vectorized environment returns an array of one reward
+            cost = 1 / np.ravel(reward)[0]
+            t, bak, bat = self.env.render()
+            self.metrics.add(cost, t, bak, bat)
+            progress.update()
+
+            if done and self.reset_on_done:
+                self.env.reset()
+
+        return self.metrics.result()
+
+
+class BaseRLAlgorithm(BaseAlgorithm):
+    trains = True
+    # name of the algorithm in the keys of the model cache
+    cache_name = None
+
+    def __init__(self, train_time_slots: str, verbose: str, **kwargs) -> None:
+        self.train_time_slots = int(train_time_slots)
+        self.verbose = float(verbose)
+        super().__init__(**kwargs)
+
+    # the parameters of the subclass that influence the trained model
+    def get_model_params(self) -> dict:
+        return {}
+
+    # every parameter that influences the trained model, evaluation-only parameters such as time_slots are left out
+    def get_cache_key(self) -> str:
+        params = dict(self.get_env_kwargs(), trace=trace_fingerprint(self.trace),
+                      train_time_slots=self.train_time_slots, random_seed=self.random_seed,
+                      **self.get_model_params())
+        return model_cache.make_key(self.cache_name, params)
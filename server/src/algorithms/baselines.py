@@ -0,0 +1,44 @@
+from .base import BaseAlgorithm
+
+'''
+    The baseline agents of the paper, as algorithms with the same parameters and run() result as the trained ones.
+    * FIXED: the computing power demand of every slot is a fixed number of watts (fixed_power), see fixed_action_cal().
+    * MYOPIC: the cost of every slot is minimized on its own, regardless of the battery left for the next ones,
+      see myopic_action_cal(), memo_levels > 0 remembers the actions of quantized states (for trace replays).
+    They need no training, so they run in milliseconds and the overview runs them without a worker process.
+'''
+
+
+class BaselineAlgorithm(BaseAlgorithm):
+    # train_time_slots and verbose are accepted, and ignored, for the query string shared with the other algorithms
+    def __init__(self, train_time_slots: str = '0', verbose: str = '0', **kwargs) -> None:
+        super().__init__(**kwargs)
+
+    def init_env(self) -> None:
+        self.env = self.make_env().unwrapped
+        # the environment draws from its own generator, the same seed gives the trained algorithms the same slots
+        self.env.seed(self.random_seed)
+
+
+class FixedPowerAlgorithm(BaselineAlgorithm):
+    def __init__(self, fixed_power: str = '500', **kwargs) -> None:
+        # computing power demand d_com of every slot (W), clipped to what the state allows
+        self.fixed_power = float(fixed_power)
+        super().__init__(**kwargs)
+
+    # the baselines act on the state of the environment rather than the observation
+    def predict(self, obs) -> float:
+        return self.env.fixed_action_cal(self.fixed_power)
+
+
+class MyopicAlgorithm(BaselineAlgorithm):
+    def __init__(self, memo_levels: str = '0', **kwargs) -> None:
+        # with memo_levels > 0 the actions of states quantized to that many levels are remembered,
+        # see OffloadAutoscaleEnv.enable_myopic_memo()
+        self.memo_levels = int(memo_levels)
+        super().__init__(**kwargs)
+        if self.memo_levels > 0:
+            self.env.enable_myopic_memo(self.memo_levels)
+
+    def predict(self, obs) -> float:
+        return self.env.myopic_action_cal()
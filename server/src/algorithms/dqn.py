@@ -1,114 +1,217 @@
 from keras.optimizers import Adam
 from keras.layers import Dense
-from keras.models import Sequential
-from collections import deque
-import gym
-from . import gym_offload_autoscale
+from keras.models import Sequential, clone_model
+from keras import backend as K
+from .base import BaseRLAlgorithm
+from .gym_offload_autoscale.envs import DiscreteActionWrapper
+from .model_cache import model_cache
+from .progress import TrainingProgress
+from .warm_models import warm_models
+import json
+import os
 import random
 import numpy as np
+import tensorflow as tf
 
 '''
     Here we implemented a DQN algorithm to compare with PPO.
     * We use a single hidden layer neural network.
+    * The continuous [0, 1] action is discretized into action_bins actions, the network outputs one Q-value
+      (expected discounted cost) per action and the agent picks the lowest.
+    * Optionally, bootstrap targets come from a target network synced every target_update steps,
+      and Double DQN picks the next action with the online network but evaluates it with the target network
+      (so it needs one: without it both would be the same network, which is plain DQN).
+    * Exploration decays linearly to its minimum over exploration_steps training steps.
     * The implementation is a stub, tbh.
 '''
 
 
+class ReplayBuffer:
+    # ring buffer of transitions in preallocated arrays, the oldest transitions are overwritten once it is full
+    def __init__(self, capacity, observation_space):
+        self.capacity = capacity
+        self.states = np.zeros((capacity, observation_space), dtype=np.float32)
+        self.actions = np.zeros(capacity, dtype=np.int64)
+        self.rewards = np.zeros(capacity, dtype=np.float32)
+        self.next_states = np.zeros((capacity, observation_space), dtype=np.float32)
+        self.terminals = np.zeros(capacity, dtype=bool)
+        self.position = 0
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def add(self, state, action, reward, next_state, terminal):
+        i = self.position
+        self.states[i] = np.reshape(state, -1)
+        self.actions[i] = action
+        self.rewards[i] = reward
+        self.next_states[i] = np.reshape(next_state, -1)
+        self.terminals[i] = terminal
+        self.position = (self.position + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+
+    # uniform sample (with replacement) of batch_size transitions
+    def sample(self, batch_size):
+        idx = np.random.randint(0, self.size, batch_size)
+        return self.states[idx], self.actions[idx], self.rewards[idx], self.next_states[idx], self.terminals[idx]
+
+
+# the network, and its frozen copy for the bootstrap targets when target_network is set
+def build_networks(observation_space, action_space, target_network):
+    model = Sequential()
+    model.add(Dense(24, input_shape=(observation_space,), activation="relu"))
+    model.add(Dense(24, activation="relu"))
+    model.add(Dense(action_space, activation="linear"))
+    model.compile(loss="mse", optimizer=Adam(learning_rate=0.001))
+    return model, clone_model(model) if target_network else None
+
+
+# initializes the Keras graph of networks kept from a previous job again, in a new session so that the random
+# initializers start over and give the weights of newly built networks, see warm_models.py
+def reset_networks() -> None:
+    old = K.get_session()
+    sess = tf.Session(graph=old.graph)
+    K.set_session(sess)
+    old.close()
+    with old.graph.as_default():
+        sess.run(tf.global_variables_initializer())
+
+
 class DQNSolver:
-    def __init__(self, observation_space, action_space):
+    def __init__(self, observation_space, action_space, batch_size=20, replay_start=20, memory_size=1000000,
+                 target_update=0, double_dqn=False, exploration_steps=None, exploration_min=0.01, networks=None):
         self.exploration_rate = 1.0
+        # linear decay from 1 to exploration_min over exploration_steps steps,
+        # None keeps the previous schedule (x0.995 after every replay)
+        self.exploration_steps = exploration_steps
+        self.exploration_min = exploration_min
+        self.steps = 0
 
         self.observation_space = observation_space
         self.action_space = action_space
-        self.memory = deque(maxlen=1000000)
-        # the neural network
-        self.model = Sequential()
-        self.model.add(Dense(24, input_shape=(observation_space,), activation="relu"))
-        self.model.add(Dense(24, activation="relu"))
-        self.model.add(Dense(self.action_space, activation="linear"))
-        self.model.compile(loss="mse", optimizer=Adam(learning_rate=0.001))
+        # number of transitions per replay() minibatch, and how many must be stored before replay() starts
+        self.batch_size = batch_size
+        self.replay_start = max(replay_start, batch_size)
+        self.memory = ReplayBuffer(memory_size, observation_space)
+        # the neural network, and its frozen copy used for the bootstrap targets, synced every target_update steps
+        # (0: no target network), networks are those of build_networks() when given
+        self.target_update = target_update
+        self.model, self.target_model = networks or build_networks(observation_space, action_space, target_update > 0)
+        if self.target_model is not None:
+            self.target_model.set_weights(self.model.get_weights())
+        self.double_dqn = double_dqn
 
     def remember(self, state, action, reward, next_state, terminal):
-        self.memory.append((state, action, reward, next_state, terminal))
+        self.memory.add(state, action, reward, next_state, terminal)
 
-    def act(self, state):
-        if np.random.rand() < self.exploration_rate:
+    def act(self, state, explore=True):
+        if explore and np.random.rand() < self.exploration_rate:
             return random.randrange(self.action_space)
-        q_values = self.model.predict(state)
+        q_values = self.model.predict_on_batch(state)
         return np.argmin(q_values[0])
 
+    def next_state_values(self, next_states):
+        target_model = self.target_model if self.target_model is not None else self.model
+        q_next = target_model.predict_on_batch(next_states)
+        if not self.double_dqn:
+            return np.amin(q_next, axis=1)
+        # Double DQN: the online network selects the next action, the target network evaluates it
+        next_actions = np.argmin(self.model.predict_on_batch(next_states), axis=1)
+        return q_next[np.arange(len(next_actions)), next_actions]
+
     def replay(self):
-        if len(self.memory) < 20:
+        self.steps += 1
+        if self.exploration_steps is not None:
+            progress = min(1.0, self.steps / max(1, self.exploration_steps))
+            self.exploration_rate = 1.0 + progress * (self.exploration_min - 1.0)
+        if len(self.memory) < self.replay_start:
             return
-        batch = random.sample(self.memory, 20)
-        for state, action, reward, next_state, terminal in batch:
-            q_upd = reward
-            if not terminal:
-                q_upd = (reward + 0.95 *
-                         np.amin(self.model.predict(next_state)[0]))
-            q_val = self.model.predict(state)
-            q_val[0][action] = q_upd
-            self.model.fit(state, q_val, verbose=0)
-        self.exploration_rate *= 0.995  # exploration rate
-        self.exploration_rate = max(0.01, self.exploration_rate)
-
-
-class DQNAlgorithm:
-    def __init__(self, time_slots: str, p_coeff: str,
-                 timeslot_duration: str, max_number_of_server: str,
-                 server_service_rate: str, d_sta: str, coef_dyn: str,
-                 server_power_consumption: str, batery_capacity: str,
-                 lamda_high: str, lamda_low: str, h_high: str, h_low: str,
-                 back_up_cost_coef: str, normalized_unit_depreciation_cost: str,
-                 time_steps_per_episode: str, train_time_slots: str, verbose: str,
-                 random_seed: str) -> None:
-        self.time_slots = int(time_slots)
-        self.timeslot_duration = float(int(timeslot_duration)/60)
-        self.time_steps_per_episode = int(time_steps_per_episode)
-        self.max_number_of_server = int(max_number_of_server)
-        self.server_service_rate = int(server_service_rate)
-        self.d_sta = int(d_sta)
-        self.coef_dyn = float(coef_dyn)
-        self.server_power_consumption = int(server_power_consumption)
-        self.batery_capacity = int(batery_capacity)
-        self.lamda_high = int(lamda_high)
-        self.lamda_low = int(lamda_low)
-        self.h_high = float(h_high)
-        self.h_low = float(h_low)
-        self.back_up_cost_coef = float(back_up_cost_coef)
-        self.normalized_unit_depreciation_cost = float(normalized_unit_depreciation_cost)
-        self.train_time_slots = int(train_time_slots)
-        self.p_coeff = float(p_coeff)
-        self.verbose = float(verbose)
-        self.random_seed = int(random_seed)
-        self.rewards_list = []
-        self.avg_rewards = []
-        self.rewards_time_list = []
-        self.avg_rewards_time_list = []
-        self.rewards_bak_list = []
-        self.avg_rewards_bak_list = []
-        self.rewards_bat_list = []
-        self.avg_rewards_bat_list = []
-        self.avg_rewards_energy_list = []
-        self.init_env()
+        states, actions, rewards, next_states, terminals = self.memory.sample(self.batch_size)
+        # one forward pass for the next states, one for the current states and one gradient step per minibatch
+        q_upd = np.where(terminals, rewards, rewards + 0.95 * self.next_state_values(next_states))
+        q_val = self.model.predict_on_batch(states)
+        q_val[np.arange(self.batch_size), actions] = q_upd
+        self.model.train_on_batch(states, q_val)
+        if self.target_model is not None and self.steps % self.target_update == 0:
+            self.target_model.set_weights(self.model.get_weights())
+        if self.exploration_steps is None:
+            self.exploration_rate *= 0.995  # exploration rate
+            self.exploration_rate = max(self.exploration_min, self.exploration_rate)
+
+
+class DQNAlgorithm(BaseRLAlgorithm):
+    cache_name = 'DQN'
+    # the evaluation runs on past the end of the episode, like the training does
+    reset_on_done = False
+
+    def __init__(self, batch_size: str = '20', replay_start: str = '20',
+                 action_bins: str = '11', target_update: str = '0', double_dqn: str = 'false',
+                 exploration_fraction: str = '0.1', **kwargs) -> None:
+        self.batch_size = int(batch_size)
+        self.replay_start = int(replay_start)
+        self.action_bins = int(action_bins)
+        self.target_update = int(target_update)
+        self.double_dqn = double_dqn.lower() in ('1', 'true')
+        if self.double_dqn and self.target_update <= 0:
+            raise ValueError('double_dqn needs a target network, set target_update > 0')
+        # share of train_time_slots over which exploration decays, 0 keeps the x0.995-per-replay decay
+        self.exploration_fraction = float(exploration_fraction)
+        super().__init__(**kwargs)
+
+    def get_model_params(self) -> dict:
+        return dict(batch_size=self.batch_size, replay_start=self.replay_start, action_bins=self.action_bins,
+                    target_update=self.target_update, double_dqn=self.double_dqn,
+                    exploration_fraction=self.exploration_fraction)
 
     def init_env(self) -> None:
-        self.env = gym.make('offload-autoscale-v0', p_coeff=self.p_coeff,
-                            timeslot_duration=self.timeslot_duration, max_number_of_server=self.max_number_of_server,
-                            server_service_rate=self.server_service_rate, d_sta=self.d_sta, coef_dyn=self.coef_dyn,
-                            server_power_consumption=self.server_power_consumption, batery_capacity=self.batery_capacity,
-                            lamda_high=self.lamda_high, lamda_low=self.lamda_low, h_high=self.h_high, h_low=self.h_low,
-                            back_up_cost_coef=self.back_up_cost_coef,
-                            normalized_unit_depreciation_cost=self.normalized_unit_depreciation_cost,
-                            time_steps_per_episode=self.time_steps_per_episode)
+        self.env = DiscreteActionWrapper(self.make_env(), self.action_bins)
+        # the environment draws from its own generator, seeded so that training only depends on random_seed
+        self.env.seed(self.random_seed)
 
         self.observation_space = self.env.observation_space.shape[0]
-        action_space = self.env.action_space.shape[0]
-        self.solver = DQNSolver(self.observation_space, action_space)
+        action_space = self.env.action_space.n
+        # networks kept by a worker process from a previous job with the same architecture and seed are reset
+        # instead of built again, see warm_models.py
+        self.warm_key = model_cache.make_key('DQN', dict(observation_space=self.observation_space, action_space=action_space,
+                                                         target_network=self.target_update > 0, random_seed=self.random_seed))
+        networks = warm_models.take('DQN', self.warm_key)
+        if networks is not None:
+            reset_networks()
+        else:
+            if warm_models.enabled:
+                # a new graph, so that the networks get the weights they would get in a new process
+                K.clear_session()
+            # seed the graph Keras builds the network in, so the initial weights only depend on random_seed
+            tf.set_random_seed(self.random_seed)
+        exploration_steps = int(self.exploration_fraction * self.train_time_slots) if self.exploration_fraction > 0 else None
+        self.solver = DQNSolver(self.observation_space, action_space,
+                                batch_size=self.batch_size, replay_start=self.replay_start,
+                                target_update=self.target_update, double_dqn=self.double_dqn,
+                                exploration_steps=exploration_steps, networks=networks)
+        # the next job resets them whatever this one does with them
+        warm_models.keep('DQN', self.warm_key, (self.solver.model, self.solver.target_model))
+
+    def save_model(self, path: str) -> None:
+        self.solver.model.save_weights(os.path.join(path, 'weights.h5'))
+        with open(os.path.join(path, 'solver.json'), 'w') as f:
+            json.dump({'exploration_rate': self.solver.exploration_rate}, f)
+
+    def load_model(self, path: str) -> None:
+        self.solver.model.load_weights(os.path.join(path, 'weights.h5'))
+        with open(os.path.join(path, 'solver.json')) as f:
+            self.solver.exploration_rate = json.load(f)['exploration_rate']
 
     def train_model(self):
+        # a network trained with the same setup before is loaded instead of trained again
+        cache_key = self.get_cache_key()
+        cached = model_cache.load(cache_key)
+        if cached is not None:
+            self.load_model(cached)
+            return
         state = None
         accumulated_step = 0
+        progress = TrainingProgress(self.report, self.train_time_slots)
         while True:
             state = self.env.reset()
             state = np.reshape(state, [1, self.observation_space])
@@ -120,9 +223,12 @@ class DQNAlgorithm:
                 next_state = np.reshape(next_state, [1, self.observation_space])
                 step += 1
                 accumulated_step += 1
+                progress.record([reward])
+                progress.update()
                 if step == self.time_steps_per_episode:
                     done = True
-                self.solver.remember(state, action, reward, next_state, done)
+                # the environment returns 1/cost, the solver learns the cost it minimizes
+                self.solver.remember(state, action, 1 / reward, next_state, done)
                 state = next_state
                 if done:
                     break
@@ -132,31 +238,18 @@ class DQNAlgorithm:
             if accumulated_step == self.train_time_slots:
                 break
 
-        return state
-
-    def run(self) -> dict:
-        state = self.train_model()
-        for i in range(self.time_slots):
-            action = self.solver.act(state)
-            next_state, reward, _, _ = self.env.step(action)
-            next_state = np.reshape(next_state, [1, self.observation_space])
-            self.rewards_list.append(1 / reward)
-            self.avg_rewards.append(np.mean(self.rewards_list[:]))
-            t, bak, bat = self.env.render()
-            self.rewards_time_list.append(t)
-            self.avg_rewards_time_list.append(
-                np.mean(self.rewards_time_list[:]))
-            self.rewards_bak_list.append(bak)
-            self.avg_rewards_bak_list.append(np.mean(self.rewards_bak_list[:]))
-            self.rewards_bat_list.append(bat)
-            self.avg_rewards_bat_list.append(np.mean(self.rewards_bat_list[:]))
-            self.avg_rewards_energy_list.append(
-                self.avg_rewards_bak_list[-1] + self.avg_rewards_bat_list[-1])
-
-        return {
-            'avg_total': [float(item) for item in self.avg_rewards],
-            'avg_delay': [float(item) for item in self.avg_rewards_time_list],
-            'avg_backup': [float(item) for item in self.avg_rewards_bak_list],
-            'avg_battery': [float(item) for item in self.avg_rewards_bat_list],
-            'avg_energy': [float(item) for item in self.avg_rewards_energy_list],
-        }
+        progress.send()
+        model_cache.save(cache_key, self.save_model)
+
+    def start_evaluation(self):
+        self.train_model()
+        # like the other algorithms, evaluation starts from a new episode with the generators seeded again,
+        # so that a cached network gives the same result as a newly trained one
+        self.env.seed(self.random_seed)
+        random.seed(self.random_seed)
+        np.random.seed(self.random_seed)
+        return self.env.reset()
+
+    # the evaluation follows the greedy policy, without the exploration of the training
+    def predict(self, obs):
+        return self.solver.act(np.reshape(obs, [1, self.observation_space]), explore=False)
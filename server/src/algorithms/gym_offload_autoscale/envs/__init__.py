@@ -1 +1,2 @@
-from algorithms.gym_offload_autoscale.envs.offload_autoscale_env import OffloadAutoscaleEnv
\ No newline at end of file
+from algorithms.gym_offload_autoscale.envs.offload_autoscale_env import OffloadAutoscaleEnv  # noqa: F401
+from algorithms.gym_offload_autoscale.envs.discrete_action_wrapper import DiscreteActionWrapper  # noqa: F401
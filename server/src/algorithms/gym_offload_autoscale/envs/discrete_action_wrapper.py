@@ -0,0 +1,21 @@
+import gym
+import numpy as np
+from gym import spaces
+
+
+class DiscreteActionWrapper(gym.ActionWrapper):
+    # discretize the normalized [0, 1] action of OffloadAutoscaleEnv into n_bins evenly spaced actions,
+    # action i of the Discrete(n_bins) space is mapped to i / (n_bins - 1)
+    def __init__(self, env: gym.Env, n_bins: int) -> None:
+        if n_bins < 2:
+            raise ValueError('n_bins must be at least 2, got {}'.format(n_bins))
+        super().__init__(env)
+        self.n_bins = n_bins
+        self.action_space = spaces.Discrete(n_bins)
+        self.actions = np.linspace(env.action_space.low[0], env.action_space.high[0], n_bins)
+
+    def action(self, action) -> float:
+        return self.actions[int(action)]
+
+    def reverse_action(self, action) -> int:
+        return int(np.argmin(np.abs(self.actions - action)))
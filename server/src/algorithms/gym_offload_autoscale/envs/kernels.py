@@ -0,0 +1,185 @@
+import numpy as np
+
+try:
+    from numba import njit
+except ImportError:
+    # without numba the kernels run as plain Python functions, with the same results
+    def njit(*args, **kwargs):
+        return lambda fn: fn
+
+'''
+    The whole OffloadAutoscaleEnv transition as one function of plain scalars, compiled with numba when it is installed.
+    * It does what step() did with get_time, get_dop, cal, get_m_mu, get_dcom, reward_func, get_b and get_e,
+      with the same floating point operations in the same order, so trajectories are identical.
+    * The stochastic inputs are passed in: g, λ and h of the next state, drawn by get_g(), get_lambda() and get_h()
+      or read from a trace (see trace.py).
+    * The state and the parameters are passed as float64 arrays (parameters in the order of
+      OffloadAutoscaleEnv.kernel_params), which numba dispatches much faster than as separate scalars.
+      The integer parameters are exact as floats, so the results do not change.
+    * (m, μ) is found by evaluating every m (scan_m_mu()) up to SCAN_MAX_SERVERS servers, and in O(log M) above
+      (search_m_mu()), which OffloadAutoscaleEnv.get_m_mu() uses for large M as well.
+'''
+
+# get_m_mu() evaluates every m up to this many servers, above it search_m_mu() is faster
+SCAN_MAX_SERVERS = 64
+# m on each side of the real minimizer search_m_mu() evaluates
+SEARCH_WINDOW = 2
+
+
+# μ of m for the computing power de_action, see get_m_mu()
+@njit(cache=True)
+def mu_of(m, de_action, server_power_consumption, lamda_low):
+    return (de_action - server_power_consumption * m) * lamda_low / server_power_consumption
+
+
+# first (smallest) m with the lowest c_delay among the valid pairs of m in [first, last], (-1, -1) if there are none
+@njit(cache=True)
+def best_m_mu(first, last, de_action, lamda, h, server_service_rate, server_power_consumption, lamda_low):
+    m = -1
+    mu = -1.0
+    best = np.inf
+    for candidate in range(first, last + 1):
+        candidate_mu = mu_of(candidate, de_action, server_power_consumption, lamda_low)
+        if candidate_mu <= lamda and candidate_mu >= 0 and candidate * server_service_rate > candidate_mu:
+            c_delay = candidate_mu / (candidate * server_service_rate - candidate_mu) + (lamda - candidate_mu) * h
+            if c_delay < best:
+                best = c_delay
+                m = candidate
+                mu = candidate_mu
+    return m, mu
+
+
+# the argmin of get_m_mu() over every m in 1..M
+@njit(cache=True)
+def scan_m_mu(de_action, lamda, h, max_number_of_server, server_service_rate, server_power_consumption, lamda_low):
+    return best_m_mu(1, int(max_number_of_server), de_action, lamda, h, server_service_rate,
+                     server_power_consumption, lamda_low)
+
+
+# the argmin of get_m_mu() in O(log M):
+# μ = a - L·m with a = de_a·L/P (L = λ_low, P = server_power_consumption) decreases with m, also as computed in
+# floating point, so μ ≥ 0 holds up to some m and μ ≤ λ, m·κ > μ from some m on, and the valid m are the interval
+# [first, last] found by bisection. On it, with c = κ + L, c_delay = (a - L·m)/(c·m - a) + (λ - a + L·m)·h has the
+# derivative L·h - a·κ/(c·m - a)², so it is convex and minimal at m* = (a + sqrt(a·κ/(L·h)))/c (at last when h = 0).
+# The m within SEARCH_WINDOW of m* are evaluated like scan_m_mu() does, which picks the integer minimizer.
+@njit(cache=True)
+def search_m_mu(de_action, lamda, h, max_number_of_server, server_service_rate, server_power_consumption, lamda_low):
+    # smallest m with μ ≤ λ and m·κ > μ
+    low, high = 1, int(max_number_of_server) + 1
+    while low < high:
+        middle = (low + high) // 2
+        mu = mu_of(middle, de_action, server_power_consumption, lamda_low)
+        if mu <= lamda and middle * server_service_rate > mu:
+            high = middle
+        else:
+            low = middle + 1
+    first = low
+    # largest m with μ ≥ 0
+    low, high = 0, int(max_number_of_server)
+    while low < high:
+        middle = (low + high + 1) // 2
+        if mu_of(middle, de_action, server_power_consumption, lamda_low) >= 0:
+            low = middle
+        else:
+            high = middle - 1
+    last = low
+    if first > last:
+        return -1, -1.0
+    a = de_action * lamda_low / server_power_consumption
+    optimum = float(last)
+    if h > 0 and a > 0:
+        optimum = (a + np.sqrt(a * server_service_rate / (lamda_low * h))) / (server_service_rate + lamda_low)
+    start = int(np.floor(min(max(optimum, first), last)))
+    return best_m_mu(max(first, start - SEARCH_WINDOW), min(last, start + SEARCH_WINDOW), de_action, lamda, h,
+                     server_service_rate, server_power_consumption, lamda_low)
+
+
+# search_m_mu() for every row of the arrays de_action, lamda and h, as (m, μ) arrays, see VecOffloadAutoscaleEnv
+@njit(cache=True)
+def search_m_mu_rows(de_action, lamda, h, max_number_of_server, server_service_rate, server_power_consumption,
+                     lamda_low):
+    m = np.empty(len(de_action), dtype=np.int64)
+    mu = np.empty(len(de_action))
+    for row in range(len(de_action)):
+        m[row], mu[row] = search_m_mu(de_action[row], lamda[row], h[row], max_number_of_server, server_service_rate,
+                                      server_power_consumption, lamda_low)
+    return m, mu
+
+
+# m(t), μ(t) from a(t), see cal() and get_m_mu()
+@njit(cache=True)
+def action_m_mu(action, lamda, b, h, d_op, max_number_of_server, server_service_rate, server_power_consumption,
+                lamda_low):
+    if b <= d_op + server_power_consumption:
+        return 0, 0.0
+    low_bound = server_power_consumption
+    high_bound = min(b - d_op, server_power_consumption * max_number_of_server + server_power_consumption / lamda_low * lamda)
+    de_action = low_bound + action * (high_bound - low_bound)
+    if max_number_of_server > SCAN_MAX_SERVERS:
+        return search_m_mu(de_action, lamda, h, max_number_of_server, server_service_rate,
+                           server_power_consumption, lamda_low)
+    return scan_m_mu(de_action, lamda, h, max_number_of_server, server_service_rate,
+                     server_power_consumption, lamda_low)
+
+
+# cost elements of the slot scaled by the priority coefficient (delay, backup, battery), see reward_func()
+@njit(cache=True)
+def slot_costs(m, mu, lamda, b, h, g, d_op, d, server_service_rate, back_up_cost_coef,
+               normalized_unit_depreciation_cost, priority_coefficent):
+    if m == 0 and mu == 0:
+        cost_delay = 0.0
+    else:
+        cost_delay = mu / (m * server_service_rate - mu)
+    cost_delay = cost_delay + (lamda - mu) * h
+    if d_op > b:
+        cost_batery = 0.0
+        cost_bak = back_up_cost_coef * d_op
+    else:
+        cost_batery = normalized_unit_depreciation_cost * max(d - g, 0)
+        cost_bak = 0.0
+    return cost_delay * (1 - priority_coefficent), cost_bak * priority_coefficent, cost_batery * priority_coefficent
+
+
+# next b, see get_b()
+@njit(cache=True)
+def next_battery(b, g, d_op, d, b_high):
+    if d_op > b:
+        return b + g
+    if g >= d:
+        return min(b_high, b + g - d)
+    return b + g - d
+
+
+# next e for the time of day, see get_e()
+@njit(cache=True)
+def time_period(time):
+    if time >= 9 and time < 15:
+        return 2
+    if time < 6 or time >= 18:
+        return 0
+    return 1
+
+
+@njit(cache=True)
+def step_kernel(state, time, action, g, next_lamda, next_h, params):
+    lamda, b, h = state[0], state[1], state[2]
+    timeslot_duration, max_number_of_server, server_service_rate, d_sta, coef_dyn = params[0:5]
+    server_power_consumption, lamda_low, b_high = params[5:8]
+    back_up_cost_coef, normalized_unit_depreciation_cost, priority_coefficent = params[8:11]
+    # transition to new time
+    time += timeslot_duration
+    if time >= 24:
+        time -= 24
+    d_op = d_sta + coef_dyn * lamda
+    m, mu = action_m_mu(action, lamda, b, h, d_op, max_number_of_server, server_service_rate,
+                        server_power_consumption, lamda_low)
+    d_com = server_power_consumption * m + server_power_consumption / lamda_low * mu
+    d = d_op + d_com
+    cost_delay, cost_bak, cost_batery = slot_costs(m, mu, lamda, b, h, g, d_op, d, server_service_rate,
+                                                   back_up_cost_coef, normalized_unit_depreciation_cost,
+                                                   priority_coefficent)
+    cost = cost_delay + cost_batery + cost_bak
+    next_state = np.empty(4)
+    next_state[0], next_state[1], next_state[2], next_state[3] = (
+        next_lamda, next_battery(b, g, d_op, d, b_high), next_h, time_period(time))
+    return next_state, time, cost, cost_delay, cost_bak, cost_batery, g, m, mu, d_op, d_com, d
@@ -1,10 +1,34 @@
+import functools
 import gym
-import math
 import numpy as np
 from typing import List
 from gym import spaces
-from gym.utils import seeding
-from scipy.optimize import minimize_scalar
+from .kernels import SCAN_MAX_SERVERS, search_m_mu, step_kernel
+from .trace import TraceReader
+
+# number of random numbers drawn from the generator at a time
+RNG_BLOCK_SIZE = 4096
+
+# number of quantized states whose myopic action is remembered, see enable_myopic_memo()
+MYOPIC_MEMO_SIZE = 1 << 16
+
+
+class BlockSampler:
+    # hands out the numbers of draw(size) one at a time, drawing block_size of them at once
+    # so that the cost of a generator call is shared by the whole block
+    def __init__(self, draw, block_size: int = RNG_BLOCK_SIZE) -> None:
+        self.draw = draw
+        self.block_size = block_size
+        self.block = []
+        self.pos = 0
+
+    def __call__(self) -> float:
+        if self.pos == len(self.block):
+            self.block = self.draw(self.block_size).tolist()
+            self.pos = 0
+        value = self.block[self.pos]
+        self.pos += 1
+        return value
 
 
 class OffloadAutoscaleEnv(gym.Env):
@@ -15,13 +39,15 @@ class OffloadAutoscaleEnv(gym.Env):
             server_power_consumption: int, batery_capacity: int,
             lamda_high: int, lamda_low: int, h_high: float, h_low: float,
             back_up_cost_coef: float, normalized_unit_depreciation_cost: float,
-            time_steps_per_episode: int) -> None:
+            time_steps_per_episode: int, trace: str = None) -> None:
         # environment parameters from III.SYSTEM MODEL
         # duration of each time-slot
         self.timeslot_duration = timeslot_duration  # hours, ~15min
         # A.Workload model
         # maximum number of activated edge server M
         self.max_number_of_server = max_number_of_server
+        # candidate numbers of activated servers 1..M, evaluated together in get_m_mu()
+        self.server_candidates = np.arange(1, max_number_of_server + 1)
         # B.Delay cost model
         # server service rate κ
         self.server_service_rate = server_service_rate  # units/sec
@@ -102,15 +128,45 @@ class OffloadAutoscaleEnv(gym.Env):
         self.reward_bak = 0
         self.reward_bat = 0
 
-    # not used, can be ignored
+        # parameters of step_kernel(), in its order (the parameters are fixed after construction)
+        self.kernel_params = np.array([
+            self.timeslot_duration, self.max_number_of_server, self.server_service_rate, self.d_sta, self.coef_dyn,
+            self.server_power_consumption, self.lamda_low, self.b_high,
+            self.back_up_cost_coef, self.normalized_unit_depreciation_cost, self.priority_coefficent], dtype=np.float64)
+
+        # remembered myopic actions, see enable_myopic_memo()
+        self.myopic_memo = None
+
+        # with a trace (path of a .npy file, see trace.py) λ, h and g are replayed from it instead of drawn
+        self.trace = TraceReader(trace) if trace else None
+
+        # random number generator of this environment, every stochastic transition draws from it
+        self.seed()
+
+    # each environment draws from its own generator, so that environments never share a stream,
+    # a trace plays the role of the generator and is replayed from its first slot again
     def seed(self, seed: int = None) -> List[int]:
-        self.np_random, seed = seeding.np_random(seed)
+        if seed is None:
+            seed = np.random.SeedSequence().entropy
+        self.np_random = np.random.default_rng(seed)
+        # standard draws, scaled by the transition functions
+        self.uniform_draws = BlockSampler(self.np_random.random)
+        self.exponential_draws = BlockSampler(self.np_random.standard_exponential)
+        self.normal_draws = BlockSampler(self.np_random.standard_normal)
+        if self.trace is not None:
+            self.trace.seek(0)
         return [seed]
 
+    # the next step replays the given slot of the trace
+    def seek_trace(self, slot: int) -> None:
+        if self.trace is None:
+            raise ValueError('the environment does not replay a trace')
+        self.trace.seek(slot)
+
     # Transition functions
     # transition function of λ
     def get_lambda(self):
-        return np.random.uniform(self.lamda_low, self.lamda_high)
+        return self.lamda_low + (self.lamda_high - self.lamda_low) * self.uniform_draws()
 
     # transition function of b
     def get_b(self) -> float:
@@ -129,7 +185,7 @@ class OffloadAutoscaleEnv(gym.Env):
 
     # transition function of h
     def get_h(self):
-        return np.random.uniform(self.h_low, self.h_high)
+        return self.h_low + (self.h_high - self.h_low) * self.uniform_draws()
 
     # transition function of e
     def get_e(self) -> int:
@@ -149,10 +205,10 @@ class OffloadAutoscaleEnv(gym.Env):
     def get_g(self):
         e = self.state[3]
         if e == 0:
-            return np.random.exponential(60) + 100
+            return 60 * self.exponential_draws() + 100
         if e == 1:
-            return np.random.normal(520, 130)
-        return np.random.normal(800, 95)
+            return 520 + 130 * self.normal_draws()
+        return 800 + 95 * self.normal_draws()
 
     # elements of computing power demend d
     # d_op
@@ -182,20 +238,25 @@ class OffloadAutoscaleEnv(gym.Env):
     #                               d_com = μ * α + server_power_consumption * m (formula & coefficient α not specified in the paper, our own proposal)
     #                                                                            (α = server_power_consumption/lamda_low)
     #                               c_delay = μ / (m * κ - μ) + (λ(t) - μ(t))h(t) + 0
+    #       c_delay is convex in m for a given de_a, so for large M the argmin is found in O(log M), see search_m_mu()
     def get_m_mu(self, de_action) -> List[int]:
         lamd, _, h, _ = self.state
-        opt_val = math.inf
-        ans = [-1, -1]
-        # loop through all possible (m, μ) based on m
-        for m in range(1, self.max_number_of_server + 1):
-            normalized_min_cov = self.lamda_low
-            mu = (de_action - self.server_power_consumption * m) * normalized_min_cov / self.server_power_consumption
-            valid = self.check_constraints(m, mu)
-            if valid:  # if the pair (m, μ) is valid, compare the current c_delay to the best c_delay, and update the answer
-                if self.cost_function(m, mu, h, lamd) < opt_val:
-                    ans = [m, mu]
-                    opt_val = self.cost_function(m, mu, h, lamd)
-        return ans
+        if self.max_number_of_server > SCAN_MAX_SERVERS:
+            m, mu = search_m_mu(float(de_action), float(lamd), float(h), self.max_number_of_server,
+                                self.server_service_rate, self.server_power_consumption, self.lamda_low)
+            return [-1, -1] if m == -1 else [m, mu]
+        # evaluate all possible (m, μ) based on m at once
+        m = self.server_candidates
+        normalized_min_cov = self.lamda_low
+        mu = (de_action - self.server_power_consumption * m) * normalized_min_cov / self.server_power_consumption
+        # same constraints as check_constraints(), applied to every candidate
+        valid = (mu <= lamd) & (mu >= 0) & (m * self.server_service_rate > mu)
+        if not valid.any():
+            return [-1, -1]
+        m, mu = m[valid], mu[valid]
+        # c_delay of the valid pairs, argmin keeps the smallest m on ties like the sequential scan did
+        opt = np.argmin(mu / (m * self.server_service_rate - mu) + (lamd - mu) * h)
+        return [int(m[opt]), mu[opt]]
 
     def cost_function(self, m: int, mu: int, h, lamda) -> float:  # calculate the delay cost based on m, μ, h, λ
         return self.cost_delay_local_function(m, mu) + self.cost_delay_cloud_function(mu, h, lamda)
@@ -222,11 +283,13 @@ class OffloadAutoscaleEnv(gym.Env):
     #       (1) cost_delay = d_sta + d_dyn :the total delay cost
     #       (2) c_bak: the backup power supply cost
     #       (3) c_bat: the battery depreciation cost
-    def reward_func(self, action) -> float:
+    def reward_func(self, action, m_mu: List[int] = None) -> float:
         lamda, b, h, _ = self.state
         cost_delay_wireless = 0
-        # calculate m(t) & μ(t) from a(t)
-        self.m, self.mu = self.cal(action)
+        # calculate m(t) & μ(t) from a(t), unless the caller already did
+        if m_mu is None:
+            m_mu = self.cal(action)
+        self.m, self.mu = m_mu
         # (1) cost_delay
         cost_delay = self.cost_function(self.m, self.mu, h, lamda) + cost_delay_wireless
         # (2)(3) c_bat & c_bak
@@ -249,31 +312,33 @@ class OffloadAutoscaleEnv(gym.Env):
 
     # implement a state transition, returns [next state, reward, done, info(not used)]
     # note: reward here is 1/cost from the paper
+    # the transition functions above are evaluated together by step_kernel(), see kernels.py
     def step(self, action):
         done = False
         action = float(action)
-
-        self.get_time()  # transition to new time
         self.time_step += 1
-        self.g = self.get_g()  # get the harvested green energy
-
-        self.d_op = self.get_dop()  # not needed, only used to print intermediate results
-        self.m, self.mu = self.cal(action)  # not needed, only used to print intermediate results
-        self.d_com = self.get_dcom(self.m, self.mu)  # not needed, only used to print intermediate results
-        self.d = self.d_op + self.d_com  # not needed, only used to print intermediate results
-        # calculate reward
-        reward = self.reward_func(action)
-        # transition to new state
-        lambda_t = self.get_lambda()
-        b_t = self.get_b()
-        h_t = self.get_h()
-        e_t = self.get_e()
-        self.state = np.array([lambda_t, b_t, h_t, e_t])
+        if self.trace is None:
+            g = self.get_g()
+            lambda_t = self.get_lambda()
+            h_t = self.get_h()
+        else:
+            lambda_t, h_t, g = self.trace()
+            # the gaps of a trace (NaN) are drawn like without one
+            if g != g:
+                g = self.get_g()
+            if lambda_t != lambda_t:
+                lambda_t = self.get_lambda()
+            if h_t != h_t:
+                h_t = self.get_h()
+        (self.state, self.time, cost, self.reward_time, self.reward_bak, self.reward_bat,
+         self.g, self.m, self.mu, self.d_op, self.d_com, self.d) = step_kernel(
+            self.state, self.time, action, g, lambda_t, h_t, self.kernel_params)
 
         if self.time_step >= self.time_steps_per_episode:
             done = True
             self.episode += 1
-        return self.state, 1 / reward, done, {}
+        # as a NumPy scalar, a zero cost gives an infinite reward like before instead of raising
+        return self.state, 1 / np.float64(cost), done, {}
 
     # reset enviroment to starting state
     def reset(self):
@@ -288,9 +353,10 @@ class OffloadAutoscaleEnv(gym.Env):
 
     # Fixed power agent: (not part of the environment)
     # find the corresponding image of the fixed power action in the mapping to the [0, 1] range
-    def fixed_action_cal(self, fixed_action) -> float:
-        lamda, b, h, _ = self.state
-        d_op = self.get_dop()
+    # (in the current state, or in the given one)
+    def fixed_action_cal(self, fixed_action, state=None) -> float:
+        lamda, b, h, _ = self.state if state is None else state
+        d_op = self.d_sta + self.coef_dyn * lamda
         low_bound = self.server_power_consumption
         high_bound = np.minimum(b - d_op, self.get_dcom(self.max_number_of_server, lamda))
         if high_bound < low_bound:
@@ -305,18 +371,54 @@ class OffloadAutoscaleEnv(gym.Env):
     # Myopic optimization agent: (not part of the environment)
     # find the corresponding image of the myopic optimization action in the mapping to the [0, 1] range
     def myopic_action_cal(self) -> float:
-        lamda, b, h, _ = self.state
-        d_op = self.get_dop()
-        if b <= d_op + self.server_power_consumption:
+        if self.myopic_memo is not None:
+            return self.myopic_memo(self.myopic_key())
+        return self.myopic_action(self.state)
+
+    # myopic action of the given state: the cost of the slot, without the battery left for the next ones, is
+    # minimized over μ for every m in 1..M-1 at once (see myopic_mu()), then over m
+    def myopic_action(self, state) -> float:
+        lamda, b, h, _ = state
+        d_op = self.d_sta + self.coef_dyn * lamda
+        m = self.server_candidates[:-1]
+        if b <= d_op + self.server_power_consumption or len(m) == 0:
             return 0
         else:
-            ans = math.inf
-            for m in range(1, self.max_number_of_server):
-                def f(mu, m, h, lamda):
-                    return (1 - self.priority_coefficent) * (mu/(m*self.server_service_rate-mu)+h*(lamda - mu)) + self.priority_coefficent * (self.normalized_unit_depreciation_cost*(self.server_power_consumption*m+self.server_power_consumption/self.lamda_low*mu))
-                res = minimize_scalar(f, bounds=(0, np.minimum(lamda, m*self.server_service_rate)), args=(m, h, lamda), method='bounded')
-                if res.fun < ans:
-                    ans = res.fun
-                    params = [m, res.x]
-            d_com = self.server_power_consumption*params[0]+self.server_power_consumption/self.lamda_low*params[1]
-            return self.fixed_action_cal(d_com)
+            mu = self.myopic_mu(m, lamda, h)
+            # the smallest m on ties, like the sequential scan did
+            opt = np.argmin(self.myopic_cost(m, mu, lamda, h))
+            d_com = self.server_power_consumption*m[opt]+self.server_power_consumption/self.lamda_low*mu[opt]
+            return self.fixed_action_cal(d_com, state)
+
+    # cost of the slot the myopic agent minimizes, for the pairs (m, μ)
+    def myopic_cost(self, m, mu, lamda, h):
+        return (1 - self.priority_coefficent) * (mu/(m*self.server_service_rate-mu)+h*(lamda - mu)) + self.priority_coefficent * (self.normalized_unit_depreciation_cost*(self.server_power_consumption*m+self.server_power_consumption/self.lamda_low*mu))
+
+    # μ minimizing myopic_cost() on [0, min(λ, mκ)] for every m:
+    # with A = 1 - p, c = mκ and k = A·h - p·ω·P/λ_low the derivative is A·c/(c - μ)² - k, so the cost is convex on
+    # [0, c) and its stationary point is c - sqrt(A·c/k) when k > 0, otherwise the cost increases and μ = 0,
+    # clipping the stationary point to the interval gives the minimum on it
+    def myopic_mu(self, m, lamda, h) -> np.ndarray:
+        delay_coef = 1 - self.priority_coefficent
+        capacity = m * self.server_service_rate
+        slope = delay_coef * h - self.priority_coefficent * self.normalized_unit_depreciation_cost * self.server_power_consumption / self.lamda_low
+        if slope <= 0:
+            return np.zeros(len(m))
+        return np.clip(capacity - np.sqrt(delay_coef * capacity / slope), 0, np.minimum(lamda, capacity))
+
+    # remember the myopic actions of up to max_entries states, for runs that revisit the same states (e.g. replaying
+    # a trace): λ, h and b are quantized to levels steps over their range and the action is the one of the quantized
+    # state, so it only depends on the quantized state
+    def enable_myopic_memo(self, levels: int, max_entries: int = MYOPIC_MEMO_SIZE) -> None:
+        self.myopic_quantum = ((self.lamda_high - self.lamda_low) / levels, self.b_high / levels,
+                               (self.h_high - self.h_low) / levels)
+        self.myopic_memo = functools.lru_cache(maxsize=max_entries)(self.quantized_myopic_action)
+
+    def myopic_key(self) -> tuple:
+        lamda, b, h, _ = np.asarray(self.state).tolist()
+        lamda_step, b_step, h_step = self.myopic_quantum
+        return round(lamda / lamda_step), round(b / b_step), round(h / h_step)
+
+    def quantized_myopic_action(self, key: tuple) -> float:
+        lamda_step, b_step, h_step = self.myopic_quantum
+        return self.myopic_action((key[0] * lamda_step, key[1] * b_step, key[2] * h_step, 0))
@@ -0,0 +1,82 @@
+import numpy as np
+
+'''
+    Scenario traces: the inputs of OffloadAutoscaleEnv for a sequence of time slots, stored in a .npy file.
+    * A trace is a float64 array of shape (N, 3), row k holds what step k would otherwise draw:
+      λ and h of the next state and g, the green energy harvested during the slot (TRACE_COLUMNS).
+      NaN marks a value the trace does not have, the environment draws it instead.
+    * The environment reads traces memory-mapped, TraceReader only keeps one block of rows in memory,
+      so traces larger than the RAM can be replayed.
+    * generate_trace() writes synthetic traces with the distributions of the environment's transition functions.
+'''
+
+TRACE_COLUMNS = ('lamda', 'h', 'g')
+
+# number of rows read from the trace at a time
+TRACE_BLOCK_SIZE = 4096
+
+# number of rows generated and written at a time by generate_trace()
+GENERATE_CHUNK_SIZE = 1 << 20
+
+
+def open_trace(path: str) -> np.ndarray:
+    trace = np.load(path, mmap_mode='r')
+    if trace.ndim != 2 or trace.shape[1] != len(TRACE_COLUMNS) or len(trace) == 0:
+        raise ValueError('{} is not a trace: expected a non-empty (slots, {}) array of {}, got shape {}'.format(
+            path, len(TRACE_COLUMNS), ', '.join(TRACE_COLUMNS), trace.shape))
+    return trace
+
+
+class TraceReader:
+    # hands out the rows of a memory-mapped trace one at a time as (λ, h, g), reading block_size rows at once,
+    # after the last row it starts over from the first one
+    def __init__(self, path: str, block_size: int = TRACE_BLOCK_SIZE) -> None:
+        self.path = path
+        self.trace = open_trace(path)
+        self.block_size = block_size
+        self.seek(0)
+
+    def __len__(self) -> int:
+        return len(self.trace)
+
+    # the next call returns row slot
+    def seek(self, slot: int) -> None:
+        self.next_slot = slot % len(self.trace)
+        self.block = []
+        self.pos = 0
+
+    def __call__(self) -> list:
+        if self.pos == len(self.block):
+            stop = min(self.next_slot + self.block_size, len(self.trace))
+            self.block = self.trace[self.next_slot:stop].astype(np.float64).tolist()
+            self.next_slot = stop % len(self.trace)
+            self.pos = 0
+        row = self.block[self.pos]
+        self.pos += 1
+        return row
+
+
+# e of each slot when every episode starts at time 0, like OffloadAutoscaleEnv.reset() does, see get_e()
+def slot_e(slots: np.ndarray, timeslot_duration: float, time_steps_per_episode: int) -> np.ndarray:
+    time = (slots % time_steps_per_episode) * timeslot_duration % 24
+    e = np.ones(len(slots))
+    e[(time >= 9) & (time < 15)] = 2
+    e[(time < 6) | (time >= 18)] = 0
+    return e
+
+
+def generate_trace(path: str, n_slots: int, lamda_low: float, lamda_high: float, h_low: float, h_high: float,
+                   timeslot_duration: float, time_steps_per_episode: int, seed: int = None) -> None:
+    rng = np.random.default_rng(seed)
+    trace = np.lib.format.open_memmap(path, mode='w+', dtype=np.float64, shape=(n_slots, len(TRACE_COLUMNS)))
+    for start in range(0, n_slots, GENERATE_CHUNK_SIZE):
+        stop = min(start + GENERATE_CHUNK_SIZE, n_slots)
+        size = stop - start
+        # same distributions as get_lambda(), get_h() and get_g()
+        e = slot_e(np.arange(start, stop), timeslot_duration, time_steps_per_episode)
+        trace[start:stop, 0] = rng.uniform(lamda_low, lamda_high, size)
+        trace[start:stop, 1] = rng.uniform(h_low, h_high, size)
+        trace[start:stop, 2] = np.where(e == 0, 60 * rng.standard_exponential(size) + 100,
+                                        np.where(e == 1, 520 + 130 * rng.standard_normal(size), 800 + 95 * rng.standard_normal(size)))
+    trace.flush()
+    del trace
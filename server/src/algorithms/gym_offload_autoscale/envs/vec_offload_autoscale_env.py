@@ -0,0 +1,223 @@
+import numpy as np
+from typing import List
+from stable_baselines.common.vec_env import VecEnv
+from algorithms.gym_offload_autoscale.envs.kernels import SCAN_MAX_SERVERS, search_m_mu_rows
+from algorithms.gym_offload_autoscale.envs.offload_autoscale_env import OffloadAutoscaleEnv
+
+
+class VecOffloadAutoscaleEnv(VecEnv):
+    # N copies of OffloadAutoscaleEnv stepped together: every per-environment quantity of the
+    # single environment (state (λ, b, h, e), time, counters, m, μ, d, g and the cost elements)
+    # is stored as an array with one row per copy, and every transition is a NumPy operation
+    # over all rows instead of a Python call per environment.
+    # note: the transitions mirror OffloadAutoscaleEnv one to one, see the comments there for the model
+    def __init__(self, num_envs: int, **env_kwargs) -> None:
+        if env_kwargs.get('trace'):
+            raise ValueError('traces are only replayed by OffloadAutoscaleEnv, use the subproc vectorized environment')
+        # the single environment holds the parameters, the spaces and the scalar helpers
+        self.env = OffloadAutoscaleEnv(**env_kwargs)
+        super().__init__(num_envs, self.env.observation_space, self.env.action_space)
+
+        self.state = np.zeros((num_envs, 4))
+        self.time = np.zeros(num_envs)
+        self.time_step = np.zeros(num_envs, dtype=int)
+        self.episode = np.zeros(num_envs, dtype=int)
+        self.g = np.zeros(num_envs)
+        self.d_op = np.zeros(num_envs)
+        self.d_com = np.zeros(num_envs)
+        self.d = np.zeros(num_envs)
+        self.m = np.zeros(num_envs)
+        self.mu = np.zeros(num_envs)
+        self.reward_time = np.zeros(num_envs)
+        self.reward_bak = np.zeros(num_envs)
+        self.reward_bat = np.zeros(num_envs)
+        self.actions = None
+        self.seed()
+
+    # one generator for the whole batch, every stochastic transition draws one value per environment from it
+    def seed(self, seed: int = None) -> List[int]:
+        if seed is None:
+            seed = np.random.SeedSequence().entropy
+        self.np_random = np.random.default_rng(seed)
+        return [seed]
+
+    # Transition functions, each one returns the value for every environment
+    # transition function of λ
+    def get_lambda(self) -> np.ndarray:
+        return self.np_random.uniform(self.env.lamda_low, self.env.lamda_high, self.num_envs)
+
+    # transition function of b
+    def get_b(self) -> np.ndarray:
+        b = self.state[:, 1]
+        return np.where(self.d_op > b, b + self.g,
+                        np.where(self.g >= self.d, np.minimum(self.env.b_high, b + self.g - self.d), b + self.g - self.d))
+
+    # transition function of h
+    def get_h(self) -> np.ndarray:
+        return self.np_random.uniform(self.env.h_low, self.env.h_high, self.num_envs)
+
+    # transition function of e
+    def get_e(self) -> np.ndarray:
+        e = np.ones(self.num_envs)
+        e[(self.time >= 9) & (self.time < 15)] = 2
+        e[(self.time < 6) | (self.time >= 18)] = 0
+        return e
+
+    # transition function of time
+    def get_time(self) -> None:
+        self.time += self.env.timeslot_duration
+        self.time[self.time >= 24] -= 24
+
+    # calculate g from e
+    def get_g(self) -> np.ndarray:
+        e = self.state[:, 3]
+        g = np.empty(self.num_envs)
+        low, med, high = e == 0, e == 1, e == 2
+        g[low] = self.np_random.exponential(60, low.sum()) + 100
+        g[med] = self.np_random.normal(520, 130, med.sum())
+        g[high] = self.np_random.normal(800, 95, high.sum())
+        return g
+
+    # elements of computing power demend d
+    # d_op
+    def get_dop(self) -> np.ndarray:
+        return self.env.d_sta + self.env.coef_dyn * self.state[:, 0]
+
+    # d_com
+    def get_dcom(self, m, mu):
+        return self.env.get_dcom(m, mu)
+
+    # calculate m(t), μ(t) from a(t) for every environment
+    def cal(self, action: np.ndarray) -> List[np.ndarray]:
+        lamda, b = self.state[:, 0], self.state[:, 1]
+        d_op = self.get_dop()
+        m, mu = np.zeros(self.num_envs), np.zeros(self.num_envs)
+        # environments whose remaining battery covers d_op + one server, the others keep [0, 0]
+        active = b > d_op + self.env.server_power_consumption
+        if active.any():
+            low_bound = self.env.server_power_consumption
+            high_bound = np.minimum(b[active] - d_op[active], self.get_dcom(self.env.max_number_of_server, lamda[active]))
+            de_action = low_bound + action[active] * (high_bound - low_bound)
+            m[active], mu[active] = self.get_m_mu(de_action, active)
+        return [m, mu]
+
+    # calculate m(t), μ(t) from de_a(t) for the environments selected by rows,
+    # same argmin over (m, μ) as OffloadAutoscaleEnv.get_m_mu() with one row of candidates per environment
+    def get_m_mu(self, de_action: np.ndarray, rows: np.ndarray) -> List[np.ndarray]:
+        if self.env.max_number_of_server > SCAN_MAX_SERVERS:
+            # instead of M candidates per environment, every environment is searched in O(log M), all rows in one call
+            m, mu = search_m_mu_rows(np.ascontiguousarray(de_action, dtype=float), self.state[rows, 0], self.state[rows, 2],
+                                     self.env.max_number_of_server, self.env.server_service_rate,
+                                     self.env.server_power_consumption, self.env.lamda_low)
+            return [m, mu]
+        lamd, h = self.state[rows, 0, None], self.state[rows, 2, None]
+        m = self.env.server_candidates[None, :]
+        normalized_min_cov = self.env.lamda_low
+        mu = (de_action[:, None] - self.env.server_power_consumption * m) * normalized_min_cov / self.env.server_power_consumption
+        capacity = m * self.env.server_service_rate
+        valid = (mu <= lamd) & (mu >= 0) & (capacity > mu)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            cost = np.where(valid, mu / (capacity - mu) + (lamd - mu) * h, np.inf)
+        opt = np.argmin(cost, axis=1)
+        found = valid.any(axis=1)
+        ans_m = np.where(found, m[0, opt], -1)
+        ans_mu = np.where(found, mu[np.arange(len(opt)), opt], -1)
+        return [ans_m, ans_mu]
+
+    def cost_function(self, m, mu, h, lamda) -> np.ndarray:  # calculate the delay cost based on m, μ, h, λ
+        with np.errstate(divide='ignore', invalid='ignore'):
+            local = np.where((m == 0) & (mu == 0), 0, mu / (m * self.env.server_service_rate - mu))
+        return local + (lamda - mu) * h
+
+    # reward function, see OffloadAutoscaleEnv.reward_func()
+    def reward_func(self, m_mu: List[np.ndarray]) -> np.ndarray:
+        lamda, b, h = self.state[:, 0], self.state[:, 1], self.state[:, 2]
+        self.m, self.mu = m_mu
+        # (1) cost_delay
+        cost_delay = self.cost_function(self.m, self.mu, h, lamda)
+        # (2)(3) c_bat & c_bak
+        use_backup = self.d_op > b
+        cost_batery = np.where(use_backup, 0, self.env.normalized_unit_depreciation_cost * np.maximum(self.d - self.g, 0))
+        cost_bak = np.where(use_backup, self.env.back_up_cost_coef * self.d_op, 0)
+        # scale the elements of cost based on priority coefficient
+        self.reward_bak = cost_bak * self.env.priority_coefficent
+        self.reward_bat = cost_batery * self.env.priority_coefficent
+        self.reward_time = cost_delay * (1 - self.env.priority_coefficent)
+        return self.reward_time + self.reward_bat + self.reward_bak
+
+    def step_async(self, actions) -> None:
+        self.actions = np.asarray(actions, dtype=np.float64).reshape(self.num_envs)
+
+    def step_wait(self):
+        self.get_time()
+        self.time_step += 1
+        self.g = self.get_g()
+
+        self.d_op = self.get_dop()
+        m_mu = self.cal(self.actions)
+        self.d_com = self.get_dcom(*m_mu)
+        self.d = self.d_op + self.d_com
+        cost = self.reward_func(m_mu)
+        # transition to new state
+        lambda_t = self.get_lambda()
+        b_t = self.get_b()
+        h_t = self.get_h()
+        e_t = self.get_e()
+        self.state = np.stack([lambda_t, b_t, h_t, e_t], axis=1)
+
+        dones = self.time_step >= self.env.time_steps_per_episode
+        infos = [{} for _ in range(self.num_envs)]
+        obs = self.state.astype(np.float32)
+        if dones.any():
+            self.episode += dones
+            # like DummyVecEnv, finished environments are reset right away and their last observation
+            # is kept in the info dict
+            for i in np.flatnonzero(dones):
+                infos[i]['terminal_observation'] = obs[i].copy()
+            self.reset_rows(dones)
+            obs[dones] = self.state[dones]
+        return obs, (1 / cost).astype(np.float32), dones, infos
+
+    # reset the selected environments to the starting state
+    def reset_rows(self, rows: np.ndarray) -> None:
+        self.state[rows] = [self.env.lamda_low, self.env.b_high, self.env.h_low, self.env.e_low]
+        self.time[rows] = 0
+        self.time_step[rows] = 0
+
+    def reset(self) -> np.ndarray:
+        self.reset_rows(slice(None))
+        return self.state.astype(np.float32)
+
+    # display intermediate results, one value per environment
+    def render(self, *args, **kwargs):
+        return self.reward_time, self.reward_bak, self.reward_bat
+
+    def close(self) -> None:
+        pass
+
+    def _get_indices(self, indices) -> List[int]:
+        if indices is None:
+            return list(range(self.num_envs))
+        if isinstance(indices, int):
+            return [indices]
+        return list(indices)
+
+    # per-environment attributes are the arrays with one row per environment, anything else is shared
+    def get_attr(self, attr_name, indices=None) -> list:
+        value = getattr(self, attr_name) if hasattr(self, attr_name) else getattr(self.env, attr_name)
+        indices = self._get_indices(indices)
+        if isinstance(value, np.ndarray) and value.shape[:1] == (self.num_envs,):
+            return [value[i] for i in indices]
+        return [value for _ in indices]
+
+    def set_attr(self, attr_name, value, indices=None) -> None:
+        current = getattr(self, attr_name, None)
+        if isinstance(current, np.ndarray) and current.shape[:1] == (self.num_envs,):
+            current[self._get_indices(indices)] = value
+        else:
+            setattr(self.env if hasattr(self.env, attr_name) else self, attr_name, value)
+
+    # methods act on the whole batch at once, the result is repeated for every requested index
+    def env_method(self, method_name, *method_args, indices=None, **method_kwargs) -> list:
+        result = getattr(self, method_name)(*method_args, **method_kwargs)
+        return [result for _ in self._get_indices(indices)]
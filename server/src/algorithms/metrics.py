@@ -0,0 +1,76 @@
+import numpy as np
+
+'''
+    Streaming time averages of the cost elements reported by every algorithm's run().
+    The running sums are updated in O(1) per time slot and the averages are written into
+    preallocated arrays, instead of averaging the whole history again at every slot.
+    SeedStatistics combines the results of runs with different seeds the same way: it keeps a running mean and
+    sum of squared deviations per series (Welford's method), so it holds one curve whatever the number of runs.
+'''
+
+
+class RunningAverages:
+    # order of the rows in the preallocated arrays
+    SERIES = ('avg_total', 'avg_delay', 'avg_backup', 'avg_battery')
+
+    def __init__(self, size: int) -> None:
+        self.size = size
+        self.count = 0
+        self._sums = [0.0] * len(self.SERIES)
+        self._averages = np.empty((len(self.SERIES), size))
+
+    # record the costs of one time slot: total cost, delay cost, backup power cost and battery cost
+    def add(self, total: float, delay: float, backup: float, battery: float) -> None:
+        if self.count == self.size:
+            raise IndexError('RunningAverages is full ({} time slots)'.format(self.size))
+        i = self.count
+        for row, value in enumerate((total, delay, backup, battery)):
+            self._sums[row] += float(value)
+            self._averages[row, i] = self._sums[row] / (i + 1)
+        self.count += 1
+
+    # averages of the time slots [start, stop), in the format returned by run()
+    def result(self, start: int = 0, stop: int = None) -> dict:
+        averages = self._averages[:, start:self.count if stop is None else stop]
+        result = {name: averages[row].tolist() for row, name in enumerate(self.SERIES)}
+        # energy cost = backup power cost + battery cost
+        result['avg_energy'] = (averages[2] + averages[3]).tolist()
+        return result
+
+
+class SeedStatistics:
+    # two-sided confidence level of the bands
+    CONFIDENCE = 0.95
+
+    def __init__(self) -> None:
+        self.count = 0
+        self._means = {}
+        self._squares = {}
+
+    # record the result of one run, every series of the same length as in the other runs
+    def add(self, result: dict) -> None:
+        self.count += 1
+        for name, values in result.items():
+            values = np.asarray(values, dtype=np.float64)
+            if self.count == 1:
+                self._means[name] = values.copy()
+                self._squares[name] = np.zeros_like(values)
+                continue
+            delta = values - self._means[name]
+            self._means[name] += delta / self.count
+            self._squares[name] += delta * (values - self._means[name])
+
+    # the mean of every series over the runs, and the bounds of its confidence interval (Student's t)
+    # as <name>_ci_low and <name>_ci_high, which equal the mean after a single run
+    def result(self) -> dict:
+        if self.count > 1:
+            # scipy.stats takes a while to import, only the multi-seed runs need it
+            from scipy.stats import t
+            scale = t.ppf(0.5 + self.CONFIDENCE / 2, self.count - 1) / np.sqrt(self.count * (self.count - 1))
+        result = {}
+        for name, mean in self._means.items():
+            half_width = scale * np.sqrt(self._squares[name]) if self.count > 1 else np.zeros_like(mean)
+            result[name] = mean.tolist()
+            result[name + '_ci_low'] = (mean - half_width).tolist()
+            result[name + '_ci_high'] = (mean + half_width).tolist()
+        return result
@@ -0,0 +1,84 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+
+'''
+    On-disk cache of trained models, so that requests with the same training setup skip training.
+    * An entry is a directory named after the hash of the algorithm name and every parameter that
+      influences training, the algorithm decides what it writes into it.
+    * The cache is bounded in size, the least recently used entries are evicted first.
+    * Entries are written to a temporary directory and renamed into place, so concurrent processes
+      never see half-written models.
+'''
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, os.pardir, '.model_cache')
+
+
+class ModelCache:
+    def __init__(self, cache_dir: str, max_bytes: int) -> None:
+        self.cache_dir = os.path.abspath(cache_dir)
+        # a size limit of 0 disables the cache
+        self.max_bytes = max_bytes
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    @staticmethod
+    def make_key(algorithm: str, params: dict) -> str:
+        payload = json.dumps({'algorithm': algorithm, 'params': params}, sort_keys=True)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    # returns the directory of the entry, or None on a miss
+    def load(self, key: str) -> str:
+        if not self.enabled:
+            return None
+        path = os.path.join(self.cache_dir, key)
+        if not os.path.isdir(path):
+            return None
+        os.utime(path)  # mark as recently used
+        return path
+
+    # save_fn(directory) writes the model files into the given directory
+    def save(self, key: str, save_fn) -> None:
+        if not self.enabled:
+            return
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_path = tempfile.mkdtemp(prefix='.tmp-', dir=self.cache_dir)
+        try:
+            save_fn(tmp_path)
+            try:
+                os.rename(tmp_path, os.path.join(self.cache_dir, key))
+            except OSError:
+                # another process stored the same entry first
+                pass
+        finally:
+            # nothing is left behind when the entry was not renamed into place, e.g. save_fn failed
+            shutil.rmtree(tmp_path, ignore_errors=True)
+        self.evict()
+
+    @staticmethod
+    def _size(path: str) -> int:
+        return sum(os.path.getsize(os.path.join(root, name))
+                   for root, _, names in os.walk(path) for name in names)
+
+    def evict(self) -> None:
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            path = os.path.join(self.cache_dir, name)
+            if not name.startswith('.') and os.path.isdir(path):
+                entries.append((os.path.getmtime(path), self._size(path), path))
+        entries.sort()
+        total = sum(size for _, size, _ in entries)
+        # the most recent entry is always kept, even when it is larger than the limit on its own
+        for _, size, path in entries[:-1]:
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(path, ignore_errors=True)
+            total -= size
+
+
+model_cache = ModelCache(os.environ.get('MODEL_CACHE_DIR', DEFAULT_CACHE_DIR),
+                         int(os.environ.get('MODEL_CACHE_MAX_BYTES', 1 << 30)))
@@ -0,0 +1,82 @@
+from collections import deque
+import numpy as np
+import time
+
+'''
+    Progress reports of the algorithms, sent through report(progress) while they train and evaluate.
+    * Training: number of timesteps done, steps per second and mean reward of the recent steps,
+      recorded by the training environment (stable_baselines_algorithm.RewardTracker) and sent from the learn()
+      callback.
+    * Evaluation: the time averages of the slots computed since the previous report, so that
+      the client can extend its charts instead of waiting for the full result.
+    Reports are sent at most every interval seconds, plus once at the end of each stage.
+    The module imports neither stable_baselines nor TensorFlow, the baselines report their evaluation without them.
+'''
+
+# minimal number of seconds between two reports of the same stage
+REPORT_INTERVAL = 0.5
+# number of recent steps the mean reward is computed over
+RECENT_STEPS = 1000
+
+
+class TrainingProgress:
+    def __init__(self, report, total_timesteps: int, interval: float = REPORT_INTERVAL) -> None:
+        self.report = report
+        self.total_timesteps = total_timesteps
+        self.interval = interval
+        self.timesteps = 0
+        self.rewards = deque(maxlen=RECENT_STEPS)
+        self.started_at = time.time()
+        self.reported_at = 0.0
+
+    def record(self, rewards) -> None:
+        self.timesteps += len(rewards)
+        self.rewards.extend(rewards)
+
+    def update(self) -> None:
+        if time.time() - self.reported_at >= self.interval:
+            self.send()
+
+    # learn() callback, returning False would stop the training
+    def __call__(self, _locals, _globals) -> bool:
+        self.update()
+        return True
+
+    def send(self) -> None:
+        self.reported_at = time.time()
+        elapsed = self.reported_at - self.started_at
+        self.report({
+            'stage': 'training',
+            'timesteps': self.timesteps,
+            'total_timesteps': self.total_timesteps,
+            'steps_per_sec': self.timesteps / elapsed if elapsed > 0 else 0.0,
+            'mean_reward': float(np.mean(self.rewards)) if self.rewards else None,
+        })
+
+
+class EvaluationProgress:
+    def __init__(self, report, metrics, interval: float = REPORT_INTERVAL) -> None:
+        self.report = report
+        # RunningAverages filled by run()
+        self.metrics = metrics
+        self.interval = interval
+        self.sent = 0
+        self.reported_at = 0.0
+
+    # called after every time slot
+    def update(self) -> None:
+        done = self.metrics.count == self.metrics.size
+        if done or time.time() - self.reported_at >= self.interval:
+            self.send()
+
+    def send(self) -> None:
+        self.reported_at = time.time()
+        self.report({
+            'stage': 'evaluating',
+            'done': self.metrics.count,
+            'total': self.metrics.size,
+            # averages of the slots [start, done)
+            'start': self.sent,
+            'metrics': self.metrics.result(self.sent, self.metrics.count),
+        })
+        self.sent = self.metrics.count
@@ -0,0 +1,42 @@
+from collections.abc import Mapping
+import importlib
+
+'''
+    Algorithms by name, without importing them: the modules of the trained algorithms load stable_baselines,
+    Keras and TensorFlow, which takes seconds and hundreds of MB, so a module is only imported when its
+    algorithm is first looked up. Iterating and membership tests (name in registry) import nothing.
+    The query parameters every algorithm takes are listed next to it as well, so that the arguments of a request
+    can be filtered (e.g. for a cache key) without importing it, tests/test_registry.py checks them against the
+    constructors.
+'''
+
+
+class AlgorithmRegistry(Mapping):
+    # entries maps every name to ('<module>:<class>', <its parameters besides common_params>)
+    def __init__(self, entries: dict, common_params=()) -> None:
+        self.paths = {name: path for name, (path, _) in entries.items()}
+        self._params = {name: frozenset(common_params).union(params) for name, (_, params) in entries.items()}
+        self._classes = {}
+
+    def __getitem__(self, name: str):
+        if name not in self._classes:
+            module, cls = self.paths[name].split(':')
+            self._classes[name] = getattr(importlib.import_module(module), cls)
+        return self._classes[name]
+
+    def __contains__(self, name) -> bool:
+        return name in self.paths
+
+    def __iter__(self):
+        return iter(self.paths)
+
+    def __len__(self) -> int:
+        return len(self.paths)
+
+    # names of the query parameters the constructor of the algorithm takes
+    def params(self, name: str) -> frozenset:
+        return self._params[name]
+
+    # names of the algorithms imported so far
+    def loaded(self) -> list:
+        return [name for name in self.paths if name in self._classes]
@@ -0,0 +1,150 @@
+from stable_baselines.common import set_global_seeds, tf_util
+from stable_baselines.common.vec_env import DummyVecEnv, VecEnvWrapper
+from stable_baselines.common.policies import MlpPolicy
+from .base import BaseRLAlgorithm
+from .model_cache import model_cache
+from .progress import TrainingProgress
+from .vec_env import make_vec_env
+from .warm_models import warm_models
+import numpy as np
+import os
+import tensorflow as tf
+
+'''
+    The algorithms trained by stable_baselines (PPO, A2C, SAC, TRPO) differ only in the model class, the policy
+    and whether they can train on several environments at once (MultiEnvAlgorithm).
+    The model is trained, or loaded from the model cache, when the algorithm is created and evaluated by run().
+    In a worker process the model is kept after training and reset for the next job, see warm_models.py.
+'''
+
+
+# points every object of stable_baselines reachable from value (the model, its policies, optimizers, ...)
+# that holds the session old to new instead
+def replace_session(value, old, new, seen: set) -> None:
+    if id(value) in seen:
+        return
+    seen.add(id(value))
+    if isinstance(value, (list, tuple)):
+        items = value
+    elif isinstance(value, dict):
+        items = value.values()
+    elif type(value).__module__.startswith('stable_baselines'):
+        attributes = getattr(value, '__dict__', {})
+        for name, attribute in attributes.items():
+            if attribute is old:
+                attributes[name] = new
+        items = attributes.values()
+    else:
+        return
+    for item in list(items):
+        replace_session(item, old, new, seen)
+
+
+# the training environment passed to the model, counts its steps and records their rewards in a TrainingProgress
+class RewardTracker(VecEnvWrapper):
+    def __init__(self, venv, progress: TrainingProgress) -> None:
+        super().__init__(venv)
+        self.progress = progress
+
+    def reset(self):
+        return self.venv.reset()
+
+    def step_wait(self):
+        obs, rewards, dones, infos = self.venv.step_wait()
+        self.progress.record(rewards)
+        return obs, rewards, dones, infos
+
+
+class StableBaselinesAlgorithm(BaseRLAlgorithm):
+    # the stable_baselines model class and the policy it learns
+    model_class = None
+    policy = MlpPolicy
+    # whether a worker process keeps the model for the next job
+    warm = True
+
+    # environment the model trains on
+    def make_train_env(self):
+        return self.env
+
+    def init_env(self) -> None:
+        self.env = self.make_env()
+        # the environment draws from its own generator, seeded so that training only depends on random_seed
+        self.env.seed(self.random_seed)
+        # the models take vectorized environments, evaluation runs on a single one
+        self.env = DummyVecEnv([lambda: self.env])
+        self.init_model()
+        self.set_seed()
+
+    def init_model(self) -> None:
+        # a model trained with the same setup before is loaded instead of trained again
+        cache_key = self.get_cache_key()
+        cached = model_cache.load(cache_key)
+        if cached is not None:
+            self.model = self.model_class.load(os.path.join(cached, 'model.zip'), verbose=self.verbose)
+            return
+        train_env = self.make_train_env()
+        progress = TrainingProgress(self.report, self.train_time_slots)
+        warm_key = self.get_warm_key(train_env)
+        self.model = self.build_model(RewardTracker(train_env, progress), warm_key)
+        self.model.learn(total_timesteps=self.train_time_slots, callback=progress)
+        progress.send()
+        model_cache.save(cache_key, lambda path: self.model.save(os.path.join(path, 'model.zip')))
+        if self.warm:
+            warm_models.keep(self.cache_name, warm_key, self.model)
+        if train_env is not self.env:
+            train_env.close()
+
+    # what the graph of the model depends on: the spaces, the number of environments and the seed
+    def get_warm_key(self, train_env) -> str:
+        space = train_env.observation_space
+        return model_cache.make_key(self.cache_name, dict(
+            low=space.low.tolist(), high=space.high.tolist(), n_envs=train_env.num_envs, random_seed=self.random_seed))
+
+    # a model kept from a previous job with the same warm_key is reset instead of built again
+    def build_model(self, train_env, warm_key: str):
+        model = warm_models.take(self.cache_name, warm_key) if self.warm else None
+        if model is None:
+            return self.model_class(self.policy, train_env, verbose=self.verbose, seed=self.random_seed)
+        self.reset_model(model)
+        model.verbose = self.verbose
+        model.set_env(train_env)
+        # like the constructor does
+        model.set_random_seed(self.random_seed)
+        return model
+
+    # initializes the graph of a kept model again, in a new session so that its random ops start over as well
+    def reset_model(self, model) -> None:
+        old = model.sess
+        sess = tf_util.make_session(graph=model.graph)
+        replace_session(model, old, sess, set())
+        old.close()
+        with model.graph.as_default():
+            sess.run(tf.global_variables_initializer())
+
+    def set_seed(self) -> None:
+        set_global_seeds(100)
+        self.env.env_method('seed', self.random_seed)
+        np.random.seed(self.random_seed)
+        os.environ['PYTHONHASHSEED'] = str(self.random_seed)
+        self.model.set_random_seed(self.random_seed)
+
+    def predict(self, obs):
+        action, _states = self.model.predict(obs, deterministic=True)
+        return action
+
+
+class MultiEnvAlgorithm(StableBaselinesAlgorithm):
+    def __init__(self, n_envs: str = '1', vec_env: str = 'batched', **kwargs) -> None:
+        # with n_envs > 1 the model trains on n_envs environments, either batched as arrays in this
+        # process or one per worker process (vec_env), evaluation in run() keeps using a single environment
+        self.n_envs = int(n_envs)
+        self.vec_env = vec_env
+        super().__init__(**kwargs)
+
+    def get_model_params(self) -> dict:
+        return dict(n_envs=self.n_envs, vec_env=self.vec_env)
+
+    def make_train_env(self):
+        if self.n_envs > 1:
+            return make_vec_env(self.get_env_kwargs(), self.n_envs, self.vec_env, self.random_seed)
+        return self.env
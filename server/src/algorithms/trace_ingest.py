@@ -0,0 +1,210 @@
+import numpy as np
+import os
+import pandas as pd
+import shutil
+import tempfile
+from .gym_offload_autoscale.envs.trace import TRACE_COLUMNS
+from .traces import trace_path, write_trace_info
+
+try:
+    import pyarrow.parquet as pq
+except ImportError:
+    pq = None
+
+'''
+    Ingestion of real traces (arrival rates, network congestion, harvested green energy) from CSV or Parquet files
+    into the trace format of the environment (see gym_offload_autoscale/envs/trace.py).
+    * The file is read in chunks of CHUNK_ROWS rows and every chunk is resampled and written out before the next one
+      is read, so the memory used does not depend on the length of the trace.
+    * Samples are averaged over the time slots they fall into. The slots start at midnight (UTC) of the first sample,
+      like the episodes of the environment, so that g follows the time of day.
+    * A slot without samples keeps the value of the previous one for up to max_fill minutes (for sources sampled less
+      often than the slots), after that, and for columns the file does not have, it is NaN and the environment draws
+      the value like without a trace.
+    * Times are seconds since the epoch or dates pandas can parse, values are multiplied by the given scales
+      (e.g. 1/900 for arrivals per 15 minutes to units/s).
+'''
+
+# rows read from the source file at a time
+CHUNK_ROWS = 1 << 18
+
+SOURCE_FORMATS = ('csv', 'parquet')
+
+SECONDS_PER_DAY = 24 * 3600
+
+
+def source_format(filename: str) -> str:
+    name = filename.lower()
+    if name.endswith('.parquet') or name.endswith('.pq'):
+        return 'parquet'
+    if name.endswith('.csv') or name.endswith('.csv.gz'):
+        return 'csv'
+    raise ValueError('unknown trace file type: {}, expected one of {}'.format(filename, ', '.join(SOURCE_FORMATS)))
+
+
+def to_seconds(times) -> np.ndarray:
+    times = pd.Series(times)
+    if pd.api.types.is_numeric_dtype(times):
+        return times.to_numpy(dtype=np.float64)
+    return ((pd.to_datetime(times, utc=True) - pd.Timestamp(0, tz='UTC')) / pd.Timedelta(seconds=1)).to_numpy(dtype=np.float64)
+
+
+# yields (times in seconds, values with a column per entry of columns) chunk by chunk
+def read_chunks(path: str, file_format: str, time_column: str, columns: list):
+    wanted = [time_column] + [column for column in columns if column]
+    if file_format == 'csv':
+        chunks = pd.read_csv(path, usecols=wanted, chunksize=CHUNK_ROWS)
+    elif file_format == 'parquet':
+        if pq is None:
+            raise ValueError('reading Parquet traces requires pyarrow')
+        chunks = (batch.to_pandas() for batch in pq.ParquetFile(path).iter_batches(batch_size=CHUNK_ROWS, columns=wanted))
+    else:
+        raise ValueError('format must be one of {}, got {!r}'.format(', '.join(SOURCE_FORMATS), file_format))
+    for chunk in chunks:
+        missing = [column for column in wanted if column not in chunk]
+        if missing:
+            raise ValueError('the trace has no column {}'.format(', '.join(missing)))
+        values = np.full((len(chunk), len(columns)), np.nan)
+        for i, column in enumerate(columns):
+            if column:
+                values[:, i] = chunk[column].to_numpy(dtype=np.float64)
+        yield to_seconds(chunk[time_column]), values
+
+
+class SlotResampler:
+    # averages samples given in time order over time slots of slot_seconds starting at start (seconds),
+    # add() returns the slots completed by a chunk, finish() the last one
+    def __init__(self, slot_seconds: float, start: float, n_columns: int, max_fill_slots: int) -> None:
+        self.slot_seconds = slot_seconds
+        self.start = start
+        self.max_fill_slots = max_fill_slots
+        # the slot still receiving samples, and the number of slots returned before it
+        self.slot = 0
+        self.sums = np.zeros(n_columns)
+        self.counts = np.zeros(n_columns)
+        # last value of every column and the slot it was seen in, for filling the slots without samples
+        self.last_value = np.full(n_columns, np.nan)
+        self.last_slot = np.full(n_columns, -np.inf)
+
+    def add(self, times: np.ndarray, values: np.ndarray) -> np.ndarray:
+        slots = np.floor((times - self.start) / self.slot_seconds).astype(np.int64) - self.slot
+        if len(slots) == 0:
+            return np.empty((0, len(self.sums)))
+        if slots[0] < 0 or np.any(np.diff(slots) < 0):
+            raise ValueError('the trace has to be sorted by time')
+        n = slots[-1] + 1
+        sums = np.zeros((n, len(self.sums)))
+        counts = np.zeros((n, len(self.sums)))
+        for column in range(values.shape[1]):
+            valid = ~np.isnan(values[:, column])
+            sums[:, column] = np.bincount(slots[valid], weights=values[valid, column], minlength=n)
+            counts[:, column] = np.bincount(slots[valid], minlength=n)
+        sums[0] += self.sums
+        counts[0] += self.counts
+        # the last slot may still get samples from the next chunk
+        self.sums, self.counts = sums[-1], counts[-1]
+        return self.complete(sums[:-1], counts[:-1])
+
+    def finish(self) -> np.ndarray:
+        return self.complete(self.sums[np.newaxis], self.counts[np.newaxis])
+
+    def complete(self, sums: np.ndarray, counts: np.ndarray) -> np.ndarray:
+        with np.errstate(invalid='ignore', divide='ignore'):
+            rows = np.where(counts > 0, sums / counts, np.nan)
+        slots = self.slot + np.arange(len(rows))
+        for column in range(rows.shape[1]):
+            valid = counts[:, column] > 0
+            # index of the last slot with samples up to every slot, -1 before the first one of the chunk
+            source = np.maximum.accumulate(np.where(valid, np.arange(len(rows)), -1))
+            value = np.where(source >= 0, rows[np.maximum(source, 0), column], self.last_value[column])
+            source_slot = np.where(source >= 0, slots[np.maximum(source, 0)], self.last_slot[column])
+            rows[:, column] = np.where(slots - source_slot <= self.max_fill_slots, value, np.nan)
+            if valid.any():
+                self.last_value[column] = rows[valid, column][-1]
+                self.last_slot[column] = slots[valid][-1]
+        self.slot += len(rows)
+        return rows
+
+
+class TraceWriter:
+    # writes the values (λ, h, g) of consecutive time slots to a trace of a length not known in advance:
+    # they are appended to a raw file, close() puts the .npy header in front of them and moves the trace into place
+    # note: step k of the environment takes g of slot k but λ and h of slot k + 1 (the next state),
+    #       so that is what row k of the trace holds, λ and h of the first slot belong to the reset state
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.slots = 0
+        # g of the last slot written, the next slot completes its row
+        self.g = None
+        self.raw = tempfile.NamedTemporaryFile(dir=os.path.dirname(path), suffix='.raw', delete=False)
+
+    def write(self, values: np.ndarray) -> None:
+        if len(values) == 0:
+            return
+        rows = np.array(values, dtype='<f8')
+        g = np.concatenate([[self.g], rows[:-1, 2]]) if self.g is not None else rows[:-1, 2]
+        self.g = rows[-1, 2]
+        rows = rows[len(rows) - len(g):]
+        rows[:, 2] = g
+        self.raw.write(rows.tobytes())
+        self.slots += len(rows)
+
+    def close(self) -> None:
+        self.raw.close()
+        partial = self.path + '.partial'
+        try:
+            with open(partial, 'wb') as out, open(self.raw.name, 'rb') as raw:
+                header = {'descr': '<f8', 'fortran_order': False, 'shape': (self.slots, len(TRACE_COLUMNS))}
+                np.lib.format.write_array_header_1_0(out, header)
+                shutil.copyfileobj(raw, out)
+            os.replace(partial, self.path)
+        finally:
+            os.remove(self.raw.name)
+            if os.path.exists(partial):
+                os.remove(partial)
+
+    def abort(self) -> None:
+        self.raw.close()
+        os.remove(self.raw.name)
+
+
+# columns and scales map the trace columns (lamda, h, g) to the source columns and the factors their values are
+# multiplied by, timeslot_duration and max_fill are in minutes, returns the description of the written trace
+# note: source_name is recorded as the origin of the trace, the base name of source by default
+def ingest_trace(source: str, name: str, timeslot_duration: float, time_column: str, columns: dict,
+                 scales: dict = None, file_format: str = None, max_fill: float = 60, source_name: str = None) -> dict:
+    path = trace_path(name)
+    file_format = file_format or source_format(source)
+    source_columns = [columns.get(column) for column in TRACE_COLUMNS]
+    if not any(source_columns):
+        raise ValueError('map at least one of the columns {} of the trace'.format(', '.join(TRACE_COLUMNS)))
+    scale = np.array([float((scales or {}).get(column, 1)) for column in TRACE_COLUMNS])
+    if timeslot_duration <= 0:
+        raise ValueError('timeslot_duration must be positive')
+    slot_seconds = timeslot_duration * 60
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    writer = TraceWriter(path)
+    resampler = None
+    samples = 0
+    try:
+        for times, values in read_chunks(source, file_format, time_column, source_columns):
+            if len(times) == 0:
+                continue
+            if resampler is None:
+                start = np.floor(times[0] / SECONDS_PER_DAY) * SECONDS_PER_DAY
+                resampler = SlotResampler(slot_seconds, start, len(TRACE_COLUMNS), int(max_fill * 60 // slot_seconds))
+            writer.write(resampler.add(times, values * scale))
+            samples += len(times)
+        if resampler is None:
+            raise ValueError('the trace has no samples')
+        writer.write(resampler.finish())
+        if writer.slots == 0:
+            raise ValueError('the trace has to span at least two time slots')
+    except BaseException:
+        writer.abort()
+        raise
+    writer.close()
+    info = {'source': source_name or os.path.basename(source), 'timeslot_duration': timeslot_duration,
+            'start': float(start), 'samples': samples, 'columns': dict(zip(TRACE_COLUMNS, source_columns))}
+    write_trace_info(path, info)
+    return dict(info, name=name, slots=writer.slots)
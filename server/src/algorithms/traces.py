@@ -0,0 +1,105 @@
+"""
+    Writes a synthetic scenario trace (λ, h and g of every time slot) to a .npy file, for the trace query parameter
+    of the algorithms. The distributions are those of the environment with the given parameters.
+    Run from server/src:
+        python -m algorithms.traces day-1m.npy --slots 1000000 --seed 1
+"""
+import argparse
+import json
+import math
+import os
+from .gym_offload_autoscale.envs.trace import generate_trace, open_trace
+
+'''
+    The traces the algorithms can replay (see gym_offload_autoscale/envs/trace.py) are the .npy files in TRACE_DIR,
+    requests name them relative to it and can not reach files outside of it.
+    * <name>.json next to a trace describes it, e.g. the time slot length (minutes) it was generated or resampled for.
+    * Real traces are ingested from CSV or Parquet files by trace_ingest.py.
+'''
+
+TRACE_DIR = os.path.abspath(os.environ.get(
+    'TRACE_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, os.pardir, 'traces')))
+
+
+# path of the trace named name inside TRACE_DIR, whether it exists or not
+def trace_path(name: str) -> str:
+    path = os.path.abspath(os.path.join(TRACE_DIR, name))
+    if os.path.commonpath([path, TRACE_DIR]) != TRACE_DIR or not path.endswith('.npy'):
+        raise ValueError('invalid trace: {}'.format(name))
+    return path
+
+
+# path of the trace named name, the empty name means no trace
+# a trace resampled to another time slot length than timeslot_duration (hours) is refused
+def resolve_trace(name: str, timeslot_duration: float = None) -> str:
+    if not name:
+        return None
+    path = trace_path(name)
+    if not os.path.isfile(path):
+        raise ValueError('unknown trace: {}'.format(name))
+    minutes = trace_info(path).get('timeslot_duration')
+    if timeslot_duration is not None and minutes is not None and not math.isclose(minutes, timeslot_duration * 60):
+        raise ValueError('trace {} has time slots of {:g} minutes, not {:g}'.format(name, minutes, timeslot_duration * 60))
+    return path
+
+
+# the description of a trace is kept next to it, as <name>.json
+def trace_info(path: str) -> dict:
+    try:
+        with open(path[:-len('.npy')] + '.json') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def write_trace_info(path: str, info: dict) -> None:
+    with open(path[:-len('.npy')] + '.json', 'w') as f:
+        json.dump(info, f)
+
+
+# every trace in TRACE_DIR with its number of slots and description
+def list_traces() -> list:
+    traces = []
+    for root, _, files in os.walk(TRACE_DIR):
+        for file in sorted(files):
+            if not file.endswith('.npy'):
+                continue
+            path = os.path.join(root, file)
+            try:
+                slots = len(open_trace(path))
+            except ValueError:
+                continue
+            traces.append(dict(trace_info(path), name=os.path.relpath(path, TRACE_DIR).replace(os.sep, '/'), slots=slots))
+    return sorted(traces, key=lambda trace: trace['name'])
+
+
+# identifies the content of a trace for the model cache, without reading the (possibly very large) file
+def trace_fingerprint(path: str) -> dict:
+    if path is None:
+        return None
+    stat = os.stat(path)
+    return {'name': os.path.relpath(path, TRACE_DIR), 'size': stat.st_size, 'mtime': stat.st_mtime_ns}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('name', help='file name, relative to TRACE_DIR ({})'.format(TRACE_DIR))
+    parser.add_argument('--slots', type=int, required=True)
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--lamda-low', type=float, default=20)
+    parser.add_argument('--lamda-high', type=float, default=100)
+    parser.add_argument('--h-low', type=float, default=0.02)
+    parser.add_argument('--h-high', type=float, default=0.06)
+    parser.add_argument('--timeslot-duration', type=int, default=15, help='minutes')
+    parser.add_argument('--time-steps-per-episode', type=int, default=96)
+    args = parser.parse_args()
+    path = trace_path(args.name)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    generate_trace(path, args.slots, args.lamda_low, args.lamda_high, args.h_low, args.h_high,
+                   args.timeslot_duration / 60, args.time_steps_per_episode, args.seed)
+    write_trace_info(path, {'source': 'synthetic', 'seed': args.seed, 'timeslot_duration': args.timeslot_duration})
+    print('{} slots written to {}'.format(args.slots, path))
+
+
+if __name__ == '__main__':
+    main()
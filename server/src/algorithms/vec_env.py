@@ -0,0 +1,33 @@
+from stable_baselines.common.vec_env import SubprocVecEnv
+from .gym_offload_autoscale.envs.offload_autoscale_env import OffloadAutoscaleEnv
+from .gym_offload_autoscale.envs.vec_offload_autoscale_env import VecOffloadAutoscaleEnv
+
+'''
+    Vectorized training environments for the stable-baselines algorithms.
+    * batched: VecOffloadAutoscaleEnv, N copies stepped together as NumPy arrays in this process.
+    * subproc: SubprocVecEnv, one OffloadAutoscaleEnv per worker process.
+      With a trace the workers replay it from evenly spaced slots, so that they do not all see the same inputs.
+'''
+
+VEC_ENV_TYPES = ('batched', 'subproc')
+
+
+def make_env(env_kwargs: dict, seed: int, rank: int, n_envs: int = 1):
+    # the returned function is called inside the worker process
+    def _init() -> OffloadAutoscaleEnv:
+        env = OffloadAutoscaleEnv(**env_kwargs)
+        env.seed(seed + rank)
+        if env.trace is not None:
+            env.seek_trace(rank * len(env.trace) // n_envs)
+        return env
+    return _init
+
+
+def make_vec_env(env_kwargs: dict, n_envs: int, vec_env: str, seed: int):
+    if vec_env not in VEC_ENV_TYPES:
+        raise ValueError('vec_env must be one of {}, got {!r}'.format(', '.join(VEC_ENV_TYPES), vec_env))
+    if vec_env == 'subproc':
+        return SubprocVecEnv([make_env(env_kwargs, seed, rank, n_envs) for rank in range(n_envs)])
+    env = VecOffloadAutoscaleEnv(n_envs, **env_kwargs)
+    env.seed(seed)
+    return env
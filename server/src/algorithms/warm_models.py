@@ -0,0 +1,35 @@
+'''
+    Models kept between the jobs of a worker process (see jobs.py): a job for the same algorithm type, architecture
+    and seed as the previous one resets the weights of the model built then instead of building its TensorFlow graph
+    again, which takes seconds.
+    * One model is kept per algorithm type, a job with another architecture or seed replaces it.
+    * The algorithms reset a model by initializing its graph again in a new session, so its random ops start over too
+      and the job trains exactly like with a newly built model.
+    * Nothing is kept unless enabled, which only the worker processes are (runner.init_worker()).
+'''
+
+
+class WarmModels:
+    def __init__(self) -> None:
+        self.enabled = False
+        self.hits = 0
+        self.misses = 0
+        self._models = {}
+
+    # the model of kind kept for key, or None, it is forgotten until kept again (after a successful training)
+    def take(self, kind: str, key: str):
+        if not self.enabled:
+            return None
+        kept = self._models.pop(kind, None)
+        if kept is not None and kept[0] == key:
+            self.hits += 1
+            return kept[1]
+        self.misses += 1
+        return None
+
+    def keep(self, kind: str, key: str, model) -> None:
+        if self.enabled:
+            self._models[kind] = (key, model)
+
+
+warm_models = WarmModels()
@@ -1,42 +1,377 @@
+from algorithms.traces import TRACE_DIR, list_traces
 from flask import Flask, request
 from flask_cors import CORS, cross_origin
-from algorithms.ppo2 import PPO2Algorithm
-from algorithms.dqn import DQNAlgorithm
-from algorithms.a2c import A2CAlgorithm
-from algorithms.sac import SACAlgorithm
-from algorithms.trpo import TRPOAlgorithm
+from flask_socketio import SocketIO, emit, join_room, leave_room
+from jobs import FINISHED, JobManager, QueueFullError
+from result_cache import ResultCache
+from runner import ALGORITHM_MP, get_algorithm_args, init_worker, parse_seeds, run_algorithm, run_overview, run_seeds
+from serialization import FormatError, ResultFormat
+from sweeps import SweepManager
 import json
+import os
+import shutil
+import tempfile
 
 app = Flask(__name__)
 cors = CORS(app)
 app.config['CORS_HEADERS'] = 'Content-Type'
+# number of algorithm jobs allowed to run at the same time, and how many more may wait for a slot
+app.config['JOB_MAX_WORKERS'] = int(os.environ.get('JOB_MAX_WORKERS', 2))
+app.config['JOB_MAX_PENDING'] = int(os.environ.get('JOB_MAX_PENDING', 32))
+# the jobs run in worker processes that keep TensorFlow and their models loaded, a worker is replaced
+# after this many jobs (0: never) to bound its memory
+app.config['JOB_WORKER_MAX_JOBS'] = int(os.environ.get('JOB_WORKER_MAX_JOBS', 50))
 
-ALGORITHM_MP = {
-    'PPO': PPO2Algorithm,
-    'DQN': DQNAlgorithm,
-    'A2C': A2CAlgorithm,
-    'SAC': SACAlgorithm,
-    'TRPO': TRPOAlgorithm,
-}
+# results kept in memory, and optionally on disk when RESULT_CACHE_DIR is set
+app.config['RESULT_CACHE_SIZE'] = int(os.environ.get('RESULT_CACHE_SIZE', 64))
+app.config['RESULT_CACHE_DIR'] = os.environ.get('RESULT_CACHE_DIR')
+
+# processes a parameter sweep spreads its runs over, besides the job workers
+app.config['SWEEP_MAX_WORKERS'] = int(os.environ.get('SWEEP_MAX_WORKERS', os.cpu_count() or 1))
+
+# job updates are pushed over Socket.IO, the clients following a job join the room named after its id
+socketio = SocketIO(app, cors_allowed_origins='*', async_mode='threading')
+
+
+# the 'job' events leave the result out, clients fetch it from /jobs/<job_id>/result in the format they want
+def job_state(job) -> dict:
+    state = job.to_dict()
+    state.pop('result', None)
+    return state
+
+
+def publish_job(job, event: str) -> None:
+    if event == 'progress':
+        socketio.emit('progress', {'id': job.id, 'progress': job.progress}, to=job.id)
+    else:
+        socketio.emit('job', job_state(job), to=job.id)
+
+
+jobs = JobManager(max_workers=app.config['JOB_MAX_WORKERS'], max_pending=app.config['JOB_MAX_PENDING'],
+                  listener=publish_job, max_jobs_per_worker=app.config['JOB_WORKER_MAX_JOBS'], initializer=init_worker)
+results = ResultCache(max_entries=app.config['RESULT_CACHE_SIZE'], cache_dir=app.config['RESULT_CACHE_DIR'])
+sweeps = SweepManager(max_workers=app.config['SWEEP_MAX_WORKERS'])
+
+
+def json_response(data, status: int = 200):
+    return json.dumps(data), status, {'Content-Type': 'application/json; charset=utf-8'}
+
+
+# result_format is read from (and removed from) the query arguments, see serialization.py
+def get_result_format(args: dict) -> ResultFormat:
+    return ResultFormat.from_request(args, request.headers.get('Accept', ''))
+
+
+def result_response(result: dict, result_format: ResultFormat, status: int = 200):
+    return result_format.encode(result), status, {'Content-Type': result_format.content_type}
+
+
+def job_response(job, result_format: ResultFormat, status: int = 200):
+    return json_response(result_format.encode_job(job.to_dict()), status)
+
+
+def submit_job(result_format: ResultFormat, target, *args, finalize=None):
+    try:
+        job = jobs.submit(target, *args, finalize=finalize)
+    except QueueFullError as e:
+        return json_response({'error': str(e)}, 503)
+    return job_response(job, result_format, 202)
+
+
+@app.errorhandler(FormatError)
+def format_error(e):
+    return json_response({'error': str(e)}, 400)
+
+
+# the result cache key of a run, only the parameters the algorithm takes count (and the seeds of a multi-seed run)
+# so that the same run requested by /run_algorithm and by the overview shares its entry
+def result_key(algorithm_name: str, args: dict) -> str:
+    key_args = get_algorithm_args(algorithm_name, args)
+    if 'seeds' in args:
+        key_args['seeds'] = args['seeds']
+    return ResultCache.make_key(algorithm_name, key_args)
+
+
+def cache_algorithm(algorithm_name: str, args: dict):
+    # returns the cached result, or None and a finalize function that caches the computed one
+    key = result_key(algorithm_name, args)
+    cached = results.get(key)
+
+    def finalize(result: dict) -> dict:
+        results.put(key, result)
+        return result
+    return cached, finalize
+
+
+# run_algorithm, or run_seeds with ?seeds=, and the arguments to call it with
+# raises ValueError for invalid seeds, the seeds stay in args since they are part of the cache key
+def algorithm_target(algorithm_name: str, args: dict) -> tuple:
+    if 'seeds' not in args:
+        return run_algorithm, (algorithm_name, args)
+    seeds = parse_seeds(args['seeds'], args.get('random_seed', '0'))
+    run_args = {key: value for key, value in args.items() if key != 'seeds'}
+    return run_seeds, (algorithm_name, run_args, seeds)
+
+
+def cache_overview(algo_names: list, args: dict):
+    # returns the algorithms that still have to run, and a finalize function that caches their
+    # results and merges them with the cached ones in the requested order
+    keys = {name: result_key(name, args) for name in algo_names}
+    cached = {name: results.get(keys[name]) for name in algo_names}
+    missing = [name for name in algo_names if cached[name] is None]
+
+    def finalize(result: dict) -> dict:
+        for name, value in result.items():
+            results.put(keys[name], value)
+        return {name: result[name] if cached[name] is None else cached[name] for name in algo_names}
+    return missing, finalize
 
 
 @app.route("/get_overview", methods=['GET'])
 @cross_origin()
 def get_overview_info():
     args = request.args.to_dict()
+    result_format = get_result_format(args)
     algo_names = args['algo_names'].split(',')
     args.pop('algo_names')
-    result = {}
-    for name in algo_names:
-        algorithm = ALGORITHM_MP[name](**args)
-        result[name] = algorithm.run()
-    return json.dumps(result), 200, {'Content-Type': 'application/json; charset=utf-8'}
+    unknown = [name for name in algo_names if name not in ALGORITHM_MP]
+    if unknown:
+        return json_response({'error': 'unknown algorithm: {}'.format(','.join(unknown))}, 404)
+    missing, finalize = cache_overview(algo_names, args)
+    try:
+        result = finalize(run_overview(missing, args) if missing else {})
+    except ValueError as e:
+        # invalid arguments, e.g. an unknown trace or a parameter that is not a number
+        return json_response({'error': str(e)}, 400)
+    return result_response(result, result_format)
 
 
 @app.route("/run_algorithm/<algorithm_name>", methods=['GET'])
 @cross_origin()
-def run_algorithm(algorithm_name):
+def run_algorithm_info(algorithm_name):
+    if algorithm_name not in ALGORITHM_MP:
+        return json_response({'error': 'unknown algorithm: {}'.format(algorithm_name)}, 404)
+    args = request.args.to_dict()
+    result_format = get_result_format(args)
+    try:
+        target, target_args = algorithm_target(algorithm_name, args)
+    except ValueError as e:
+        return json_response({'error': str(e)}, 400)
+    result, finalize = cache_algorithm(algorithm_name, args)
+    if result is None:
+        try:
+            result = finalize(target(*target_args))
+        except ValueError as e:
+            # invalid arguments, e.g. an unknown trace or a parameter that is not a number
+            return json_response({'error': str(e)}, 400)
+    return result_response(result, result_format)
+
+
+# Asynchronous versions of the two endpoints above: they return a job right away,
+# its status, progress and result are then read from /jobs/<job_id>
+@app.route("/get_overview", methods=['POST'])
+@cross_origin()
+def submit_overview():
+    args = request.args.to_dict()
+    result_format = get_result_format(args)
+    algo_names = args.pop('algo_names').split(',')
+    unknown = [name for name in algo_names if name not in ALGORITHM_MP]
+    if unknown:
+        return json_response({'error': 'unknown algorithm: {}'.format(','.join(unknown))}, 404)
+    missing, finalize = cache_overview(algo_names, args)
+    if not missing:
+        return job_response(jobs.add_finished(finalize({})), result_format, 202)
+    return submit_job(result_format, run_overview, missing, args, finalize=finalize)
+
+
+@app.route("/run_algorithm/<algorithm_name>", methods=['POST'])
+@cross_origin()
+def submit_algorithm(algorithm_name):
+    if algorithm_name not in ALGORITHM_MP:
+        return json_response({'error': 'unknown algorithm: {}'.format(algorithm_name)}, 404)
+    args = request.args.to_dict()
+    result_format = get_result_format(args)
+    try:
+        target, target_args = algorithm_target(algorithm_name, args)
+    except ValueError as e:
+        return json_response({'error': str(e)}, 400)
+    result, finalize = cache_algorithm(algorithm_name, args)
+    if result is not None:
+        return job_response(jobs.add_finished(result), result_format, 202)
+    return submit_job(result_format, target, *target_args, finalize=finalize)
+
+
+@app.route("/jobs/<job_id>", methods=['GET'])
+@cross_origin()
+def get_job(job_id):
+    job = jobs.get(job_id)
+    if job is None:
+        return json_response({'error': 'unknown job: {}'.format(job_id)}, 404)
+    return job_response(job, get_result_format(request.args.to_dict()))
+
+
+# the result of a finished job on its own, in any format including arrow
+@app.route("/jobs/<job_id>/result", methods=['GET'])
+@cross_origin()
+def get_job_result(job_id):
+    job = jobs.get(job_id)
+    if job is None:
+        return json_response({'error': 'unknown job: {}'.format(job_id)}, 404)
+    result_format = get_result_format(request.args.to_dict())
+    if job.status != FINISHED:
+        return json_response({'error': 'job {} is {}'.format(job_id, job.status)}, 409)
+    return result_response(job.result, result_format)
+
+
+@app.route("/jobs/<job_id>", methods=['DELETE'])
+@cross_origin()
+def cancel_job(job_id):
+    job = jobs.cancel(job_id)
+    if job is None:
+        return json_response({'error': 'unknown job: {}'.format(job_id)}, 404)
+    return json_response(job.to_dict())
+
+
+# Socket.IO events, every one takes {"id": <job id>}:
+# subscribe sends the current state of the job back, then its 'progress' and 'job' updates as they happen,
+# unsubscribe stops them and abort cancels the job like DELETE /jobs/<job_id>
+@socketio.on('subscribe')
+def subscribe_job(data):
+    job = jobs.get(data.get('id'))
+    if job is None:
+        emit('job_error', {'id': data.get('id'), 'error': 'unknown job: {}'.format(data.get('id'))})
+        return
+    join_room(job.id)
+    emit('job', job_state(job))
+
+
+@socketio.on('unsubscribe')
+def unsubscribe_job(data):
+    leave_room(data.get('id'))
+
+
+@socketio.on('abort')
+def abort_job(data):
+    if jobs.cancel(data.get('id')) is None:
+        emit('job_error', {'id': data.get('id'), 'error': 'unknown job: {}'.format(data.get('id'))})
+
+
+# parameter sweeps, see sweeps.py: POST /sweeps takes the spec as its JSON body, submitting a spec again
+# continues its sweep, GET /sweeps/<sweep_id> gives the progress and the summary per point
+@app.route("/sweeps", methods=['POST'])
+@cross_origin()
+def submit_sweep():
+    try:
+        sweep = sweeps.submit(request.get_json(force=True, silent=True))
+    except ValueError as e:
+        return json_response({'error': str(e)}, 400)
+    return json_response(sweep.to_dict(), 202)
+
+
+@app.route("/sweeps", methods=['GET'])
+@cross_origin()
+def list_sweeps():
+    return json_response(sweeps.list())
+
+
+@app.route("/sweeps/<sweep_id>", methods=['GET'])
+@cross_origin()
+def get_sweep(sweep_id):
+    sweep = sweeps.get(sweep_id)
+    if sweep is None:
+        return json_response({'error': 'unknown sweep: {}'.format(sweep_id)}, 404)
+    return json_response(dict(sweep.to_dict(), spec=sweep.spec, summary=sweep.summary()))
+
+
+# every finished run of the sweep, in the order they finished
+@app.route("/sweeps/<sweep_id>/results", methods=['GET'])
+@cross_origin()
+def get_sweep_results(sweep_id):
+    sweep = sweeps.get(sweep_id)
+    if sweep is None:
+        return json_response({'error': 'unknown sweep: {}'.format(sweep_id)}, 404)
+    return json_response(sweep.read_results())
+
+
+@app.route("/sweeps/<sweep_id>", methods=['DELETE'])
+@cross_origin()
+def cancel_sweep(sweep_id):
+    sweep = sweeps.cancel(sweep_id)
+    if sweep is None:
+        return json_response({'error': 'unknown sweep: {}'.format(sweep_id)}, 404)
+    return json_response(sweep.to_dict())
+
+
+# traces the algorithms can replay with ?trace=<name>, see algorithms/traces.py
+@app.route("/traces", methods=['GET'])
+@cross_origin()
+def get_traces():
+    return json_response(list_traces())
+
+
+# Uploads a CSV or Parquet trace, as the file of a multipart form or as the request body, and ingests it as <name>.
+# The query names the time column (time_column, default time) and the columns of λ, h and g (lamda_column,
+# h_column, g_column, at least one of them), and can give factors for their values (lamda_scale, h_scale, g_scale),
+# the time slot length in minutes to resample to (timeslot_duration, default 15), how long a value is held when
+# there are no samples (max_fill, minutes, default 60) and the file type (format, csv or parquet, from the file name
+# otherwise). See algorithms/trace_ingest.py
+@app.route("/traces", methods=['POST'])
+@cross_origin()
+def upload_trace():
+    # pandas is only loaded for ingesting traces, not when the server starts
+    from algorithms.trace_ingest import ingest_trace, source_format
     args = request.args.to_dict()
-    algorithm = ALGORITHM_MP[algorithm_name](**args)
-    result = algorithm.run()
-    return json.dumps(result), 200, {'Content-Type': 'application/json; charset=utf-8'}
+    upload = request.files.get('file')
+    filename = upload.filename if upload else args.get('name', '')
+    name = args.get('name') or filename
+    if not name:
+        return json_response({'error': 'the trace needs a name'}, 400)
+    name = os.path.splitext(name)[0] + '.npy'
+    os.makedirs(TRACE_DIR, exist_ok=True)
+    # the upload is saved in chunks next to the traces, then read back chunk by chunk
+    fd, source = tempfile.mkstemp(dir=TRACE_DIR, suffix='.upload')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            if upload:
+                upload.save(f)
+            else:
+                shutil.copyfileobj(request.stream, f)
+        file_format = args.get('format') or source_format(filename)
+        columns = {column: args.get(column + '_column') for column in ('lamda', 'h', 'g')}
+        scales = {column: args[column + '_scale'] for column in ('lamda', 'h', 'g') if column + '_scale' in args}
+        trace = ingest_trace(source, name, float(args.get('timeslot_duration', 15)), args.get('time_column', 'time'),
+                             columns, scales, file_format, float(args.get('max_fill', 60)), source_name=filename)
+    except ValueError as e:
+        return json_response({'error': str(e)}, 400)
+    finally:
+        os.remove(source)
+    return json_response(trace, 201)
+
+
+# answers as soon as the server is up: the algorithms are only imported when first run, see algorithms/registry.py
+@app.route("/health", methods=['GET'])
+@cross_origin()
+def health():
+    return json_response({'status': 'ok', 'algorithms': list(ALGORITHM_MP), 'loaded': ALGORITHM_MP.loaded()})
+
+
+@app.route("/cache", methods=['GET'])
+@cross_origin()
+def get_cache_stats():
+    return json_response(results.stats())
+
+
+# drops every cached result, or only those of ?algorithm=<name>
+@app.route("/cache", methods=['DELETE'])
+@cross_origin()
+def invalidate_cache():
+    removed = results.invalidate(request.args.get('algorithm'))
+    return json_response({'removed': removed})
+
+
+if __name__ == '__main__':
+    # the workers load TensorFlow while the server starts, not when the first job arrives
+    jobs.start_workers()
+    # sweeps interrupted by the last shutdown carry on where they stopped
+    sweeps.resume()
+    socketio.run(app)
@@ -0,0 +1,305 @@
+from collections import OrderedDict, deque
+from multiprocessing.connection import wait
+import atexit
+import multiprocessing as mp
+import threading
+import time
+import uuid
+
+'''
+    Background jobs for long algorithm runs.
+    * Jobs run in worker processes (TensorFlow sessions and the GIL make threads a poor fit),
+      started with "spawn" so that they never inherit a half-initialized TensorFlow runtime.
+    * A worker runs one job after the other: it imports the algorithms once (initializer) and keeps their models
+      between jobs (see algorithms/warm_models.py), so a job does not pay for either. After max_jobs_per_worker
+      jobs (0: no limit) it exits and a new one takes its place, which bounds the memory a worker accumulates.
+    * At most max_workers jobs run at the same time, the others wait in a FIFO queue of at most max_pending jobs.
+    * A job reports progress and its result over the pipe of its worker, a single dispatcher thread collects them.
+      Cancelling a running job terminates its worker.
+    * An optional listener(job, event) is told about every progress report ('progress') and
+      every change of status ('status'), e.g. to push them to the clients that follow the job.
+'''
+
+PENDING = 'pending'
+RUNNING = 'running'
+FINISHED = 'finished'
+FAILED = 'failed'
+CANCELLED = 'cancelled'
+
+
+class QueueFullError(Exception):
+    pass
+
+
+class Job:
+    def __init__(self, target, args: tuple, finalize=None) -> None:
+        self.id = uuid.uuid4().hex
+        self.target = target
+        self.args = args
+        # optional finalize(result) -> result, called in the server process when the job finishes
+        self.finalize = finalize
+        self.status = PENDING
+        self.progress = {}
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        # the worker running the job
+        self.worker = None
+
+    def to_dict(self) -> dict:
+        info = {
+            'id': self.id,
+            'status': self.status,
+            'progress': self.progress,
+            'created_at': self.created_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+        }
+        if self.status == FINISHED:
+            info['result'] = self.result
+        if self.status == FAILED:
+            info['error'] = self.error
+        return info
+
+
+# target(*args, report=...) runs in the worker process and its outcome goes back over conn
+def _run_job(conn, target, args: tuple) -> None:
+    def report(progress: dict) -> None:
+        conn.send(('progress', progress))
+    try:
+        result = target(*args, report=report)
+    except Exception as e:
+        conn.send(('error', '{}: {}'.format(type(e).__name__, e)))
+    else:
+        conn.send(('result', result))
+
+
+# entry point of the worker processes: runs the jobs received over conn until it gets None, or max_jobs of them
+def _worker_main(conn, initializer, max_jobs: int) -> None:
+    if initializer is not None:
+        initializer()
+    jobs = 0
+    while max_jobs <= 0 or jobs < max_jobs:
+        try:
+            task = conn.recv()
+        except EOFError:
+            break
+        if task is None:
+            break
+        _run_job(conn, *task)
+        jobs += 1
+    conn.close()
+
+
+class Worker:
+    def __init__(self, context, initializer, max_jobs: int) -> None:
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(target=_worker_main, args=(child_conn, initializer, max_jobs))
+        self.process.start()
+        child_conn.close()
+        self.max_jobs = max_jobs
+        self.jobs = 0
+        # the job running, None while idle
+        self.job = None
+
+    # whether the worker exits after its current job
+    @property
+    def exhausted(self) -> bool:
+        return self.max_jobs > 0 and self.jobs >= self.max_jobs
+
+    def run(self, job: Job) -> None:
+        self.jobs += 1
+        self.job = job
+        try:
+            self.conn.send((job.target, job.args))
+        except OSError:
+            # the worker died, the job fails when its pipe is read
+            pass
+
+    def stop(self, terminate: bool = False) -> None:
+        if terminate:
+            self.process.terminate()
+        else:
+            try:
+                self.conn.send(None)
+            except OSError:
+                pass
+        self.process.join()
+        self.conn.close()
+
+
+class JobManager:
+    # initializer() runs once in every worker process, before its first job
+    def __init__(self, max_workers: int = 2, max_pending: int = 32, max_finished: int = 100,
+                 listener=None, max_jobs_per_worker: int = 0, initializer=None) -> None:
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.max_finished = max_finished
+        self.max_jobs_per_worker = max_jobs_per_worker
+        self._initializer = initializer
+        self._context = mp.get_context('spawn')
+        self._jobs = OrderedDict()
+        self._pending = deque()
+        self._running = []
+        self._workers = []
+        self._lock = threading.Lock()
+        # the dispatcher waits on the pipes of the workers and on this one, written to on a submission or a
+        # cancellation so that it starts or stops the job right away; _woken: a wakeup is written and not read yet
+        self._wakeup_conn, self._wakeup_sender = mp.Pipe(duplex=False)
+        self._woken = False
+        self._dispatcher = None
+        self._listener = listener
+
+    def submit(self, target, *args, finalize=None) -> Job:
+        job = Job(target, args, finalize)
+        with self._lock:
+            if len(self._pending) >= self.max_pending:
+                raise QueueFullError('too many pending jobs ({})'.format(len(self._pending)))
+            self._jobs[job.id] = job
+            self._pending.append(job)
+            self._forget_finished()
+            # the dispatcher is started on first use, so importing the app never forks anything
+            self._start_dispatcher()
+            self._wake()
+        return job
+
+    # starts all max_workers workers ahead of the first job, so that it finds them initialized
+    def start_workers(self) -> None:
+        with self._lock:
+            self._start_dispatcher()
+            while len(self._workers) < self.max_workers:
+                self._add_worker()
+
+    # records a job whose result is already known, e.g. from a cache, without starting a process
+    def add_finished(self, result) -> Job:
+        job = Job(None, ())
+        job.result, job.status = result, FINISHED
+        job.started_at = job.finished_at = job.created_at
+        with self._lock:
+            self._jobs[job.id] = job
+            self._forget_finished()
+        return job
+
+    def get(self, job_id: str) -> Job:
+        return self._jobs.get(job_id)
+
+    def cancel(self, job_id: str) -> Job:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job.status not in (PENDING, RUNNING):
+                return job
+            if job.status == PENDING:
+                self._pending.remove(job)
+            # a running job is terminated by the dispatcher, which owns the workers and their pipes
+            job.status = CANCELLED
+            job.finished_at = time.time()
+            self._wake()
+        self._notify(job, 'status')
+        return job
+
+    # stops the workers, the running jobs with them, called when the server exits
+    def shutdown(self) -> None:
+        with self._lock:
+            for worker in self._workers:
+                worker.stop(terminate=worker.job is not None)
+            self._workers = []
+
+    # listeners are called without holding the lock, so that they can read the jobs
+    def _notify(self, job: Job, event: str) -> None:
+        if self._listener is not None:
+            self._listener(job, event)
+
+    # called holding the lock
+    def _wake(self) -> None:
+        if not self._woken:
+            self._woken = True
+            self._wakeup_sender.send_bytes(b'')
+
+    def _forget_finished(self) -> None:
+        finished = [job_id for job_id, job in self._jobs.items() if job.finished_at is not None]
+        for job_id in finished[:max(0, len(finished) - self.max_finished)]:
+            del self._jobs[job_id]
+
+    def _start_dispatcher(self) -> None:
+        if self._dispatcher is None:
+            self._dispatcher = threading.Thread(target=self._dispatch, daemon=True)
+            self._dispatcher.start()
+            # the workers are not daemons (an overview starts processes of its own), they are stopped explicitly
+            atexit.register(self.shutdown)
+
+    def _add_worker(self) -> Worker:
+        worker = Worker(self._context, self._initializer, self.max_jobs_per_worker)
+        self._workers.append(worker)
+        return worker
+
+    # whether a job can start now, on an idle worker or a new one
+    def _can_start(self) -> bool:
+        return any(worker.job is None for worker in self._workers) or len(self._workers) < self.max_workers
+
+    def _start(self, job: Job) -> None:
+        idle = [worker for worker in self._workers if worker.job is None]
+        worker = idle[0] if idle else self._add_worker()
+        worker.run(job)
+        job.worker = worker
+        job.status = RUNNING
+        job.started_at = time.time()
+        self._running.append(job)
+
+    def _stop(self, job: Job) -> None:
+        worker = job.worker
+        worker.job = None
+        self._running.remove(job)
+        # a cancelled job is terminated with its worker, a worker that died or ran its last job is replaced
+        if job.status == CANCELLED or worker.exhausted or not worker.process.is_alive():
+            worker.stop(terminate=job.status == CANCELLED)
+            self._workers.remove(worker)
+
+    def _receive(self, job: Job) -> None:
+        try:
+            kind, value = job.worker.conn.recv()
+        except EOFError:
+            job.worker.process.join()
+            kind, value = 'error', 'job process exited with code {}'.format(job.worker.process.exitcode)
+        with self._lock:
+            if job.status != RUNNING:
+                return
+            if kind == 'progress':
+                job.progress = value
+            elif kind == 'result':
+                self._finish(job, value)
+            else:
+                job.error, job.status = value, FAILED
+            if kind != 'progress':
+                job.finished_at = time.time()
+        self._notify(job, 'progress' if kind == 'progress' else 'status')
+
+    # a finalize() that raises fails the job, not the dispatcher
+    def _finish(self, job: Job, result) -> None:
+        try:
+            job.result = job.finalize(result) if job.finalize else result
+        except Exception as e:
+            job.error, job.status = 'finalize failed: {}: {}'.format(type(e).__name__, e), FAILED
+        else:
+            job.status = FINISHED
+
+    def _dispatch(self) -> None:
+        while True:
+            with self._lock:
+                if self._wakeup_conn.poll():
+                    self._wakeup_conn.recv_bytes()
+                    self._woken = False
+                for job in [job for job in self._running if job.status != RUNNING]:
+                    self._stop(job)
+                started = []
+                while self._pending and self._can_start():
+                    started.append(self._pending.popleft())
+                    self._start(started[-1])
+                running = list(self._running)
+            for job in started:
+                self._notify(job, 'status')
+            # no timeout, a new submission or a cancellation writes to the wakeup pipe
+            for conn in wait([self._wakeup_conn] + [job.worker.conn for job in running]):
+                if conn is not self._wakeup_conn:
+                    self._receive(next(job for job in running if job.worker.conn is conn))
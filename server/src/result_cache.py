@@ -0,0 +1,122 @@
+from algorithms.traces import trace_fingerprint, trace_path
+from collections import OrderedDict
+import hashlib
+import json
+import os
+import threading
+
+'''
+    Memoization of algorithm results.
+    * With a fixed random_seed, the result of an algorithm is a pure function of its query arguments,
+      so results are stored under a hash of the algorithm name and the normalized arguments.
+      A trace is identified by its file (see trace_fingerprint()), not only by its name, so the results of a trace
+      uploaded again under the same name are not mistaken for those of the old one.
+    * Entries live in an in-memory LRU and, when a directory is given, also as JSON files on disk,
+      so they survive restarts and are shared between server processes.
+'''
+
+# arguments that do not change the result
+IGNORED_ARGS = ('verbose',)
+
+
+def normalize_value(value: str) -> str:
+    # '0.50' and '0.5' are the same parameter value, '15' and '15.0' are not since the algorithms parse ints with int()
+    value = value.strip()
+    for parse in (int, float):
+        try:
+            return repr(parse(value))
+        except ValueError:
+            pass
+    return value
+
+
+# the fingerprint of the trace named name, the name itself when there is no such trace (the run fails then)
+def trace_key(name: str):
+    try:
+        path = trace_path(name)
+    except ValueError:
+        return name
+    return trace_fingerprint(path) if os.path.isfile(path) else name
+
+
+class ResultCache:
+    def __init__(self, max_entries: int = 64, cache_dir: str = None) -> None:
+        self.max_entries = max_entries
+        self.cache_dir = cache_dir
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        if self.cache_dir:
+            os.makedirs(self.cache_dir, exist_ok=True)
+
+    @staticmethod
+    def make_key(algorithm: str, args: dict) -> str:
+        params = {key: normalize_value(value) for key, value in args.items() if key not in IGNORED_ARGS}
+        if args.get('trace'):
+            params['trace'] = trace_key(args['trace'])
+        payload = json.dumps(params, sort_keys=True)
+        # the algorithm name stays readable so that entries can be invalidated per algorithm
+        return '{}-{}'.format(algorithm, hashlib.sha256(payload.encode('utf-8')).hexdigest())
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key + '.json')
+
+    def get(self, key: str):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+        if self.cache_dir and os.path.exists(self._path(key)):
+            with open(self._path(key)) as f:
+                value = json.load(f)
+            with self._lock:
+                self.hits += 1
+                self.disk_hits += 1
+                self._remember(key, value)
+            return value
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, key: str, value) -> None:
+        with self._lock:
+            self._remember(key, value)
+        if self.cache_dir:
+            tmp_path = self._path(key) + '.tmp{}'.format(os.getpid())
+            with open(tmp_path, 'w') as f:
+                json.dump(value, f)
+            os.replace(tmp_path, self._path(key))
+
+    def _remember(self, key: str, value) -> None:
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    # drops every entry, or only the entries of one algorithm, returns how many were removed from either tier
+    def invalidate(self, algorithm: str = None) -> int:
+        prefix = '' if algorithm is None else algorithm + '-'
+        with self._lock:
+            keys = {key for key in self._entries if key.startswith(prefix)}
+            for key in keys:
+                del self._entries[key]
+        if self.cache_dir:
+            for name in os.listdir(self.cache_dir):
+                if name.startswith(prefix) and name.endswith('.json'):
+                    os.remove(os.path.join(self.cache_dir, name))
+                    keys.add(name[:-len('.json')])
+        return len(keys)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'cache_dir': self.cache_dir,
+                'hits': self.hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+            }
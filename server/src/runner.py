@@ -0,0 +1,154 @@
+from algorithms.base import BaseRLAlgorithm
+from algorithms.metrics import SeedStatistics
+from algorithms.registry import AlgorithmRegistry
+from algorithms.warm_models import warm_models
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, as_completed, wait
+import inspect
+import multiprocessing as mp
+import numpy as np
+import os
+import random
+
+
+# names of the parameters the constructor of algorithm takes
+def algorithm_params(algorithm) -> set:
+    params = set()
+    # a constructor taking **kwargs passes them on to the one of its base class
+    for cls in algorithm.__mro__:
+        if '__init__' not in vars(cls):
+            continue
+        signature = list(inspect.signature(cls.__init__).parameters.values())[1:]
+        params.update(param.name for param in signature if param.kind in (param.POSITIONAL_OR_KEYWORD, param.KEYWORD_ONLY))
+        if not any(param.kind == param.VAR_KEYWORD for param in signature):
+            break
+    return params
+
+
+MULTI_ENV_PARAMS = ('n_envs', 'vec_env')
+DQN_PARAMS = ('batch_size', 'replay_start', 'action_bins', 'target_update', 'double_dqn', 'exploration_fraction')
+
+# the algorithm classes are imported on first use, see algorithms/registry.py, with the parameters they take
+# besides those of BaseRLAlgorithm (the environment, random_seed, trace, train_time_slots, ...)
+ALGORITHM_MP = AlgorithmRegistry({
+    'PPO': ('algorithms.ppo2:PPO2Algorithm', MULTI_ENV_PARAMS),
+    'DQN': ('algorithms.dqn:DQNAlgorithm', DQN_PARAMS),
+    'A2C': ('algorithms.a2c:A2CAlgorithm', MULTI_ENV_PARAMS),
+    'SAC': ('algorithms.sac:SACAlgorithm', ()),
+    'TRPO': ('algorithms.trpo:TRPOAlgorithm', ()),
+    'FIXED': ('algorithms.baselines:FixedPowerAlgorithm', ('fixed_power',)),
+    'MYOPIC': ('algorithms.baselines:MyopicAlgorithm', ('memo_levels',)),
+}, common_params=algorithm_params(BaseRLAlgorithm))
+
+# upper bound on the processes the overview uses to train its algorithms side by side
+OVERVIEW_MAX_WORKERS = int(os.environ.get('OVERVIEW_MAX_WORKERS', os.cpu_count() or 1))
+# upper bound on the processes run_seeds() trains the seeds of an algorithm in
+SEEDS_MAX_WORKERS = int(os.environ.get('SEEDS_MAX_WORKERS', os.cpu_count() or 1))
+
+
+# runs once in every worker process of the job manager (jobs.py): imports the algorithms, and TensorFlow with them,
+# before the first job arrives and lets them keep their models between jobs, see algorithms/warm_models.py
+def init_worker() -> None:
+    warm_models.enabled = True
+    for name in ALGORITHM_MP:
+        try:
+            ALGORITHM_MP[name]
+        except ImportError:
+            # the job fails with the error, not the worker
+            pass
+
+
+def get_algorithm_args(name: str, args: dict) -> dict:
+    # the overview shares one query string between all algorithms, so only pass the parameters
+    # each algorithm accepts (e.g. n_envs is only understood by the algorithms that can use it)
+    params = ALGORITHM_MP.params(name)
+    return {key: value for key, value in args.items() if key in params}
+
+
+# report(progress) is called with a dict describing how far the run is, it is a no-op when not given
+def run_algorithm(name: str, args: dict, report=None) -> dict:
+    report = report or (lambda progress: None)
+    report({'stage': 'training', 'algorithm': name})
+    # the environments have their own generators, seeded by the algorithms, but the agents (e.g. DQN's
+    # exploration) draw from the global RNGs, seed them so that the result only depends on the arguments
+    seed = int(args.get('random_seed', 0))
+    random.seed(seed)
+    np.random.seed(seed)
+    # the algorithm reports its own training and evaluation progress, tagged with its name
+    algorithm = ALGORITHM_MP[name](**args, report=lambda progress: report(dict(progress, algorithm=name)))
+    report({'stage': 'evaluating', 'algorithm': name})
+    return algorithm.run()
+
+
+# ?seeds= is either a number of seeds, counting up from random_seed, or a comma-separated list of seeds
+def parse_seeds(seeds: str, random_seed: str = '0') -> list:
+    try:
+        if ',' not in seeds:
+            count = int(seeds)
+            if count < 1:
+                raise ValueError
+            return [str(int(random_seed) + i) for i in range(count)]
+        parsed = [str(int(seed)) for seed in seeds.split(',') if seed.strip()]
+        # a list of separators only, e.g. "seeds=,", names no seed
+        if not parsed:
+            raise ValueError
+        return parsed
+    except ValueError:
+        raise ValueError('seeds must be a positive number or a list of seeds, got {!r}'.format(seeds))
+
+
+# runs the algorithm once per seed and returns the mean of every series over the seeds with its 95% confidence
+# interval, see SeedStatistics, the results are combined as they come in and not kept
+def run_seeds(name: str, args: dict, seeds: list, report=None) -> dict:
+    report = report or (lambda progress: None)
+    statistics = SeedStatistics()
+    report({'stage': 'running', 'algorithm': name, 'done': 0, 'total': len(seeds)})
+    runs = [dict(args, random_seed=seed) for seed in seeds]
+    if len(runs) == 1 or not getattr(ALGORITHM_MP[name], 'trains', True):
+        # the baselines take milliseconds, a process per seed would cost more than it saves
+        for run_args in runs:
+            statistics.add(run_algorithm(name, run_args))
+            report({'stage': 'running', 'algorithm': name, 'done': statistics.count, 'total': len(seeds)})
+        return statistics.result()
+    # like the overview, every seed trains in its own process, a seed is only submitted when a worker is free
+    # so that no more results than workers are held (a finished future keeps its result)
+    workers = max(1, min(len(runs), SEEDS_MAX_WORKERS))
+    pending = set()
+    with ProcessPoolExecutor(max_workers=workers, mp_context=mp.get_context('spawn')) as executor:
+        while runs or pending:
+            while runs and len(pending) < workers:
+                pending.add(executor.submit(run_algorithm, name, runs.pop(0)))
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                statistics.add(future.result())
+                report({'stage': 'running', 'algorithm': name, 'done': statistics.count, 'total': len(seeds)})
+    return statistics.result()
+
+
+def run_overview(algo_names: list, args: dict, report=None) -> dict:
+    report = report or (lambda progress: None)
+    report({'stage': 'running', 'done': 0, 'total': len(algo_names)})
+    if len(algo_names) == 1:
+        name = algo_names[0]
+        return {name: run_algorithm(name, get_algorithm_args(name, args), report)}
+    results = {}
+    # the algorithms without training (the baselines) take milliseconds, they run right here,
+    # as does a single algorithm that trains
+    trained = [name for name in algo_names if getattr(ALGORITHM_MP[name], 'trains', True)]
+    inline = [name for name in algo_names if name not in trained or len(trained) == 1]
+    for name in inline:
+        results[name] = run_algorithm(name, get_algorithm_args(name, args))
+        report({'stage': 'running', 'algorithm': name, 'done': len(results), 'total': len(algo_names)})
+    pooled = [name for name in algo_names if name not in inline]
+    if pooled:
+        # every other algorithm trains in its own process, with its own TensorFlow graph and session,
+        # so the overview takes about as long as its slowest algorithm
+        workers = max(1, min(len(pooled), OVERVIEW_MAX_WORKERS))
+        with ProcessPoolExecutor(max_workers=workers, mp_context=mp.get_context('spawn')) as executor:
+            futures = {
+                executor.submit(run_algorithm, name, get_algorithm_args(name, args)): name
+                for name in pooled
+            }
+            for future in as_completed(futures):
+                results[futures[future]] = future.result()
+                report({'stage': 'running', 'algorithm': futures[future], 'done': len(results), 'total': len(algo_names)})
+    return {name: results[name] for name in algo_names}
@@ -0,0 +1,166 @@
+import base64
+import json
+import numpy as np
+
+try:
+    import pyarrow as pa
+except ImportError:  # Arrow responses are only available when pyarrow is installed
+    pa = None
+
+'''
+    Encodings of the algorithm results ({series name: list of floats}, or {algorithm: {...}} for the overview).
+    * json: the lists as JSON numbers, the default.
+    * base64: every series as {"dtype": "<f4", "length": n, "data": <base64 of the little-endian float32 values>},
+      about 5 bytes per value instead of ~20 and no float parsing in the browser.
+    * arrow: an Apache Arrow IPC stream with a float32 column per series ("<algorithm>.<series>" for the overview).
+    The format is chosen with the ?format= query parameter, or else from the Accept header.
+    With ?max_points=n the series are downsampled to at most n time slots, picked by LTTB (default)
+    or at a regular stride (?downsample=stride), and the chosen slots are returned in an "index" series.
+'''
+
+MEDIA_TYPES = {
+    'json': 'application/json',
+    'base64': 'application/vnd.float32-base64+json',
+    'arrow': 'application/vnd.apache.arrow.stream',
+}
+DOWNSAMPLE_METHODS = ('lttb', 'stride')
+# the series the downsampled slots are chosen from, the other series take the same slots
+DOWNSAMPLE_SERIES = 'avg_total'
+
+
+class FormatError(ValueError):
+    pass
+
+
+class ResultFormat:
+    def __init__(self, format: str = 'json', max_points: int = None, downsample: str = 'lttb') -> None:
+        if format not in MEDIA_TYPES:
+            raise FormatError('format must be one of {}, got {!r}'.format(', '.join(MEDIA_TYPES), format))
+        if format == 'arrow' and pa is None:
+            raise FormatError('the arrow format needs pyarrow, which is not installed')
+        if max_points is not None and max_points < 2:
+            raise FormatError('max_points must be at least 2, got {}'.format(max_points))
+        if downsample not in DOWNSAMPLE_METHODS:
+            raise FormatError('downsample must be one of {}, got {!r}'.format(', '.join(DOWNSAMPLE_METHODS), downsample))
+        self.format = format
+        self.max_points = max_points
+        self.downsample = downsample
+
+    @property
+    def content_type(self) -> str:
+        if self.format == 'arrow':
+            return MEDIA_TYPES['arrow']
+        return MEDIA_TYPES[self.format] + '; charset=utf-8'
+
+    # removes the format parameters from the query arguments, the format defaults to the one the client accepts
+    @classmethod
+    def from_request(cls, args: dict, accept: str = '') -> 'ResultFormat':
+        format = args.pop('format', None)
+        if format is None:
+            format = next((name for name, media_type in MEDIA_TYPES.items()
+                           if name != 'json' and media_type in (accept or '')), 'json')
+        max_points = args.pop('max_points', None)
+        try:
+            max_points = int(max_points) if max_points else None
+        except ValueError:
+            raise FormatError('max_points must be an integer, got {!r}'.format(max_points))
+        return cls(format, max_points, args.pop('downsample', 'lttb'))
+
+    def apply(self, result: dict) -> dict:
+        # downsamples an algorithm result, or every algorithm of an overview result
+        if not is_series(result):
+            return {name: self.apply(value) for name, value in result.items()}
+        if self.max_points is None:
+            return {name: np.asarray(values, dtype=np.float64) for name, values in result.items()}
+        y = np.asarray(result[DOWNSAMPLE_SERIES], dtype=np.float64)
+        if self.downsample == 'lttb':
+            index = lttb_indices(y, self.max_points)
+        else:
+            index = stride_indices(len(y), self.max_points)
+        sampled = {name: np.asarray(values, dtype=np.float64)[index] for name, values in result.items()}
+        sampled['index'] = index
+        return sampled
+
+    # body of the response for an algorithm or overview result
+    def encode(self, result: dict) -> bytes:
+        sampled = self.apply(result)
+        if self.format == 'arrow':
+            return encode_arrow(sampled)
+        return json.dumps(to_json(sampled, self.format == 'base64')).encode('utf-8')
+
+    # JSON data of a job, its result is encoded like a result response, Arrow results are only
+    # available on their own so they are left out
+    def encode_job(self, job: dict) -> dict:
+        job = dict(job)
+        if self.format == 'arrow':
+            job.pop('result', None)
+        elif job.get('result') is not None:
+            job['result'] = to_json(self.apply(job['result']), self.format == 'base64')
+        return job
+
+
+def is_series(result: dict) -> bool:
+    return all(isinstance(value, (list, np.ndarray)) for value in result.values())
+
+
+def to_json(sampled: dict, binary: bool) -> dict:
+    if not is_series(sampled):
+        return {name: to_json(value, binary) for name, value in sampled.items()}
+    if not binary:
+        return {name: values.tolist() for name, values in sampled.items()}
+    encoded = {}
+    for name, values in sampled.items():
+        dtype = '<i4' if name == 'index' else '<f4'
+        encoded[name] = {
+            'dtype': dtype,
+            'length': len(values),
+            'data': base64.b64encode(np.ascontiguousarray(values, dtype=dtype).tobytes()).decode('ascii'),
+        }
+    return encoded
+
+
+def encode_arrow(sampled: dict) -> bytes:
+    if is_series(sampled):
+        columns = sampled
+    else:
+        # overview: one column per algorithm and series, all of them have time_slots (or max_points) rows
+        columns = {'{}.{}'.format(algorithm, name): values
+                   for algorithm, series in sampled.items() for name, values in series.items()}
+    table = pa.table({name: pa.array(values, type=pa.int32() if name.endswith('index') else pa.float32())
+                      for name, values in columns.items()})
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def stride_indices(n: int, max_points: int) -> np.ndarray:
+    if n <= max_points:
+        return np.arange(n)
+    # the first and the last slot are always kept
+    return np.unique(np.linspace(0, n - 1, max_points).round().astype(np.int64))
+
+
+# Largest-Triangle-Three-Buckets: keeps the first and the last point, and from each of the max_points - 2
+# buckets in between, the point forming the largest triangle with the previously kept point and the
+# average of the next bucket, so that peaks survive the downsampling
+def lttb_indices(y: np.ndarray, max_points: int) -> np.ndarray:
+    n = len(y)
+    if n <= max_points:
+        return np.arange(n)
+    if max_points < 3:
+        return stride_indices(n, max_points)
+    edges = np.linspace(1, n - 1, max_points - 1).astype(np.int64)
+    indices = np.empty(max_points, dtype=np.int64)
+    indices[0], indices[-1] = 0, n - 1
+    a = 0
+    for bucket in range(max_points - 2):
+        start, stop = edges[bucket], edges[bucket + 1]
+        next_stop = edges[bucket + 2] if bucket + 2 < len(edges) else n
+        avg_x = (stop + next_stop - 1) / 2
+        avg_y = y[stop:next_stop].mean()
+        x = np.arange(start, stop)
+        area = np.abs((a - avg_x) * (y[start:stop] - y[a]) - (a - x) * (avg_y - y[a]))
+        a = start + int(np.argmax(area))
+        indices[bucket + 1] = a
+    return indices
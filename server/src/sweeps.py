@@ -0,0 +1,323 @@
+from algorithms.gym_offload_autoscale.envs.offload_autoscale_env import OffloadAutoscaleEnv
+from algorithms.metrics import RunningAverages
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from result_cache import ResultCache
+from runner import ALGORITHM_MP, get_algorithm_args, init_worker, run_algorithm
+import hashlib
+import inspect
+import itertools
+import json
+import math
+import multiprocessing as mp
+import numpy as np
+import os
+import threading
+import time
+
+'''
+    Parameter sweeps: the runs of one algorithm at every point of a grid, or of a random search, over the environment
+    parameters and train_time_slots, each point once per seed, summarized per point.
+    * A sweep is described by a spec (see parse_spec()). Its id is a hash of the spec, so submitting the same spec
+      again continues the sweep instead of starting it over.
+    * The runs are spread over a process pool of max_workers warm workers (runner.init_worker()). Every finished run
+      is appended to <SWEEP_DIR>/<id>/results.jsonl right away, and the runs found there are skipped when the sweep
+      is continued, e.g. by resume() after a restart of the server. Failed runs are recorded and tried again then.
+    * summary() gives the mean and standard deviation over the seeds of the final time averages, per point.
+'''
+
+SWEEP_DIR = os.path.abspath(os.environ.get(
+    'SWEEP_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, 'sweeps')))
+
+# the parameters a sweep can vary, by their names in the query string: those of the environment and train_time_slots
+# note: random_seed is not a dimension of the space, every point runs with each of the seeds of the spec
+SWEEP_PARAMS = tuple(inspect.signature(OffloadAutoscaleEnv.__init__).parameters)[1:] + ('train_time_slots',)
+
+SEARCHES = ('grid', 'random')
+
+# final values of these time averages are recorded per run
+METRICS = RunningAverages.SERIES + ('avg_energy',)
+
+RUNNING = 'running'
+FINISHED = 'finished'
+CANCELLED = 'cancelled'
+
+
+# the query strings hold numbers the way the algorithms parse them, 15 and not 15.0 for integer parameters
+def to_param(value) -> str:
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+# the values of the parameter key in the space of a spec, a list of values or, for a random search, a range
+def parse_axis(key: str, values, search: str):
+    if isinstance(values, list) and values:
+        return [to_param(value) for value in values]
+    if isinstance(values, dict) and search == 'random' and 'low' in values and 'high' in values:
+        if values['low'] > values['high'] or (values.get('log') and values['low'] <= 0):
+            raise ValueError('invalid range of {}: {}'.format(key, values))
+        return {'low': values['low'], 'high': values['high'], 'log': bool(values.get('log'))}
+    raise ValueError('{} needs a list of values{}'.format(key, ' or a range' if search == 'random' else ''))
+
+
+# spec: {"algorithm": "PPO",
+#        "params": {<query arguments of the algorithm, those not in the space>},
+#        "search": "grid" (default) or "random",
+#        "space": {<parameter>: [values] or, for a random search, {"low": x, "high": y, "log": false}},
+#        "samples": <points of a random search>, "seed": <seed of the random search>,
+#        "random_seed": [<seeds every point runs with>, params["random_seed"] by default]}
+# returns the spec with the values as strings, raises ValueError when it is invalid
+def parse_spec(spec: dict) -> dict:
+    if not isinstance(spec, dict):
+        raise ValueError('the sweep spec must be a JSON object')
+    algorithm = spec.get('algorithm')
+    if algorithm not in ALGORITHM_MP:
+        raise ValueError('unknown algorithm: {}'.format(algorithm))
+    search = spec.get('search', 'grid')
+    if search not in SEARCHES:
+        raise ValueError('search must be one of {}, got {!r}'.format(', '.join(SEARCHES), search))
+    params = {key: to_param(value) for key, value in spec.get('params', {}).items()}
+    space = spec.get('space') or {}
+    unknown = [key for key in space if key not in SWEEP_PARAMS]
+    if unknown:
+        raise ValueError('{} can not be swept, the parameters are {}'.format(', '.join(unknown), ', '.join(SWEEP_PARAMS)))
+    parsed_space = {key: parse_axis(key, values, search) for key, values in space.items()}
+    seeds = spec.get('random_seed', [params.get('random_seed', '0')])
+    if not isinstance(seeds, list) or not seeds:
+        raise ValueError('random_seed must be a list of seeds')
+    parsed = {'algorithm': algorithm, 'params': params, 'search': search, 'space': parsed_space,
+              'random_seed': [to_param(seed) for seed in seeds]}
+    if search == 'random':
+        parsed['samples'] = int(spec.get('samples', 10))
+        parsed['seed'] = int(spec.get('seed', 0))
+        if parsed['samples'] < 1:
+            raise ValueError('samples must be positive')
+    return parsed
+
+
+def sweep_id(spec: dict) -> str:
+    return hashlib.sha256(json.dumps(spec, sort_keys=True).encode('utf-8')).hexdigest()[:16]
+
+
+# the points of a parsed spec, every one a dict of the swept parameters
+def sweep_points(spec: dict) -> list:
+    names = sorted(spec['space'])
+    if spec['search'] == 'grid':
+        return [dict(zip(names, values)) for values in itertools.product(*(spec['space'][name] for name in names))]
+    rng = np.random.RandomState(spec['seed'])
+    points = []
+    for _ in range(spec['samples']):
+        point = {}
+        for name in names:
+            values = spec['space'][name]
+            if isinstance(values, list):
+                point[name] = values[rng.randint(len(values))]
+                continue
+            low, high = values['low'], values['high']
+            value = math.exp(rng.uniform(math.log(low), math.log(high))) if values['log'] else rng.uniform(low, high)
+            # integer bounds draw integers
+            point[name] = to_param(int(round(value)) if isinstance(low, int) and isinstance(high, int) else value)
+        points.append(point)
+    return points
+
+
+# runs in the pool: the final time averages of one run, and how long it took
+def run_point(algorithm: str, args: dict) -> dict:
+    start = time.perf_counter()
+    result = run_algorithm(algorithm, get_algorithm_args(algorithm, args))
+    return {'metrics': {name: result[name][-1] for name in METRICS}, 'seconds': time.perf_counter() - start}
+
+
+class Sweep:
+    def __init__(self, spec: dict, directory: str) -> None:
+        self.spec = spec
+        self.id = sweep_id(spec)
+        self.directory = directory
+        self.points = sweep_points(spec)
+        self.total = len(self.points) * len(spec['random_seed'])
+        self.status = self.read_state().get('status', RUNNING)
+        self._lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def results_path(self) -> str:
+        return os.path.join(self.directory, 'results.jsonl')
+
+    def read_state(self) -> dict:
+        try:
+            with open(os.path.join(self.directory, 'state.json')) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+
+    def write_state(self) -> None:
+        with open(os.path.join(self.directory, 'state.json'), 'w') as f:
+            json.dump({'status': self.status}, f)
+
+    # (point index, seed, query arguments, key) of every run
+    def runs(self) -> list:
+        runs = []
+        for index, point in enumerate(self.points):
+            for seed in self.spec['random_seed']:
+                args = dict(self.spec['params'], **point, random_seed=seed)
+                runs.append((index, seed, args, ResultCache.make_key(self.spec['algorithm'], args)))
+        return runs
+
+    # the recorded runs, the last record of a run counts, a line cut off by a crash is skipped
+    def read_results(self) -> list:
+        rows = {}
+        try:
+            with open(self.results_path) as f:
+                for line in f:
+                    try:
+                        row = json.loads(line)
+                    except ValueError:
+                        continue
+                    rows[row['key']] = row
+        except FileNotFoundError:
+            pass
+        return list(rows.values())
+
+    # ends a line cut off by a crash, so that the next record starts on its own line
+    def end_partial_line(self) -> None:
+        try:
+            with open(self.results_path, 'rb+') as f:
+                if f.seek(0, os.SEEK_END):
+                    f.seek(-1, os.SEEK_END)
+                    if f.read(1) != b'\n':
+                        f.write(b'\n')
+        except FileNotFoundError:
+            pass
+
+    def append_result(self, row: dict) -> None:
+        with self._lock:
+            with open(self.results_path, 'a') as f:
+                f.write(json.dumps(row) + '\n')
+
+    def start(self, max_workers: int) -> None:
+        self.status = RUNNING
+        self.write_state()
+        self._thread = threading.Thread(target=self._run, args=(max_workers,), daemon=True)
+        self._thread.start()
+
+    @property
+    def alive(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def cancel(self) -> None:
+        if self.status == RUNNING:
+            self.status = CANCELLED
+            self.write_state()
+
+    def _run(self, max_workers: int) -> None:
+        self.end_partial_line()
+        done = {row['key'] for row in self.read_results() if 'error' not in row}
+        todo = [run for run in self.runs() if run[3] not in done]
+        if todo:
+            workers = max(1, min(len(todo), max_workers))
+            with ProcessPoolExecutor(max_workers=workers, mp_context=mp.get_context('spawn'),
+                                     initializer=init_worker) as executor:
+                futures = {executor.submit(run_point, self.spec['algorithm'], args): (index, seed, args, key)
+                           for index, seed, args, key in todo}
+                dropped = False
+                for future in as_completed(futures):
+                    # a run dropped on cancellation has no result
+                    if future.cancelled():
+                        continue
+                    index, seed, args, key = futures[future]
+                    row = {'key': key, 'point': index, 'params': self.points[index], 'random_seed': seed}
+                    try:
+                        row.update(future.result())
+                    except Exception as e:
+                        row['error'] = '{}: {}'.format(type(e).__name__, e)
+                    self.append_result(row)
+                    # the runs already started finish and are recorded like the others, those not started are dropped
+                    if self.status == CANCELLED and not dropped:
+                        for pending in futures:
+                            pending.cancel()
+                        dropped = True
+        if self.status == RUNNING:
+            self.status = FINISHED
+            self.write_state()
+
+    # mean and standard deviation over the seeds of every metric, per point
+    def summary(self) -> list:
+        rows = self.read_results()
+        summary = []
+        for index, point in enumerate(self.points):
+            runs = [row for row in rows if row['point'] == index]
+            metrics = [row['metrics'] for row in runs if 'error' not in row]
+            entry = {'point': index, 'params': point, 'runs': len(metrics), 'errors': len(runs) - len(metrics)}
+            if metrics:
+                values = {name: np.array([run[name] for run in metrics]) for name in METRICS}
+                entry['mean'] = {name: float(np.mean(value)) for name, value in values.items()}
+                entry['std'] = {name: float(np.std(value, ddof=1)) if len(value) > 1 else 0.0 for name, value in values.items()}
+            summary.append(entry)
+        return summary
+
+    def to_dict(self) -> dict:
+        rows = self.read_results()
+        return {
+            'id': self.id,
+            'algorithm': self.spec['algorithm'],
+            'search': self.spec['search'],
+            'status': self.status,
+            'points': len(self.points),
+            'total': self.total,
+            'done': sum('error' not in row for row in rows),
+            'errors': sum('error' in row for row in rows),
+        }
+
+
+class SweepManager:
+    def __init__(self, sweep_dir: str = SWEEP_DIR, max_workers: int = os.cpu_count() or 1) -> None:
+        self.sweep_dir = sweep_dir
+        self.max_workers = max_workers
+        self._sweeps = {}
+        self._lock = threading.Lock()
+
+    # starts the sweep of spec, or continues it when it was submitted before, raises ValueError for invalid specs
+    def submit(self, spec: dict) -> Sweep:
+        spec = parse_spec(spec)
+        directory = os.path.join(self.sweep_dir, sweep_id(spec))
+        os.makedirs(directory, exist_ok=True)
+        with open(os.path.join(directory, 'spec.json'), 'w') as f:
+            json.dump(spec, f)
+        with self._lock:
+            sweep = self._sweeps.get(sweep_id(spec)) or Sweep(spec, directory)
+            self._sweeps[sweep.id] = sweep
+            if not sweep.alive:
+                sweep.start(self.max_workers)
+        return sweep
+
+    # the sweep, also one of an earlier server process found in sweep_dir
+    def get(self, sweep_id: str) -> Sweep:
+        with self._lock:
+            if sweep_id not in self._sweeps:
+                path = os.path.join(self.sweep_dir, os.path.basename(sweep_id), 'spec.json')
+                if not os.path.isfile(path):
+                    return None
+                with open(path) as f:
+                    self._sweeps[sweep_id] = Sweep(json.load(f), os.path.dirname(path))
+            return self._sweeps[sweep_id]
+
+    def list(self) -> list:
+        ids = os.listdir(self.sweep_dir) if os.path.isdir(self.sweep_dir) else []
+        sweeps = [self.get(sweep_id) for sweep_id in sorted(ids)]
+        return [sweep.to_dict() for sweep in sweeps if sweep is not None]
+
+    def cancel(self, sweep_id: str) -> Sweep:
+        sweep = self.get(sweep_id)
+        if sweep is not None:
+            sweep.cancel()
+        return sweep
+
+    # continues the sweeps left running by an earlier server process
+    def resume(self) -> list:
+        resumed = []
+        for info in self.list():
+            sweep = self.get(info['id'])
+            if sweep.status == RUNNING and not sweep.alive:
+                sweep.start(self.max_workers)
+                resumed.append(sweep.id)
+        return resumed
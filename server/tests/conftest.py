@@ -0,0 +1,5 @@
+import os
+import sys
+
+# the server modules import each other from src/, as when the server runs from there
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, 'src'))
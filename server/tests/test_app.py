@@ -0,0 +1,40 @@
+import pytest
+
+pytest.importorskip('flask_socketio')
+from app import app, result_key  # noqa: E402
+
+# query parameters of a short run with the defaults of the UI
+ALGORITHM_ARGS = dict(time_slots='96', p_coeff='0.5', timeslot_duration='15', max_number_of_server='15',
+                      server_service_rate='20', d_sta='300', coef_dyn='0.5', server_power_consumption='150',
+                      batery_capacity='2000', lamda_high='100', lamda_low='20', h_high='0.06', h_low='0.02',
+                      back_up_cost_coef='0.15', normalized_unit_depreciation_cost='0.01',
+                      time_steps_per_episode='96', train_time_slots='2000', random_seed='1234')
+
+
+@pytest.fixture
+def client():
+    return app.test_client()
+
+
+# the baselines run without stable_baselines or Keras, invalid arguments are reported like the jobs endpoints do
+@pytest.mark.parametrize('invalid', [{'trace': 'no-such-trace'}, {'fixed_power': 'many'}, {'max_number_of_server': 'x'}])
+def test_run_algorithm_rejects_invalid_arguments(client, invalid):
+    response = client.get('/run_algorithm/FIXED', query_string=dict(ALGORITHM_ARGS, **invalid))
+    assert response.status_code == 400
+    assert 'error' in response.get_json()
+
+
+def test_get_overview_rejects_invalid_arguments(client):
+    query = dict(ALGORITHM_ARGS, algo_names='FIXED,MYOPIC', trace='no-such-trace')
+    response = client.get('/get_overview', query_string=query)
+    assert response.status_code == 400
+    assert 'error' in response.get_json()
+
+
+# the results of trained algorithms depend on the training budget and the seed, so they are part of the cache key
+@pytest.mark.parametrize('name', ['PPO', 'DQN', 'A2C', 'SAC', 'TRPO'])
+@pytest.mark.parametrize('param, other', [('train_time_slots', '4000'), ('random_seed', '1')])
+def test_result_key_covers_training_budget_and_seed(name, param, other):
+    assert result_key(name, ALGORITHM_ARGS) != result_key(name, dict(ALGORITHM_ARGS, **{param: other}))
+    # arguments the algorithm does not take are left out
+    assert result_key(name, ALGORITHM_ARGS) == result_key(name, dict(ALGORITHM_ARGS, unknown='1'))
@@ -0,0 +1,33 @@
+import numpy as np
+import pytest
+
+pytest.importorskip('keras')
+from algorithms.dqn import DQNAlgorithm, DQNSolver  # noqa: E402
+
+
+def random_weights(model, rng: np.random.RandomState) -> list:
+    return [rng.normal(size=weights.shape) for weights in model.get_weights()]
+
+
+# with a target network whose weights differ from the online one, Double DQN scores the action the online network
+# picks with the target network, which is not the minimum over the target network's Q-values
+def test_double_dqn_target_differs_from_min_q():
+    rng = np.random.RandomState(0)
+    solver = DQNSolver(4, 5, target_update=10, double_dqn=True)
+    solver.model.set_weights(random_weights(solver.model, rng))
+    solver.target_model.set_weights(random_weights(solver.target_model, rng))
+    next_states = rng.uniform(size=(32, 4))
+
+    q_target = solver.target_model.predict_on_batch(next_states)
+    next_actions = np.argmin(solver.model.predict_on_batch(next_states), axis=1)
+    values = solver.next_state_values(next_states)
+    assert np.allclose(values, q_target[np.arange(len(next_states)), next_actions])
+    assert not np.allclose(values, np.amin(q_target, axis=1))
+
+    solver.double_dqn = False
+    assert np.allclose(solver.next_state_values(next_states), np.amin(q_target, axis=1))
+
+
+def test_double_dqn_needs_target_network():
+    with pytest.raises(ValueError):
+        DQNAlgorithm(double_dqn='true', target_update='0')
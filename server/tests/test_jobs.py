@@ -0,0 +1,30 @@
+import time
+from jobs import FAILED, FINISHED, JobManager
+
+
+def add(a, b, report):
+    report({'stage': 'adding'})
+    return a + b
+
+
+def fail_finalize(result):
+    raise RuntimeError('cache is full')
+
+
+def wait_for(job, timeout: float = 30):
+    deadline = time.time() + timeout
+    while job.status not in (FINISHED, FAILED) and time.time() < deadline:
+        time.sleep(0.01)
+    return job
+
+
+def test_failing_finalize_fails_the_job_only():
+    manager = JobManager(max_workers=1)
+    try:
+        failed = wait_for(manager.submit(add, 1, 2, finalize=fail_finalize))
+        assert failed.status == FAILED and 'cache is full' in failed.error
+        # the dispatcher keeps going
+        finished = wait_for(manager.submit(add, 3, 4, finalize=lambda result: result * 10))
+        assert finished.status == FINISHED and finished.result == 70
+    finally:
+        manager.shutdown()
@@ -0,0 +1,92 @@
+import itertools
+import math
+import numpy as np
+import pytest
+from algorithms.gym_offload_autoscale.envs.kernels import SCAN_MAX_SERVERS, scan_m_mu, search_m_mu, search_m_mu_rows
+from algorithms.gym_offload_autoscale.envs.offload_autoscale_env import OffloadAutoscaleEnv
+
+ENV_KWARGS = dict(p_coeff=0.5, timeslot_duration=0.25, max_number_of_server=15,
+                  server_service_rate=20, d_sta=300, coef_dyn=0.5,
+                  server_power_consumption=150, batery_capacity=2000,
+                  lamda_high=100, lamda_low=20, h_high=0.06, h_low=0.02,
+                  back_up_cost_coef=0.15, normalized_unit_depreciation_cost=0.01,
+                  time_steps_per_episode=96)
+
+
+# get_m_mu() as it was before it was vectorized: one check_constraints() and cost_function() call per m
+def legacy_get_m_mu(env: OffloadAutoscaleEnv, de_action) -> list:
+    lamd, _, h, _ = env.state
+    opt_val = math.inf
+    ans = [-1, -1]
+    for m in range(1, env.max_number_of_server + 1):
+        normalized_min_cov = env.lamda_low
+        mu = (de_action - env.server_power_consumption * m) * normalized_min_cov / env.server_power_consumption
+        if env.check_constraints(m, mu):
+            if env.cost_function(m, mu, h, lamd) < opt_val:
+                ans = [m, mu]
+                opt_val = env.cost_function(m, mu, h, lamd)
+    return ans
+
+
+# the de_a cal() passes to get_m_mu() for the action, None when cal() returns [0, 0] without calling it
+def de_action(env: OffloadAutoscaleEnv, action: float):
+    lamda, b, _, _ = env.state
+    if b <= env.get_dop() + env.server_power_consumption:
+        return None
+    high_bound = min(b - env.get_dop(), env.get_dcom(env.max_number_of_server, lamda))
+    return env.server_power_consumption + action * (high_bound - env.server_power_consumption)
+
+
+def make_env(servers: int) -> OffloadAutoscaleEnv:
+    env = OffloadAutoscaleEnv(**dict(ENV_KWARGS, max_number_of_server=servers))
+    env.reset()
+    env.mu = 0
+    return env
+
+
+# λ x b x h x action over the whole observation space, M up to SCAN_MAX_SERVERS where get_m_mu() scans every m
+@pytest.mark.parametrize('servers', [1, 2, 10, 15, 40, SCAN_MAX_SERVERS])
+def test_get_m_mu_matches_legacy_loop(servers):
+    env = make_env(servers)
+    grid = itertools.product(np.linspace(env.lamda_low, env.lamda_high, 9), np.linspace(0, env.b_high, 9),
+                             np.linspace(env.h_low, env.h_high, 5), np.linspace(0, 1, 11))
+    compared = 0
+    for lamda, b, h, action in grid:
+        env.state = np.array([lamda, b, h, 1.0])
+        value = de_action(env, action)
+        if value is None:
+            continue
+        m, mu = env.get_m_mu(value)
+        expected_m, expected_mu = legacy_get_m_mu(env, value)
+        # bit-identical, not approximately equal
+        assert (m, mu) == (expected_m, expected_mu), (lamda, b, h, action)
+        compared += 1
+    assert compared > 0
+
+
+# (κ, P, λ_low) of the default environment and of a few others, the search relies on their relation
+SEARCH_PARAMS = [(20, 150, 20), (1, 150, 20), (50, 10, 5), (3.5, 400, 0.5)]
+
+
+# random (de_a, λ, h) with de_a over the range cal() maps actions to, h = 0 included
+def random_m_mu_args(servers: int, params: tuple, count: int, seed: int) -> np.ndarray:
+    server_service_rate, server_power_consumption, lamda_low = params
+    rng = np.random.RandomState(seed)
+    lamda = rng.uniform(lamda_low, 5 * lamda_low, count)
+    high_bound = server_power_consumption * servers + server_power_consumption / lamda_low * lamda
+    de_action = server_power_consumption + rng.uniform(size=count) * (high_bound - server_power_consumption)
+    h = np.where(rng.uniform(size=count) < 0.1, 0, rng.uniform(0.02, 0.06, count))
+    return np.stack([de_action, lamda, h], axis=1)
+
+
+# above SCAN_MAX_SERVERS get_m_mu() searches, it must pick the pair the scan of every m picks
+@pytest.mark.parametrize('servers', [SCAN_MAX_SERVERS + 1, 200, 1000])
+@pytest.mark.parametrize('params', SEARCH_PARAMS)
+def test_search_m_mu_matches_scan(servers, params):
+    rows = random_m_mu_args(servers, params, 2000, servers)
+    for de_a, lamda, h in rows:
+        expected = scan_m_mu(de_a, lamda, h, servers, *params)
+        # bit-identical, not approximately equal
+        assert search_m_mu(de_a, lamda, h, servers, *params) == expected, (de_a, lamda, h)
+    m, mu = search_m_mu_rows(rows[:, 0].copy(), rows[:, 1].copy(), rows[:, 2].copy(), servers, *params)
+    assert list(zip(m.tolist(), mu.tolist())) == [search_m_mu(*row, servers, *params) for row in rows.tolist()]
@@ -0,0 +1,61 @@
+import numpy as np
+import pytest
+from algorithms.metrics import RunningAverages, SeedStatistics
+
+
+# the averages as run() computed them before RunningAverages: np.mean over the whole history at every slot
+def legacy_averages(costs: np.ndarray) -> dict:
+    lists = [[], [], [], []]
+    averages = [[], [], [], []]
+    energy = []
+    for values in costs:
+        for row, value in enumerate(values):
+            lists[row].append(value)
+            averages[row].append(np.mean(lists[row][:]))
+        energy.append(averages[2][-1] + averages[3][-1])
+    result = {name: [float(item) for item in averages[row]] for row, name in enumerate(RunningAverages.SERIES)}
+    result['avg_energy'] = [float(item) for item in energy]
+    return result
+
+
+# the same keys and lengths, and the same values up to the order of the summation (np.mean sums pairwise)
+@pytest.mark.parametrize('slots', [1, 2, 1000])
+def test_running_averages_match_legacy_loop(slots):
+    costs = np.random.RandomState(slots).uniform(0, 10, (slots, 4))
+    averages = RunningAverages(slots)
+    for total, delay, backup, battery in costs.tolist():
+        averages.add(total, delay, backup, battery)
+    result, expected = averages.result(), legacy_averages(costs)
+    assert list(result) == list(expected)
+    for name in expected:
+        assert len(result[name]) == slots
+        np.testing.assert_allclose(result[name], expected[name], rtol=1e-12, atol=0)
+    # the slots not reported yet, as the evaluation progress sends them
+    window = averages.result(slots // 2)
+    assert all(window[name] == result[name][slots // 2:] for name in result)
+
+
+def test_running_averages_full():
+    averages = RunningAverages(1)
+    averages.add(1, 1, 0, 0)
+    with pytest.raises(IndexError):
+        averages.add(1, 1, 0, 0)
+
+
+# Welford's running mean and variance against NumPy, and the half-width of the band against Student's t
+@pytest.mark.parametrize('seeds', [1, 2, 3, 10])
+def test_seed_statistics(seeds):
+    t = pytest.importorskip('scipy.stats').t
+    runs = np.random.RandomState(seeds).uniform(0, 10, (seeds, 2, 50))
+    statistics = SeedStatistics()
+    for avg_total, avg_delay in runs:
+        statistics.add({'avg_total': avg_total.tolist(), 'avg_delay': avg_delay.tolist()})
+    result = statistics.result()
+    assert statistics.count == seeds
+    for row, name in enumerate(('avg_total', 'avg_delay')):
+        mean = runs[:, row].mean(axis=0)
+        np.testing.assert_allclose(result[name], mean, rtol=1e-12)
+        # a single run has no spread, its band is the mean itself
+        half_width = 0 if seeds == 1 else t.ppf(0.975, seeds - 1) * runs[:, row].std(axis=0, ddof=1) / np.sqrt(seeds)
+        np.testing.assert_allclose(result[name + '_ci_low'], mean - half_width, rtol=1e-9)
+        np.testing.assert_allclose(result[name + '_ci_high'], mean + half_width, rtol=1e-9)
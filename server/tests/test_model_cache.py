@@ -0,0 +1,28 @@
+import os
+import pytest
+from algorithms.model_cache import ModelCache
+
+
+def write_model(path: str) -> None:
+    with open(os.path.join(path, 'weights'), 'w') as f:
+        f.write('weights')
+
+
+def test_save_and_load(tmp_path):
+    cache = ModelCache(str(tmp_path), 1 << 20)
+    cache.save('key', write_model)
+    assert os.listdir(cache.load('key')) == ['weights']
+    assert cache.load('other') is None
+    assert os.listdir(str(tmp_path)) == ['key']
+
+
+# a save that fails, e.g. on a full disk, leaves no temporary directory behind
+def test_failed_save_leaves_nothing(tmp_path):
+    def fail(path: str) -> None:
+        write_model(path)
+        raise OSError('No space left on device')
+    cache = ModelCache(str(tmp_path), 1 << 20)
+    with pytest.raises(OSError):
+        cache.save('key', fail)
+    assert os.listdir(str(tmp_path)) == []
+    assert cache.load('key') is None
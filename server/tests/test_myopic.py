@@ -0,0 +1,50 @@
+import math
+import numpy as np
+import pytest
+from scipy.optimize import minimize_scalar
+from algorithms.gym_offload_autoscale.envs.offload_autoscale_env import OffloadAutoscaleEnv
+from test_m_mu import ENV_KWARGS
+
+# largest difference to the SciPy action allowed, as checked by benchmarks/myopic.py
+TOLERANCE = 1e-4
+
+
+# myopic_action_cal() as it was before the analytic minimizer: one bounded SciPy search per m,
+# returns the action and the minimal cost
+def scipy_myopic(env: OffloadAutoscaleEnv):
+    lamda, b, h, _ = env.state
+    d_op = env.get_dop()
+    if b <= d_op + env.server_power_consumption:
+        return 0, None
+    ans = math.inf
+    for m in range(1, env.max_number_of_server):
+        def f(mu, m, h, lamda):
+            return (1 - env.priority_coefficent) * (mu/(m*env.server_service_rate-mu)+h*(lamda - mu)) + env.priority_coefficent * (env.normalized_unit_depreciation_cost*(env.server_power_consumption*m+env.server_power_consumption/env.lamda_low*mu))
+        res = minimize_scalar(f, bounds=(0, np.minimum(lamda, m*env.server_service_rate)), args=(m, h, lamda), method='bounded')
+        if res.fun < ans:
+            ans = res.fun
+            params = [m, res.x]
+    d_com = env.server_power_consumption*params[0]+env.server_power_consumption/env.lamda_low*params[1]
+    return env.fixed_action_cal(d_com), ans
+
+
+# random states within the observation space, fewer for large M where SciPy searches M times per state
+@pytest.mark.parametrize('servers, states', [(2, 200), (15, 200), (200, 20), (1000, 5)])
+def test_myopic_action_matches_scipy(servers, states):
+    env = OffloadAutoscaleEnv(**dict(ENV_KWARGS, max_number_of_server=servers))
+    env.reset()
+    rng = np.random.RandomState(servers)
+    compared = 0
+    for state in rng.uniform(env.observation_space.low, env.observation_space.high, (states, 4)):
+        state[3] = round(state[3])
+        env.state = state
+        action, cost = scipy_myopic(env)
+        m = env.server_candidates[:-1]
+        lamda, _, h, _ = state
+        analytic_cost = np.min(env.myopic_cost(m, env.myopic_mu(m, lamda, h), lamda, h))
+        # two m with the same minimal cost, within the SciPy tolerance, may pick different actions
+        if cost is not None and abs(action - env.myopic_action_cal()) > TOLERANCE and abs(cost - analytic_cost) <= 1e-5 * abs(cost):
+            continue
+        assert abs(action - env.myopic_action_cal()) <= TOLERANCE, state
+        compared += 1
+    assert compared >= states * 0.9
@@ -0,0 +1,20 @@
+import pytest
+from runner import ALGORITHM_MP, algorithm_params
+
+
+# the parameters listed in the registry are those the constructors take, checked for every algorithm whose
+# backend (stable_baselines, Keras) is installed
+@pytest.mark.parametrize('name', list(ALGORITHM_MP))
+def test_registry_params_match_constructor(name):
+    try:
+        algorithm = ALGORITHM_MP[name]
+    except ImportError as e:
+        pytest.skip('{} is not installed'.format(e.name))
+    assert ALGORITHM_MP.params(name) == algorithm_params(algorithm)
+
+
+def test_params_import_nothing():
+    loaded = set(ALGORITHM_MP.loaded())
+    for name in ALGORITHM_MP:
+        ALGORITHM_MP.params(name)
+    assert set(ALGORITHM_MP.loaded()) == loaded
@@ -0,0 +1,37 @@
+import numpy as np
+from algorithms.gym_offload_autoscale.envs.offload_autoscale_env import RNG_BLOCK_SIZE, BlockSampler, OffloadAutoscaleEnv
+from test_m_mu import ENV_KWARGS
+
+
+def trajectory(env: OffloadAutoscaleEnv, actions: np.ndarray) -> np.ndarray:
+    env.reset()
+    rows = []
+    for action in actions:
+        state, reward, done, _ = env.step(action)
+        rows.append(np.concatenate([state, [reward, *env.render()]]))
+        if done:
+            env.reset()
+    return np.array(rows)
+
+
+# λ and h take a uniform draw each per step, so the uniform blocks are used up several times over
+def test_same_seed_same_trajectory_across_blocks():
+    steps = 3 * RNG_BLOCK_SIZE
+    actions = np.random.RandomState(0).uniform(size=steps)
+    first, second = OffloadAutoscaleEnv(**ENV_KWARGS), OffloadAutoscaleEnv(**ENV_KWARGS)
+    first.seed(42)
+    second.seed(42)
+    expected = trajectory(first, actions)
+    assert np.array_equal(trajectory(second, actions), expected)
+    # seeding again starts the same stream over
+    first.seed(42)
+    assert np.array_equal(trajectory(first, actions), expected)
+    second.seed(43)
+    assert not np.array_equal(trajectory(second, actions), expected)
+
+
+# the values handed out one at a time are the generator's stream, wherever the blocks start
+def test_block_sampler_follows_generator_stream():
+    draws = BlockSampler(np.random.default_rng(7).random, block_size=RNG_BLOCK_SIZE)
+    values = [draws() for _ in range(2 * RNG_BLOCK_SIZE + 10)]
+    assert values == np.random.default_rng(7).random(2 * RNG_BLOCK_SIZE + 10).tolist()
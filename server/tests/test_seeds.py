@@ -0,0 +1,14 @@
+import pytest
+from runner import parse_seeds
+
+
+@pytest.mark.parametrize('seeds, expected', [('3', ['5', '6', '7']), ('1,4', ['1', '4']), ('2,', ['2'])])
+def test_parse_seeds(seeds, expected):
+    assert parse_seeds(seeds, '5') == expected
+
+
+# every one of them is answered with 400 by the endpoints
+@pytest.mark.parametrize('seeds', ['0', '-1', 'a', ',', ' , ,', '1,a'])
+def test_parse_seeds_rejects(seeds):
+    with pytest.raises(ValueError):
+        parse_seeds(seeds)
@@ -0,0 +1,80 @@
+import base64
+import json
+import numpy as np
+import pytest
+from serialization import ResultFormat, lttb_indices, stride_indices
+
+
+def random_result(slots: int, seed: int = 0) -> dict:
+    rng = np.random.RandomState(seed)
+    return {name: rng.uniform(0, 10, slots).tolist()
+            for name in ('avg_total', 'avg_delay', 'avg_backup', 'avg_battery', 'avg_energy')}
+
+
+def decode_base64(series: dict) -> np.ndarray:
+    values = np.frombuffer(base64.b64decode(series['data']), dtype=series['dtype'])
+    assert len(values) == series['length']
+    return values
+
+
+def test_json_round_trip():
+    result = random_result(100)
+    assert json.loads(ResultFormat('json').encode(result)) == result
+
+
+# float32 on the wire, so the values come back as their float32 rounding
+def test_base64_round_trip():
+    result = random_result(100)
+    decoded = json.loads(ResultFormat('base64').encode(result))
+    assert set(decoded) == set(result)
+    for name, values in result.items():
+        assert np.array_equal(decode_base64(decoded[name]), np.asarray(values, dtype=np.float32))
+
+
+def test_base64_overview_round_trip_with_index():
+    overview = {'FIXED': random_result(50, 1), 'MYOPIC': random_result(50, 2)}
+    decoded = json.loads(ResultFormat('base64', max_points=10).encode(overview))
+    for algorithm, result in overview.items():
+        index = decode_base64(decoded[algorithm]['index'])
+        assert index.dtype == np.int32 and len(index) == 10
+        for name, values in result.items():
+            assert np.array_equal(decode_base64(decoded[algorithm][name]), np.asarray(values, dtype=np.float32)[index])
+
+
+def test_arrow_round_trip():
+    pa = pytest.importorskip('pyarrow')
+    overview = {'FIXED': random_result(100, 1), 'MYOPIC': random_result(100, 2)}
+    table = pa.ipc.open_stream(ResultFormat('arrow').encode(overview)).read_all()
+    assert table.num_rows == 100
+    for algorithm, result in overview.items():
+        for name, values in result.items():
+            column = table.column('{}.{}'.format(algorithm, name)).to_numpy()
+            assert np.array_equal(column, np.asarray(values, dtype=np.float32))
+
+
+@pytest.mark.parametrize('method', [lttb_indices, lambda y, max_points: stride_indices(len(y), max_points)])
+@pytest.mark.parametrize('slots, max_points', [(1000, 2), (1000, 3), (1000, 100), (101, 100), (5000, 999)])
+def test_downsampling_keeps_ends_and_length(method, slots, max_points):
+    y = np.random.RandomState(slots).normal(size=slots).cumsum()
+    index = method(y, max_points)
+    assert len(index) == max_points
+    assert index[0] == 0 and index[-1] == slots - 1
+    assert np.all(np.diff(index) > 0)
+
+
+@pytest.mark.parametrize('method', [lttb_indices, lambda y, max_points: stride_indices(len(y), max_points)])
+@pytest.mark.parametrize('slots', [1, 50, 100])
+def test_downsampling_short_series_unchanged(method, slots):
+    y = np.random.RandomState(slots).uniform(size=slots)
+    assert np.array_equal(method(y, 100), np.arange(slots))
+    result = random_result(slots)
+    sampled = ResultFormat(max_points=100).apply(result)
+    assert all(np.array_equal(sampled[name], values) for name, values in result.items())
+
+
+# the point of LTTB: a single spike survives, a regular stride misses it
+def test_lttb_keeps_peaks():
+    y = np.zeros(10000)
+    y[4321] = 100
+    assert 4321 in lttb_indices(y, 50)
+    assert 4321 not in stride_indices(len(y), 50)
@@ -0,0 +1,65 @@
+import importlib.util
+import numpy as np
+import pytest
+from algorithms.gym_offload_autoscale.envs import kernels, offload_autoscale_env
+from algorithms.gym_offload_autoscale.envs.offload_autoscale_env import OffloadAutoscaleEnv
+from test_m_mu import ENV_KWARGS
+
+
+# step() as it was before step_kernel(): the transition functions called one by one
+def legacy_step(env: OffloadAutoscaleEnv, action):
+    done = False
+    action = float(action)
+    env.get_time()
+    env.time_step += 1
+    env.g = env.get_g()
+    env.d_op = env.get_dop()
+    m_mu = env.cal(action)
+    env.d_com = env.get_dcom(*m_mu)
+    env.d = env.d_op + env.d_com
+    reward = env.reward_func(action, m_mu)
+    lambda_t = env.get_lambda()
+    b_t = env.get_b()
+    h_t = env.get_h()
+    e_t = env.get_e()
+    env.state = np.array([lambda_t, b_t, h_t, e_t])
+    if env.time_step >= env.time_steps_per_episode:
+        done = True
+        env.episode += 1
+    return env.state, 1 / reward, done, {}
+
+
+# state, reward, time, m, μ and the cost elements after every step
+def trajectory(step, servers: int, actions: np.ndarray, seed: int) -> np.ndarray:
+    env = OffloadAutoscaleEnv(**dict(ENV_KWARGS, max_number_of_server=servers))
+    env.seed(seed)
+    env.reset()
+    rows = []
+    for action in actions:
+        state, reward, done, _ = step(env, action)
+        rows.append(np.concatenate([state, [reward, env.time, env.m, env.mu, env.d_op, env.d_com, env.d, *env.render()]]))
+        if done:
+            env.reset()
+    return np.array(rows)
+
+
+# a copy of kernels.py whose functions are not compiled, as without numba
+def python_kernels(monkeypatch):
+    numba = pytest.importorskip('numba')
+    monkeypatch.setattr(numba.config, 'DISABLE_JIT', True)
+    spec = importlib.util.spec_from_file_location('python_kernels', kernels.__file__)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+# the scan of every m up to SCAN_MAX_SERVERS and the search above, over several episodes
+@pytest.mark.parametrize('compiled', [True, False])
+@pytest.mark.parametrize('servers', [15, 200])
+def test_step_kernel_matches_legacy_step(monkeypatch, compiled, servers):
+    if not compiled:
+        monkeypatch.setattr(offload_autoscale_env, 'step_kernel', python_kernels(monkeypatch).step_kernel)
+    actions = np.random.RandomState(servers).uniform(size=1000)
+    expected = trajectory(legacy_step, servers, actions, seed=7)
+    # bit-identical, not approximately equal
+    assert np.array_equal(trajectory(OffloadAutoscaleEnv.step, servers, actions, seed=7), expected)
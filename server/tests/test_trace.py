@@ -0,0 +1,66 @@
+import numpy as np
+import pytest
+from algorithms.gym_offload_autoscale.envs.offload_autoscale_env import OffloadAutoscaleEnv
+from algorithms.gym_offload_autoscale.envs.trace import TraceReader
+from test_m_mu import ENV_KWARGS
+
+NAN = float('nan')
+
+# λ, h and g of every step, the first row is a gap, the others have a gap in one column
+ROWS = [[NAN, NAN, NAN],
+        [30.0, 0.03, 400.0],
+        [NAN, 0.05, 700.0],
+        [90.0, NAN, 200.0],
+        [50.0, 0.04, NAN]]
+
+
+@pytest.fixture
+def trace(tmp_path) -> str:
+    path = str(tmp_path / 'trace.npy')
+    np.save(path, np.array(ROWS))
+    return path
+
+
+def make_env(trace: str = None) -> OffloadAutoscaleEnv:
+    env = OffloadAutoscaleEnv(**dict(ENV_KWARGS, trace=trace))
+    env.seed(3)
+    env.reset()
+    return env
+
+
+# λ and h of the next state and g of every step
+def replay(env: OffloadAutoscaleEnv, steps: int) -> list:
+    rows = []
+    for _ in range(steps):
+        state = env.step(0.5)[0]
+        rows.append([state[0], state[2], env.g])
+    return rows
+
+
+def test_trace_replay(trace):
+    env = make_env(trace)
+    rows = replay(env, 2 * len(ROWS))
+    for step, (row, expected) in enumerate(zip(rows, ROWS + ROWS)):
+        for value, expected_value in zip(row, expected):
+            # the gaps are drawn, within the ranges of the transition functions
+            assert value == expected_value or (expected_value != expected_value and value == value), step
+    assert env.lamda_low <= rows[2][0] <= env.lamda_high and env.h_low <= rows[3][1] <= env.h_high
+    # seeding again replays the trace from its first slot, and draws the gaps the same way
+    env.seed(3)
+    env.reset()
+    assert replay(env, 2 * len(ROWS)) == rows
+
+
+# a slot the trace has no value for draws it from the environment's generator, as without a trace
+def test_trace_gaps_draw_like_without_trace(trace):
+    assert replay(make_env(trace), 1) == replay(make_env(), 1)
+
+
+# the rows are the same however many are read at once
+@pytest.mark.parametrize('block_size', [1, 2, 4096])
+def test_trace_reader_blocks(trace, block_size):
+    reader = TraceReader(trace, block_size=block_size)
+    rows = [reader() for _ in range(2 * len(ROWS) + 1)]
+    np.testing.assert_array_equal(rows, ROWS + ROWS + ROWS[:1])
+    reader.seek(3)
+    np.testing.assert_array_equal(reader(), ROWS[3])
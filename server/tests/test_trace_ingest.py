@@ -0,0 +1,66 @@
+import numpy as np
+import pandas as pd
+import pytest
+from algorithms import trace_ingest, traces
+from algorithms.gym_offload_autoscale.envs.trace import open_trace
+from algorithms.trace_ingest import SlotResampler, ingest_trace
+
+# midnight of a day, the first slot starts there
+DAY = 10 * 86400
+# samples every 5 minutes over 4 slots of 15 minutes
+SLOTS = 4
+SAMPLES_PER_SLOT = 3
+
+
+@pytest.fixture
+def source(tmp_path, monkeypatch) -> tuple:
+    monkeypatch.setattr(traces, 'TRACE_DIR', str(tmp_path / 'traces'))
+    rng = np.random.RandomState(0)
+    values = rng.uniform(1, 100, (SLOTS * SAMPLES_PER_SLOT, 3))
+    frame = pd.DataFrame({'time': DAY + 300 * np.arange(len(values)), 'arrivals': values[:, 0],
+                          'price': values[:, 1], 'solar': values[:, 2]})
+    path = str(tmp_path / 'source.csv')
+    frame.to_csv(path, index=False)
+    return path, values
+
+
+def ingest(path: str, **kwargs) -> dict:
+    return ingest_trace(path, 'ingested.npy', 15, 'time', {'lamda': 'arrivals', 'h': 'price', 'g': 'solar'},
+                        scales={'lamda': 0.5}, **kwargs)
+
+
+# row k of the trace holds λ and h of slot k + 1 and g of slot k, see TraceWriter
+def expected_trace(values: np.ndarray) -> np.ndarray:
+    slots = values.reshape(SLOTS, SAMPLES_PER_SLOT, 3).mean(axis=1) * [0.5, 1, 1]
+    return np.column_stack([slots[1:, 0], slots[1:, 1], slots[:-1, 2]])
+
+
+# the same trace whether the file is read in one chunk or in chunks that split the slots
+@pytest.mark.parametrize('chunk_rows', [1 << 18, 5, 1])
+def test_ingest_csv(source, monkeypatch, chunk_rows):
+    monkeypatch.setattr(trace_ingest, 'CHUNK_ROWS', chunk_rows)
+    path, values = source
+    info = ingest(path)
+    assert info['slots'] == SLOTS - 1 and info['start'] == DAY and info['samples'] == len(values)
+    trace_file = traces.resolve_trace('ingested.npy', 0.25)
+    np.testing.assert_allclose(open_trace(trace_file), expected_trace(values), rtol=1e-12)
+    assert traces.trace_info(trace_file)['timeslot_duration'] == 15
+    # a trace resampled to 15 minute slots is refused by environments with other slots
+    with pytest.raises(ValueError):
+        traces.resolve_trace('ingested.npy', 0.5)
+
+
+# slots without samples keep the previous value for up to max_fill minutes, then they are gaps (NaN)
+@pytest.mark.parametrize('max_fill, expected', [(0, [1, np.nan, np.nan, 4]), (15, [1, 1, np.nan, 4]),
+                                                (60, [1, 1, 1, 4])])
+def test_slot_resampler_fill(max_fill, expected):
+    resampler = SlotResampler(900, DAY, 1, max_fill * 60 // 900)
+    times = DAY + 900 * np.array([0, 0.5, 3])
+    rows = np.concatenate([resampler.add(times, np.array([[0.5], [1.5], [4.0]])), resampler.finish()])
+    np.testing.assert_array_equal(rows[:, 0], expected)
+
+
+def test_slot_resampler_rejects_unsorted():
+    resampler = SlotResampler(900, DAY, 1, 0)
+    with pytest.raises(ValueError):
+        resampler.add(DAY + 900 * np.array([2, 1]), np.ones((2, 1)))
@@ -1,5 +1,5 @@
 const algorithms = {
-    algorithmNames: ['PPO', 'DQN', 'A2C', 'SAC', 'TRPO'],
+    algorithmNames: ['PPO', 'DQN', 'A2C', 'SAC', 'TRPO', 'FIXED', 'MYOPIC'],
     algoParams: ['Training time slots', 'Verbose', 'Random seed'],
     envParams: [
         'Time slots',
@@ -9,7 +9,7 @@ const algorithms = {
         'Network congestion (k)', 'Back up power coefficient (φ)',
         'Battery depreciation coefficient (ω)', 'Base station static power',
         'Dynamic power coefficient', 'Server power consumption',
-        'Time steps per episode'
+        'Time steps per episode', 'Scenario trace'
     ],
     algoMapping: {
         'Training time slots': 'train_time_slots',
@@ -31,6 +31,7 @@ const algorithms = {
         'Dynamic power coefficient': 'coef_dyn',
         'Server power consumption': 'server_power_consumption',
         'Time steps per episode': 'time_steps_per_episode',
+        'Scenario trace': 'trace',
     },
     paramDescription: {
         'Training time slots': 'Total time slots used for training model',
@@ -50,6 +51,7 @@ const algorithms = {
         'Dynamic power coefficient': 'Dynamic power coefficient (this is our own proposal)',
         'Server power consumption': 'Power consumption of server (W)',
         'Time steps per episode': 'Total time steps of each episode',
+        'Scenario trace': 'Replay workload, network congestion and green energy from an uploaded trace (CSV or Parquet) instead of drawing them',
     }
   };
 
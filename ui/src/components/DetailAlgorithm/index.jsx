@@ -3,7 +3,7 @@ import DropdownList from 'react-widgets/DropdownList';
 import { algorithms } from './algorithms';
 import ParamRenderer from './paramRenderer';
 import ResultRenderer from './resultRenderer';
-import APIS from '../../services/common';
+import APIS, { followJob, abortJob } from '../../services/common';
 import 'react-widgets/scss/styles.scss';
 import './styles.scss';
 
@@ -20,27 +20,77 @@ function useAlgoParams(initParams) {
 }
 
 
+function toResult(data) {
+    return {
+        'avgTotal': data['avg_total'],
+        'avgDelay': data['avg_delay'],
+        'avgEnergy': data['avg_energy'],
+        'avgBattery': data['avg_battery'],
+        'avgBackup': data['avg_backup'],
+        // time slots of the values when the result is downsampled
+        'index': data['index'],
+    };
+}
+
+// adds the time slots [start, done) of an evaluation progress report to the partial result
+function appendResult(current, progress) {
+    const chunk = toResult(progress['metrics']);
+    const result = {};
+    Object.keys(chunk).forEach((key) => {
+        if (chunk[key] !== undefined) {
+            result[key] = (current[key] || []).slice(0, progress['start']).concat(chunk[key]);
+        }
+    });
+    return result;
+}
+
+function TrainingProgress({ progress }) {
+    if (!progress || progress['stage'] !== 'training' || progress['timesteps'] === undefined) {
+        return <></>;
+    }
+    const meanReward = progress['mean_reward'];
+    return (
+        <div className="text-center mt-3">
+            Training: {progress['timesteps']} / {progress['total_timesteps']} steps,{' '}
+            {Math.round(progress['steps_per_sec'])} steps/s, recent mean reward{' '}
+            {meanReward === null ? '-' : meanReward.toFixed(4)}
+        </div>
+    );
+}
+
 function DetailAlgorithm() {
     const [algorithmName, setAlgorithmName] = useState('');
     const [algoParams, updateParams] = useAlgoParams({});
     const [algoResult, setResult] = useState({});
     const [isRunning, setIsRunning] = useState(false);
+    const [jobId, setJobId] = useState(null);
+    const [progress, setProgress] = useState(null);
+
+    const onProgress = (value) => {
+        setProgress(value);
+        if (value['stage'] === 'evaluating' && value['metrics']) {
+            // the charts fill in as the evaluation goes
+            setResult((current) => appendResult(current, value));
+        }
+    };
 
     const runAlgorithm = () => {
         setIsRunning(true);
         setResult({});
-        APIS.runAlgorithm(algorithmName, algoParams).then((res) => {
-            setResult({
-                'avgTotal': res.data['avg_total'],
-                'avgDelay': res.data['avg_delay'],
-                'avgEnergy': res.data['avg_energy'],
-                'avgBattery': res.data['avg_battery'],
-                'avgBackup': res.data['avg_backup'],
-            })
+        setProgress(null);
+        APIS.submitAlgorithm(algorithmName, algoParams)
+        .then((res) => {
+            setJobId(res.data.id);
+            return followJob(res.data.id, onProgress);
+        })
+        .then((data) => {
+            setResult(toResult(data));
             setIsRunning(false);
+            setJobId(null);
         })
         .catch((e) => {
             setIsRunning(false);
+            setJobId(null);
         });
     };
 
@@ -105,7 +155,19 @@ function DetailAlgorithm() {
                             >
                                 Run algorithm
                             </button>
+                            {isRunning && jobId ? (
+                                <button
+                                    type="button"
+                                    className="btn btn-danger ml-3"
+                                    onClick={(e) => abortJob(jobId)}
+                                >
+                                    Abort
+                                </button>
+                            ) : (
+                                <></>
+                            )}
                         </div>
+                        {isRunning ? <TrainingProgress progress={progress} /> : <></>}
                     </div>
                 ) : (
                     <></>
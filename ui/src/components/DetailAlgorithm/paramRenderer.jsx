@@ -1,7 +1,9 @@
 import { useState, useEffect } from 'react';
+import DropdownList from 'react-widgets/DropdownList';
 import { FontAwesomeIcon } from '@fortawesome/react-fontawesome';
 import { solid } from '@fortawesome/fontawesome-svg-core/import.macro'; // <-- import styles to be used
 import { algorithms } from './algorithms';
+import APIS from '../../services/common';
 
 function InputRenderer({ paramLabel, paramMapping, updateParams }) {
     // const [param, setParam] = useState('');
@@ -101,6 +103,91 @@ function RangeInputRenderer({ paramLabel, paramMapping, updateParams }) {
     );
 }
 
+const SYNTHETIC_TRACE = { name: '', label: 'None (synthetic)' };
+
+// Selects one of the traces on the server, or uploads a CSV/Parquet file as a new one.
+// The file needs a time column and at least one of the workload and green energy columns
+function TraceRenderer({ paramLabel, paramMapping, updateParams }) {
+    const [traces, setTraces] = useState([SYNTHETIC_TRACE]);
+    const [trace, setTrace] = useState(SYNTHETIC_TRACE);
+    const [file, setFile] = useState(null);
+    const [columns, setColumns] = useState({ time_column: 'time', lamda_column: '', g_column: '' });
+    const [message, setMessage] = useState('');
+
+    const loadTraces = () =>
+        APIS.getTraces().then((res) => {
+            const loaded = res.data.map((t) => ({ name: t.name, label: `${t.name} (${t.slots} slots)` }));
+            setTraces([SYNTHETIC_TRACE].concat(loaded));
+            return loaded;
+        });
+
+    useEffect(() => {
+        loadTraces().catch(() => setMessage('Could not load the traces'));
+        updateParams(paramMapping, '');
+    }, []);
+
+    const selectTrace = (next) => {
+        setTrace(next);
+        updateParams(paramMapping, next.name);
+    };
+
+    const upload = () => {
+        const params = {};
+        Object.keys(columns).forEach((key) => {
+            if (columns[key]) {
+                params[key] = columns[key];
+            }
+        });
+        setMessage('Uploading...');
+        APIS.uploadTrace(file, params)
+            .then((res) => {
+                setMessage(`${res.data.name}: ${res.data.slots} slots`);
+                return loadTraces().then(() => selectTrace({ name: res.data.name, label: res.data.name }));
+            })
+            .catch((e) => setMessage((e.response && e.response.data.error) || 'Upload failed'));
+    };
+
+    return (
+        <div className="mt-3 ml-5">
+            <div className="d-flex flex-row">
+                <div className="param-text align-self-center mr-4">
+                    <div className="align-middle">{paramLabel}</div>
+                </div>
+                <div className="algo-input">
+                    <DropdownList
+                        value={trace}
+                        data={traces}
+                        dataKey="name"
+                        textField="label"
+                        onChange={selectTrace}
+                    />
+                </div>
+                <FontAwesomeIcon
+                    className="align-self-center ml-2"
+                    title={algorithms.paramDescription[paramLabel]}
+                    icon={solid('circle-info')}
+                />
+            </div>
+            <div className="mt-2 d-flex flex-row">
+                <input type="file" accept=".csv,.parquet" onChange={(event) => setFile(event.target.files[0])} />
+                {Object.keys(columns).map((key) => (
+                    <input
+                        key={key}
+                        className="ml-2 p-1"
+                        value={columns[key]}
+                        placeholder={key.replace('_', ' ')}
+                        onChange={(event) => setColumns({ ...columns, [key]: event.target.value })}
+                    />
+                ))}
+                <button type="button" className="btn btn-secondary ml-2" disabled={!file} onClick={upload}>
+                    Upload
+                </button>
+            </div>
+            {message ? <div className="mt-1">{message}</div> : <></>}
+        </div>
+    );
+}
+
 const paramRendererMp = {
     'Priority coefficient': InputRenderer,
     'Number of servers': InputRenderer,
@@ -115,6 +202,7 @@ const paramRendererMp = {
     'Dynamic power coefficient': InputRenderer,
     'Server power consumption': InputRenderer,
     'Time steps per episode': InputRenderer,
+    'Scenario trace': TraceRenderer,
     'Training time slots': InputRenderer,
     'Time slots': InputRenderer,
     Verbose: InputRenderer,
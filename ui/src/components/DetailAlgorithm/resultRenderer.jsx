@@ -1,7 +1,12 @@
 import Plot from 'react-plotly.js';
 import _ from 'lodash';
 
-function AreaGraphRenderer({ delayData, bakData, batteryData }) {
+// x values of a series, its time slots when the result is downsampled
+function timeSlots(values, index) {
+    return index || Array.from(Array(values.length).keys());
+}
+
+function AreaGraphRenderer({ delayData, bakData, batteryData, index }) {
     const layout = {
         width: 800,
         height: 600,
@@ -34,19 +39,19 @@ function AreaGraphRenderer({ delayData, bakData, batteryData }) {
                 layout={layout}
                 data={[
                     {
-                        x: Array.from(Array(delayData.length).keys()),
+                        x: timeSlots(delayData, index),
                         y: delayData,
                         name: 'Delay Cost',
                         stackgroup: 'one',
                     },
                     {
-                        x: Array.from(Array(bakData.length).keys()),
+                        x: timeSlots(bakData, index),
                         y: bakData,
                         name: 'Backup Cost',
                         stackgroup: 'one',
                     },
                     {
-                        x: Array.from(Array(batteryData.length).keys()),
+                        x: timeSlots(batteryData, index),
                         y: batteryData,
                         name: 'Battery Cost',
                         stackgroup: 'one',
@@ -57,7 +62,7 @@ function AreaGraphRenderer({ delayData, bakData, batteryData }) {
     );
 }
 
-function AvgLineGraphRenderer({ data, title, yaxisLabel }) {
+function AvgLineGraphRenderer({ data, index, title, yaxisLabel }) {
     const layout = {
         width: 800,
         height: 600,
@@ -88,7 +93,7 @@ function AvgLineGraphRenderer({ data, title, yaxisLabel }) {
         const result = []
         for (const key of Object.keys(data)) {
                 result.push({
-                    x: Array.from(Array(data[key].length).keys()),
+                    x: timeSlots(data[key], _.get(index, key)),
                     y: data[key],
                     type: 'scatter',
                     name: key,
@@ -116,6 +121,7 @@ export default function ResultRenderer({ result, multiAlgorithms }) {
                     delayData={_.get(result, 'avgDelay', [])}
                     bakData={_.get(result, 'avgBackup', [])}
                     batteryData={_.get(result, 'avgBattery', [])}
+                    index={result['index']}
                 />
             ) : (
                 <></>
@@ -123,26 +129,31 @@ export default function ResultRenderer({ result, multiAlgorithms }) {
             {multiAlgorithms !== undefined ? (
                 <>
                     <AvgLineGraphRenderer
+                        index={result['index']}
                         data={result['avgTotal']}
                         title={'Comparing Average Cost'}
                         yaxisLabel={'Time Average Cost'}
                     />
                     <AvgLineGraphRenderer
+                        index={result['index']}
                         data={result['avgDelay']}
                         title={'Comparing Average Delay cost'}
                         yaxisLabel={'Time Average Delay Cost'}
                     />
                     <AvgLineGraphRenderer
+                        index={result['index']}
                         data={result['avgBackup']}
                         title={'Comparing Average Backup Cost'}
                         yaxisLabel={'Time Average Backup Cost'}
                     />
                     <AvgLineGraphRenderer
+                        index={result['index']}
                         data={result['avgBattery']}
                         title={'Comparing Average Battery Cost'}
                         yaxisLabel={'Time Average Battery Cost'}
                     />
                     <AvgLineGraphRenderer
+                        index={result['index']}
                         data={result['avgEnergy']}
                         title={'Comparing Average Energy Cost'}
                         yaxisLabel={'Time Average Energy Cost'}
@@ -4,7 +4,7 @@ import { algorithms } from '../DetailAlgorithm/algorithms';
 import ParamRenderer from '../DetailAlgorithm/paramRenderer';
 import ResultRenderer from '../DetailAlgorithm/resultRenderer';
 import { useAlgoParams } from '../DetailAlgorithm';
-import APIS from '../../services/common';
+import APIS, { waitForJob } from '../../services/common';
 import 'react-widgets/scss/styles.scss';
 import '../DetailAlgorithm/styles.scss';
 
@@ -17,18 +17,19 @@ export default function Overview() {
     const runAlgorithm = () => {
         setIsRunning(true);
         setResult({});
-        APIS.getOverviewInfo({
+        APIS.submitOverview({
             algo_names: algorithmName.toString(),
             ...algoParams,
         })
-        .then((res) => {
-            const data = res.data
+        .then((res) => waitForJob(res.data.id))
+        .then((data) => {
             const newResult = {
                 'avgTotal': {},
                 'avgDelay': {},
                 'avgEnergy': {},
                 'avgBattery': {},
                 'avgBackup': {},
+                'index': {},
             }
             for (const name of algorithmName) {
                 newResult['avgTotal'][name] = data[name]['avg_total']
@@ -36,6 +37,7 @@ export default function Overview() {
                 newResult['avgEnergy'][name] = data[name]['avg_energy']
                 newResult['avgBattery'][name] = data[name]['avg_battery']
                 newResult['avgBackup'][name] = data[name]['avg_backup']
+                newResult['index'][name] = data[name]['index']
             }
             setResult(newResult);
             setIsRunning(false);
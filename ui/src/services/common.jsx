@@ -1,12 +1,136 @@
 import axios from 'axios';
+import { io } from 'socket.io-client';
 
 const API_ROOT = process.env.REACT_APP_API_ROOT || '';
+const JOB_POLL_INTERVAL = 1000;
+// results are fetched as base64 float32 arrays, downsampled to at most max_points time slots
+const RESULT_PARAMS = { format: 'base64', max_points: 2000 };
 
 const APIS = {
     getOverviewInfo: (args) =>
         axios.get(`${API_ROOT}/get_overview`, { params: args }),
     runAlgorithm: (algorithm, args) =>
         axios.get(`${API_ROOT}/run_algorithm/${algorithm}`, { params: args }),
+    submitOverview: (args) =>
+        axios.post(`${API_ROOT}/get_overview`, null, { params: args }),
+    submitAlgorithm: (algorithm, args) =>
+        axios.post(`${API_ROOT}/run_algorithm/${algorithm}`, null, { params: args }),
+    getJob: (jobId) => axios.get(`${API_ROOT}/jobs/${jobId}`, { params: RESULT_PARAMS }),
+    getJobResult: (jobId) =>
+        axios.get(`${API_ROOT}/jobs/${jobId}/result`, { params: RESULT_PARAMS }),
+    cancelJob: (jobId) => axios.delete(`${API_ROOT}/jobs/${jobId}`),
+    getTraces: () => axios.get(`${API_ROOT}/traces`),
+    // params name the columns of the file, see POST /traces in server/src/app.py
+    uploadTrace: (file, params) => {
+        const form = new FormData();
+        form.append('file', file);
+        return axios.post(`${API_ROOT}/traces`, form, { params: params });
+    },
 };
 
+// Decodes the base64 series of a result ({"dtype": "<f4", "length": n, "data": ...}) into arrays of numbers,
+// the typed arrays use the byte order of the platform, which is little-endian in every browser in use
+function decodeResult(result) {
+    if (result === null || typeof result !== 'object') {
+        return result;
+    }
+    if (result['dtype'] !== undefined && result['data'] !== undefined) {
+        const bytes = Uint8Array.from(atob(result['data']), (c) => c.charCodeAt(0));
+        const values = result['dtype'] === '<i4' ? new Int32Array(bytes.buffer) : new Float32Array(bytes.buffer);
+        return Array.from(values);
+    }
+    const decoded = {};
+    for (const key of Object.keys(result)) {
+        decoded[key] = decodeResult(result[key]);
+    }
+    return decoded;
+}
+
+// Polls a submitted job until it is done, resolves with its result and rejects when it fails or is cancelled
+function waitForJob(jobId, onProgress) {
+    return new Promise((resolve, reject) => {
+        const poll = () => {
+            APIS.getJob(jobId)
+                .then((res) => {
+                    const job = res.data;
+                    if (job.status === 'finished') {
+                        resolve(decodeResult(job.result));
+                    } else if (job.status === 'failed' || job.status === 'cancelled') {
+                        reject(new Error(job.error || job.status));
+                    } else {
+                        if (onProgress) {
+                            onProgress(job);
+                        }
+                        setTimeout(poll, JOB_POLL_INTERVAL);
+                    }
+                })
+                .catch(reject);
+        };
+        poll();
+    });
+}
+
+let socket = null;
+
+function getSocket() {
+    if (socket === null) {
+        socket = API_ROOT ? io(API_ROOT) : io();
+    }
+    return socket;
+}
+
+// Follows a submitted job over Socket.IO, onProgress(progress) is called for every progress report.
+// Resolves with its result, fetched once the job is finished, and rejects when it fails or is cancelled
+function followJob(jobId, onProgress) {
+    const jobSocket = getSocket();
+    return new Promise((resolve, reject) => {
+        const subscribe = () => jobSocket.emit('subscribe', { id: jobId });
+        const stop = () => {
+            jobSocket.off('connect', subscribe);
+            jobSocket.off('job', onJob);
+            jobSocket.off('progress', onJobProgress);
+            jobSocket.off('job_error', onJobError);
+            jobSocket.emit('unsubscribe', { id: jobId });
+        };
+        const onJob = (job) => {
+            if (job.id !== jobId) {
+                return;
+            }
+            if (job.status === 'finished') {
+                stop();
+                APIS.getJobResult(jobId)
+                    .then((res) => resolve(decodeResult(res.data)))
+                    .catch(reject);
+            } else if (job.status === 'failed' || job.status === 'cancelled') {
+                stop();
+                reject(new Error(job.error || job.status));
+            }
+        };
+        const onJobProgress = (data) => {
+            if (data.id === jobId && onProgress) {
+                onProgress(data.progress);
+            }
+        };
+        const onJobError = (data) => {
+            if (data.id === jobId) {
+                stop();
+                reject(new Error(data.error));
+            }
+        };
+        jobSocket.on('job', onJob);
+        jobSocket.on('progress', onJobProgress);
+        jobSocket.on('job_error', onJobError);
+        // the server forgets the rooms of a disconnected client, subscribe again on every (re)connection
+        jobSocket.on('connect', subscribe);
+        if (jobSocket.connected) {
+            subscribe();
+        }
+    });
+}
+
+function abortJob(jobId) {
+    getSocket().emit('abort', { id: jobId });
+}
+
+export { waitForJob, followJob, abortJob, decodeResult };
 export default APIS;